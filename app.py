@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta, date
-from db import Database
+from db import Database, BookingResult
+import viewmodel
+import columnar
 import calendar
 from pathlib import Path
 import time
@@ -34,7 +36,12 @@ load_css()
 # ============================================================================
 # INITIALIZE DATABASE & SESSION STATE
 # ============================================================================
-db = Database()
+@st.cache_resource
+def get_database():
+    # Dibuat sekali per proses dan dipakai bersama semua sesi/rerun
+    return Database()
+
+db = get_database()
 
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -260,25 +267,25 @@ def show_home():
     
     # Ambil data dari database
     try:
-        room_df, asset_df, vehicle_df = db.get_user_bookings(user['id'])
+        counts = db.get_user_booking_counts(user['id'])
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_rooms = len(room_df)
+            total_rooms = counts['Ruangan']['total']
             st.metric("Ruangan", str(total_rooms), "Booking")
         
         with col2:
-            total_assets = len(asset_df)
+            total_assets = counts['Aset']['total']
             st.metric("Aset", str(total_assets), "Peminjaman")
         
         with col3:
-            total_vehicles = len(vehicle_df)
+            total_vehicles = counts['Kendaraan']['total']
             st.metric("Kendaraan", str(total_vehicles), "Pemesanan")
         
         with col4:
-            # Semua booking langsung disetujui
-            approved = len(room_df) + len(asset_df) + len(vehicle_df)
+            # Booking yang masih berstatus disetujui (tidak termasuk yang dibatalkan)
+            approved = counts['total'].get('disetujui', 0)
             st.metric("Disetujui", str(approved), "Semua")
     
     except Exception as e:
@@ -332,6 +339,22 @@ def show_room_booking():
         booking_date = st.date_input("Tanggal Penggunaan", min_value=date.today(), key="room_date_input")
         start_time = st.time_input("Jam Mulai (WIB)", key="room_start_input")
         end_time = st.time_input("Jam Selesai (WIB)", key="room_end_input")
+        
+        # Rapat rutin: disimpan sebagai satu seri, bukan satu booking per tanggal
+        repeat = st.checkbox("Ulangi booking (rapat rutin)", key="room_repeat_input")
+        if repeat:
+            frequency = st.selectbox("Pengulangan", ["Mingguan", "Harian", "Bulanan"], key="room_frequency_input")
+            every = st.number_input("Setiap berapa kali", min_value=1, max_value=12, value=1, key="room_every_input",
+                                    help="Contoh: 2 dengan pengulangan Mingguan = dua minggu sekali")
+            end_mode = st.radio("Berakhir", ["Pada tanggal", "Setelah jumlah pertemuan"], horizontal=True,
+                                key="room_end_mode_input")
+            if end_mode == "Pada tanggal":
+                until_date = st.date_input("Tanggal Akhir", min_value=booking_date, key="room_until_input")
+                repeat_count = None
+            else:
+                until_date = None
+                repeat_count = st.number_input("Jumlah pertemuan", min_value=1, max_value=100, value=4,
+                                               key="room_count_input")
     
     with col2:
         st.markdown("**Informasi Pemesanan**")
@@ -359,10 +382,8 @@ def show_room_booking():
             # Buat pilihan ruangan
             room_options = []
             for room in available_rooms:
-                room_id = room[0]
-                room_name = room[1]
-                capacity = room[2] if len(room) > 2 else "N/A"
-                room_options.append(f"{room_name} (Kapasitas: {capacity} orang)")
+                capacity = room.capacity if room.capacity is not None else "N/A"
+                room_options.append(f"{room.name} (Kapasitas: {capacity} orang)")
             
             # Tampilkan dropdown pilihan
             selected_room_option = st.selectbox(
@@ -375,8 +396,8 @@ def show_room_booking():
             selected_room_name = selected_room_option.split(" (Kapasitas:")[0]
             selected_room_id = None
             for room in available_rooms:
-                if room[1] == selected_room_name:
-                    selected_room_id = room[0]
+                if room.name == selected_room_name:
+                    selected_room_id = room.id
                     break
         else:
             st.warning("Tidak ada ruangan tersedia pada waktu tersebut.")
@@ -400,27 +421,46 @@ def show_room_booking():
                 st.error("Pilih ruangan terlebih dahulu!")
             else:
                 with st.spinner("Memproses booking..."):
-                    success = db.add_room_booking(
-                        st.session_state.user['id'],
-                        selected_room_id,
-                        str(booking_date),
-                        str(start_time),
-                        str(end_time),
-                        purpose,
-                        user_name  # Ini adalah requester_name dari input field
-                    )
+                    if repeat:
+                        # Ketersediaan di atas hanya untuk tanggal pertama; seluruh seri dicek saat disimpan
+                        result = db.book_room_series(
+                            st.session_state.user['id'],
+                            selected_room_id,
+                            str(booking_date),
+                            str(start_time),
+                            str(end_time),
+                            purpose,
+                            frequency=frequency.lower(),
+                            every=every,
+                            until=str(until_date) if until_date else None,
+                            count=repeat_count,
+                            requester_name=user_name
+                        )
+                    else:
+                        result = db.book_room(
+                            st.session_state.user['id'],
+                            selected_room_id,
+                            str(booking_date),
+                            str(start_time),
+                            str(end_time),
+                            purpose,
+                            user_name  # Ini adalah requester_name dari input field
+                        )
                     
-                    if success:
-                        try:
-                            db.export_bookings_to_csv("booking.csv")
-                        except Exception as e:
-                            print(f"Error saving to CSV: {e}")
+                    if result:
+                        # booking.csv diperbarui di latar, pengguna tidak ikut menunggu
+                        db.request_export("booking.csv")
                         
                         # Cari nama ruangan untuk pesan sukses
                         room_name = selected_room_name if 'selected_room_name' in locals() else "Ruangan"
                         st.success(f"Booking berhasil! Ruangan: {room_name} (Langsung Disetujui)")
                         time.sleep(1)
                         st.rerun()
+                    elif result.status == BookingResult.CONFLICT:
+                        # Sudah didahului pengguna lain sejak daftar pilihan ditampilkan
+                        st.error(f"{result.message}. Silakan pilih waktu atau ruangan lain.")
+                    elif result.status == BookingResult.INVALID:
+                        st.error(result.message)
                     else:
                         st.error("Booking gagal. Silakan coba lagi.")
 def show_asset_booking():
@@ -462,10 +502,7 @@ def show_asset_booking():
             # Buat pilihan aset
             asset_options = []
             for asset in available_assets:
-                asset_id = asset[0]
-                asset_name = asset[1]
-                asset_type_name = asset[2] if len(asset) > 2 else "N/A"
-                asset_options.append(f"{asset_name} ({asset_type_name})")
+                asset_options.append(f"{asset.name} ({asset.type})")
             
             # Tampilkan dropdown pilihan
             selected_asset_option = st.selectbox(
@@ -478,8 +515,8 @@ def show_asset_booking():
             selected_asset_name = selected_asset_option.split(" (")[0]
             selected_asset_id = None
             for asset in available_assets:
-                if asset[1] == selected_asset_name:
-                    selected_asset_id = asset[0]
+                if asset.name == selected_asset_name:
+                    selected_asset_id = asset.id
                     break
         else:
             st.warning(f"Tidak ada {asset_type} tersedia pada periode tersebut.")
@@ -502,7 +539,7 @@ def show_asset_booking():
                 st.error("Pilih aset terlebih dahulu!")
             else:
                 with st.spinner("Memproses peminjaman..."):
-                    success = db.add_asset_booking(
+                    result = db.book_asset(
                         st.session_state.user['id'],
                         selected_asset_id,
                         str(borrow_date),
@@ -512,17 +549,18 @@ def show_asset_booking():
                     )
                        
                     
-                    if success:
-                        try:
-                            db.export_bookings_to_csv("booking.csv")
-                        except Exception as e:
-                            print(f"Error saving to CSV: {e}")
+                    if result:
+                        # booking.csv diperbarui di latar, pengguna tidak ikut menunggu
+                        db.request_export("booking.csv")
                         
                         # Cari nama aset untuk pesan sukses
                         asset_name = selected_asset_name if 'selected_asset_name' in locals() else "Aset"
                         st.success(f"Peminjaman berhasil! Aset: {asset_name} (Langsung Disetujui)")
                         time.sleep(1)
                         st.rerun()
+                    elif result.status == BookingResult.CONFLICT:
+                        # Sudah didahului pengguna lain sejak daftar pilihan ditampilkan
+                        st.error(f"{result.message}. Silakan pilih waktu atau aset lain.")
                     else:
                         st.error("Peminjaman gagal. Silakan coba lagi.")
 def show_vehicle_booking():
@@ -573,10 +611,8 @@ def show_vehicle_booking():
             # Buat pilihan kendaraan
             vehicle_options = []
             for vehicle in available_vehicles:
-                vehicle_id = vehicle[0]
-                vehicle_name = vehicle[1]
-                plate_number = vehicle[3] if len(vehicle) > 3 else "N/A"
-                vehicle_options.append(f"{vehicle_name} ({plate_number})")
+                plate_number = vehicle.plate_number if vehicle.plate_number else "N/A"
+                vehicle_options.append(f"{vehicle.name} ({plate_number})")
             
             # Tampilkan dropdown pilihan
             selected_vehicle_option = st.selectbox(
@@ -589,8 +625,8 @@ def show_vehicle_booking():
             selected_vehicle_name = selected_vehicle_option.split(" (")[0]
             selected_vehicle_id = None
             for vehicle in available_vehicles:
-                if vehicle[1] == selected_vehicle_name:
-                    selected_vehicle_id = vehicle[0]
+                if vehicle.name == selected_vehicle_name:
+                    selected_vehicle_id = vehicle.id
                     break
         else:
             st.warning(f"Tidak ada {vehicle_type} tersedia pada waktu tersebut.")
@@ -616,7 +652,7 @@ def show_vehicle_booking():
                 session_info = time_sessions[selected_session]
                 
                 with st.spinner("Memproses pemesanan..."):
-                    success = db.add_vehicle_booking(
+                    result = db.book_vehicle(
                         st.session_state.user['id'],
                         selected_vehicle_id,
                         str(booking_date),
@@ -629,22 +665,112 @@ def show_vehicle_booking():
                     )
 
                     
-                    if success:
-                        try:
-                            db.export_bookings_to_csv("booking.csv")
-                        except Exception as e:
-                            print(f"Error saving to CSV: {e}")
+                    if result:
+                        # booking.csv diperbarui di latar, pengguna tidak ikut menunggu
+                        db.request_export("booking.csv")
                         
                         # Cari nama kendaraan untuk pesan sukses
                         vehicle_name = selected_vehicle_name if 'selected_vehicle_name' in locals() else "Kendaraan"
                         st.success(f"Pemesanan berhasil! Kendaraan: {vehicle_name} (Langsung Disetujui)")
                         time.sleep(1)
                         st.rerun()
+                    elif result.status == BookingResult.CONFLICT:
+                        # Sudah didahului pengguna lain sejak daftar pilihan ditampilkan
+                        st.error(f"{result.message}. Silakan pilih waktu atau kendaraan lain.")
                     else:
                         st.error("Pemesanan gagal. Silakan coba lagi.")
 # ============================================================================
 # HALAMAN RIWAYAT
 # ============================================================================
+# Jumlah baris riwayat per halaman; halaman berikutnya dimuat dengan tombol "Muat lebih banyak"
+RIWAYAT_PAGE_SIZE = 20
+
+
+def load_riwayat_pages(booking_type):
+    """Ambil halaman riwayat user yang sudah dibuka untuk satu jenis booking -> (df, masih_ada)"""
+    pages = st.session_state.get(f"riwayat_pages_{booking_type}", 1)
+    frames = []
+    cursor = None
+    for _ in range(pages):
+        page_df, cursor = db.get_user_bookings_page(
+            st.session_state.user['id'], booking_type, RIWAYAT_PAGE_SIZE, after=cursor
+        )
+        frames.append(page_df)
+        if cursor is None:
+            break
+    return pd.concat(frames, ignore_index=True), cursor is not None
+
+
+def show_more_button(booking_type):
+    """Tombol untuk memuat halaman riwayat berikutnya"""
+    key = f"riwayat_pages_{booking_type}"
+    if st.button("Muat lebih banyak", key=f"more_{booking_type}"):
+        st.session_state[key] = st.session_state.get(key, 1) + 1
+        st.rerun()
+
+
+def show_room_series():
+    """Booking ruangan berulang milik user: daftar seri, lewati satu tanggal, atau batalkan seri"""
+    try:
+        series_df = db.get_user_room_series(st.session_state.user['id'])
+    except Exception as e:
+        st.error(f"Error memuat booking berulang: {str(e)}")
+        return
+    if series_df.empty:
+        return
+    
+    st.markdown("---")
+    st.markdown("### Booking Berulang")
+    
+    display_df = series_df[['item_name', 'frequency', 'first_date', 'last_date', 'start_time', 'end_time',
+                            'purpose', 'active_count', 'next_date', 'status']].copy()
+    display_df.columns = ['Ruangan', 'Pengulangan', 'Mulai', 'Sampai', 'Jam Mulai', 'Jam Selesai',
+                          'Keperluan', 'Jadwal Aktif', 'Berikutnya', 'Status']
+    display_df['Pengulangan'] = series_df['frequency'].str.capitalize() + series_df['every'].map(
+        lambda every: '' if every == 1 else f" (tiap {every})"
+    )
+    display_df['Berikutnya'] = display_df['Berikutnya'].fillna('-')
+    display_df['Status'] = viewmodel.capitalize_status(display_df['Status'])
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    active_series = series_df[series_df['status'] == 'disetujui']
+    if active_series.empty:
+        return
+    
+    series_labels = viewmodel.option_labels(active_series, viewmodel.SERIES_OPTION_LABEL)
+    selected_series = st.selectbox(
+        "Pilih booking berulang:",
+        options=series_labels.tolist(),
+        key="series_select"
+    )
+    series_id = int(active_series.loc[series_labels == selected_series, 'id'].iloc[0])
+    upcoming = db.get_room_series_upcoming(series_id)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if upcoming:
+            skip_date = st.selectbox("Tanggal yang dilewati:", options=upcoming, key="series_skip_date")
+            if st.button("Lewati Tanggal Ini", key="series_skip_btn", use_container_width=True):
+                with st.spinner("Membatalkan jadwal..."):
+                    if db.cancel_booking(series_id, 'Ruangan', occurrence_date=skip_date):
+                        st.success(f"Jadwal {skip_date} berhasil dibatalkan!")
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error("Gagal membatalkan jadwal!")
+        else:
+            st.info("Tidak ada jadwal mendatang pada seri ini")
+    with col2:
+        if st.button("Batalkan Seluruh Seri", key="series_cancel_btn", type="primary", use_container_width=True):
+            with st.spinner("Membatalkan booking berulang..."):
+                if db.cancel_booking(series_id, 'Ruangan'):
+                    st.success("Booking berulang berhasil dibatalkan!")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.error("Gagal membatalkan booking berulang!")
+
+
 def show_riwayat():
     show_navbar()
     
@@ -664,7 +790,7 @@ def show_riwayat():
         st.markdown("### Riwayat Pemesanan Ruangan")
         
         try:
-            room_df, _, _ = db.get_user_bookings(st.session_state.user['id'])
+            room_df, has_more = load_riwayat_pages('Ruangan')
             if not room_df.empty:
                 # Format kolom untuk tampilan
                 display_df = room_df[['id', 'date', 'item_name', 'start_time', 'end_time', 'purpose', 'status']].copy()
@@ -673,6 +799,8 @@ def show_riwayat():
                 
                 # Tampilkan dataframe tanpa kolom ID
                 st.dataframe(display_df.drop('ID', axis=1), use_container_width=True)
+                if has_more:
+                    show_more_button('Ruangan')
                 
                 # Fitur pembatalan
                 st.markdown("---")
@@ -683,11 +811,9 @@ def show_riwayat():
                 
                 if not active_bookings.empty:
                     # Buat opsi untuk dropdown
-                    booking_options = []
-                    for _, row in active_bookings.iterrows():
-                        booking_options.append(
-                            f"ID {row['ID']}: {row['Ruangan']} - {row['Tanggal']} ({row['Jam Mulai']} - {row['Jam Selesai']})"
-                        )
+                    booking_options = viewmodel.option_labels(
+                        active_bookings, viewmodel.CANCEL_OPTION_LABELS['Ruangan']
+                    ).tolist()
                     
                     selected_option = st.selectbox(
                         "Pilih booking yang akan dibatalkan:",
@@ -720,12 +846,14 @@ def show_riwayat():
         except Exception as e:
             st.error(f"Error memuat data ruangan: {str(e)}")
             st.info("Belum ada riwayat pemesanan ruangan.")
+        
+        show_room_series()
     
     with tab2:
         st.markdown("### Riwayat Peminjaman Aset")
         
         try:
-            _, asset_df, _ = db.get_user_bookings(st.session_state.user['id'])
+            asset_df, has_more = load_riwayat_pages('Aset')
             if not asset_df.empty:
                 # Format kolom untuk tampilan
                 display_df = asset_df[['id', 'borrow_date', 'return_date', 'item_name', 'purpose', 'status']].copy()
@@ -734,6 +862,8 @@ def show_riwayat():
                 
                 # Tampilkan dataframe tanpa kolom ID
                 st.dataframe(display_df.drop('ID', axis=1), use_container_width=True)
+                if has_more:
+                    show_more_button('Aset')
                 
                 # Fitur pembatalan
                 st.markdown("---")
@@ -744,11 +874,9 @@ def show_riwayat():
                 
                 if not active_bookings.empty:
                     # Buat opsi untuk dropdown
-                    booking_options = []
-                    for _, row in active_bookings.iterrows():
-                        booking_options.append(
-                            f"ID {row['ID']}: {row['Aset']} - {row['Tanggal Pinjam']} s/d {row['Tanggal Kembali']}"
-                        )
+                    booking_options = viewmodel.option_labels(
+                        active_bookings, viewmodel.CANCEL_OPTION_LABELS['Aset']
+                    ).tolist()
                     
                     selected_option = st.selectbox(
                         "Pilih peminjaman yang akan dibatalkan:",
@@ -786,7 +914,7 @@ def show_riwayat():
         st.markdown("### Riwayat Pemesanan Kendaraan")
         
         try:
-            _, _, vehicle_df = db.get_user_bookings(st.session_state.user['id'])
+            vehicle_df, has_more = load_riwayat_pages('Kendaraan')
             if not vehicle_df.empty:
                 # Format kolom untuk tampilan
                 display_df = vehicle_df[['id', 'start_date', 'end_date', 'item_name', 'destination', 'purpose', 'status']].copy()
@@ -795,6 +923,8 @@ def show_riwayat():
                 
                 # Tampilkan dataframe tanpa kolom ID
                 st.dataframe(display_df.drop('ID', axis=1), use_container_width=True)
+                if has_more:
+                    show_more_button('Kendaraan')
                 
                 # Fitur pembatalan
                 st.markdown("---")
@@ -805,11 +935,9 @@ def show_riwayat():
                 
                 if not active_bookings.empty:
                     # Buat opsi untuk dropdown
-                    booking_options = []
-                    for _, row in active_bookings.iterrows():
-                        booking_options.append(
-                            f"ID {row['ID']}: {row['Kendaraan']} - {row['Tanggal Mulai']} s/d {row['Tanggal Kembali']}"
-                        )
+                    booking_options = viewmodel.option_labels(
+                        active_bookings, viewmodel.CANCEL_OPTION_LABELS['Kendaraan']
+                    ).tolist()
                     
                     selected_option = st.selectbox(
                         "Pilih pemesanan yang akan dibatalkan:",
@@ -846,6 +974,24 @@ def show_riwayat():
 # ============================================================================
 # HALAMAN ADMIN 
 # ============================================================================
+# Label pilihan format export -> format untuk db.export_*
+EXPORT_FORMATS = {'CSV': 'csv', 'Parquet': 'parquet', 'Arrow IPC': 'arrow'}
+
+
+def export_format_picker(key):
+    """Pilihan format export (+ kompresi untuk format kolumnar) -> (format, kompresi, ekstensi, mime)
+    
+    Parquet/Arrow hanya ditawarkan bila pyarrow terpasang.
+    """
+    labels = list(EXPORT_FORMATS) if columnar.available() else ['CSV']
+    file_format = EXPORT_FORMATS[st.selectbox("Format File", labels, key=f"{key}_format")]
+    if file_format == 'csv':
+        return file_format, None, '.csv', 'text/csv'
+    extension, mime, compressions = columnar.FORMATS[file_format]
+    compression = st.selectbox("Kompresi", compressions, key=f"{key}_compression")
+    return file_format, compression, extension, mime
+
+
 def show_admin():
     show_navbar()
     
@@ -909,13 +1055,11 @@ def show_admin():
             if not rooms_df.empty:
                 with st.expander("Hapus Ruangan"):
                     # Buat pilihan untuk dropdown
-                    room_options = []
-                    for _, row in rooms_df.iterrows():
-                        room_options.append(f"{row['name']} (Kapasitas: {row['capacity']})")
+                    room_labels = viewmodel.option_labels(rooms_df, viewmodel.CATALOG_OPTION_LABELS['rooms'])
                     
                     selected_room = st.selectbox(
                         "Pilih Ruangan yang akan dihapus",
-                        options=room_options,
+                        options=room_labels.tolist(),
                         key="delete_room_select"
                     )
                     
@@ -924,11 +1068,8 @@ def show_admin():
                         room_name = selected_room.split(" (Kapasitas:")[0]
                         
                         # Cari ID ruangan
-                        room_id = None
-                        for _, row in rooms_df.iterrows():
-                            if row['name'] == room_name:
-                                room_id = row['id']
-                                break
+                        matches = rooms_df.loc[room_labels == selected_room, 'id']
+                        room_id = int(matches.iloc[0]) if not matches.empty else None
                         
                         if room_id and db.delete_room(room_id):
                             st.success(f"Ruangan '{room_name}' berhasil dihapus!")
@@ -966,13 +1107,11 @@ def show_admin():
             if not assets_df.empty:
                 with st.expander("Hapus Aset"):
                     # Buat pilihan untuk dropdown
-                    asset_options = []
-                    for _, row in assets_df.iterrows():
-                        asset_options.append(f"{row['name']} ({row['type']})")
+                    asset_labels = viewmodel.option_labels(assets_df, viewmodel.CATALOG_OPTION_LABELS['assets'])
                     
                     selected_asset = st.selectbox(
                         "Pilih Aset yang akan dihapus",
-                        options=asset_options,
+                        options=asset_labels.tolist(),
                         key="delete_asset_select"
                     )
                     
@@ -981,11 +1120,8 @@ def show_admin():
                         asset_name = selected_asset.split(" (")[0]
                         
                         # Cari ID aset
-                        asset_id = None
-                        for _, row in assets_df.iterrows():
-                            if row['name'] == asset_name:
-                                asset_id = row['id']
-                                break
+                        matches = assets_df.loc[asset_labels == selected_asset, 'id']
+                        asset_id = int(matches.iloc[0]) if not matches.empty else None
                         
                         if asset_id and db.delete_asset(asset_id):
                             st.success(f"Aset '{asset_name}' berhasil dihapus!")
@@ -1023,13 +1159,11 @@ def show_admin():
             if not vehicles_df.empty:
                 with st.expander("Hapus Kendaraan"):
                     # Buat pilihan untuk dropdown
-                    vehicle_options = []
-                    for _, row in vehicles_df.iterrows():
-                        vehicle_options.append(f"{row['name']} ({row['plate_number']})")
+                    vehicle_labels = viewmodel.option_labels(vehicles_df, viewmodel.CATALOG_OPTION_LABELS['vehicles'])
                     
                     selected_vehicle = st.selectbox(
                         "Pilih Kendaraan yang akan dihapus",
-                        options=vehicle_options,
+                        options=vehicle_labels.tolist(),
                         key="delete_vehicle_select"
                     )
                     
@@ -1038,11 +1172,8 @@ def show_admin():
                         vehicle_name = selected_vehicle.split(" (")[0]
                         
                         # Cari ID kendaraan
-                        vehicle_id = None
-                        for _, row in vehicles_df.iterrows():
-                            if row['name'] == vehicle_name:
-                                vehicle_id = row['id']
-                                break
+                        matches = vehicles_df.loc[vehicle_labels == selected_vehicle, 'id']
+                        vehicle_id = int(matches.iloc[0]) if not matches.empty else None
                         
                         if vehicle_id and db.delete_vehicle(vehicle_id):
                             st.success(f"Kendaraan '{vehicle_name}' berhasil dihapus!")
@@ -1113,7 +1244,37 @@ def show_admin():
                         value=total_all,
                         delta="Semua Disetujui"
                     )
-            
+
+            # Status pool koneksi database
+            with st.expander("Status Koneksi Database"):
+                pool_stats = db.get_pool_stats()
+                col_pool1, col_pool2, col_pool3, col_pool4 = st.columns(4)
+
+                with col_pool1:
+                    st.metric("Koneksi Terbuka", f"{pool_stats['open']} / {pool_stats['max_size']}")
+
+                with col_pool2:
+                    st.metric("Sedang Dipakai", pool_stats['in_use'])
+
+                with col_pool3:
+                    st.metric("Total Checkout", pool_stats['checkouts'])
+
+                with col_pool4:
+                    st.metric("Menunggu Koneksi", pool_stats['waits'], f"rata-rata {pool_stats['avg_wait_ms']} ms")
+
+                catalog_stats = db.get_catalog_stats()
+                st.caption(
+                    f"Cache katalog: {catalog_stats['hits']} hit, {catalog_stats['misses']} miss "
+                    f"({catalog_stats['hit_rate']}% hit), {catalog_stats['invalidations']} invalidasi"
+                )
+                export_stats = db.get_export_stats("booking.csv")
+                last_export = export_stats['last_export_ms']
+                st.caption(
+                    f"Export booking.csv di latar: antrean {export_stats['queue_depth']}, "
+                    f"{export_stats['exports']} export ({export_stats['coalesced']} event digabung), "
+                    f"terakhir {'-' if last_export is None else f'{last_export} ms'}, {export_stats['errors']} error"
+                )
+
             # Export Data Booking
             st.markdown("---")
             st.markdown("#### Export Data Booking")
@@ -1121,27 +1282,31 @@ def show_admin():
             # Card untuk export semua booking
             with st.container():
                 st.markdown("##### Export Semua Data Booking")
-                st.markdown("Download semua data booking dalam satu file CSV.")
+                st.markdown("Download semua data booking dalam satu file CSV, Parquet, atau Arrow.")
                 
                 col_export1, col_export2 = st.columns([3, 1])
                 
                 with col_export1:
-                    st.info("File berisi semua data booking ruangan, aset, dan kendaraan.")
+                    st.info("File berisi semua data booking ruangan, aset, dan kendaraan. "
+                            "Parquet/Arrow menyimpan tanggal & jam bertipe dan lebih kecil untuk analisis.")
+                    export_format, export_compression, export_ext, export_mime = export_format_picker("export_all")
                 
                 with col_export2:
                     if st.button("Export Semua", key="export_all_csv", use_container_width=True):
                         with st.spinner("Sedang mengexport data..."):
-                            if db.export_bookings_to_csv("booking_lengkap.csv"):
+                            export_path = f"booking_lengkap{export_ext}"
+                            if db.export_bookings_to_csv(export_path, file_format=export_format,
+                                                         compression=export_compression):
                                 st.success("Data berhasil diexport!")
                                 
                                 # Tombol download
                                 try:
-                                    with open("booking_lengkap.csv", "rb") as file:
+                                    with open(export_path, "rb") as file:
                                         st.download_button(
-                                            label="Download File CSV",
+                                            label=f"Download File {export_ext[1:].upper()}",
                                             data=file,
-                                            file_name=f"booking_lengkap_{date.today()}.csv",
-                                            mime="text/csv",
+                                            file_name=f"booking_lengkap_{date.today()}{export_ext}",
+                                            mime=export_mime,
                                             use_container_width=True
                                         )
                                 except:
@@ -1168,14 +1333,16 @@ def show_admin():
                     st.markdown("")
                     st.markdown("")
                     st.info(f"Data untuk: **{selected_date}**")
+                    daily_format, daily_compression, daily_ext, daily_mime = export_format_picker("export_daily")
                 
                 with col_date3:
                     st.markdown("")
                     st.markdown("")
                     if st.button("Export Harian", key="export_daily_csv", use_container_width=True):
                         with st.spinner(f"Mengexport data {selected_date}..."):
-                            file_name = f"booking_{selected_date}.csv"
-                            if db.export_daily_bookings(str(selected_date), file_name):
+                            file_name = f"booking_{selected_date}{daily_ext}"
+                            if db.export_daily_bookings(str(selected_date), file_name, file_format=daily_format,
+                                                        compression=daily_compression):
                                 st.success(f"Data {selected_date} berhasil diexport!")
                                 
                                 # Tombol download
@@ -1185,7 +1352,7 @@ def show_admin():
                                             label=f"Download {selected_date}",
                                             data=file,
                                             file_name=file_name,
-                                            mime="text/csv",
+                                            mime=daily_mime,
                                             use_container_width=True
                                         )
                                 except:
@@ -1361,6 +1528,14 @@ def show_jadwal():
         key="schedule_date_input"
     )
     
+    # Satu query untuk ketiga tab, hanya booking pada tanggal yang dipilih
+    try:
+        room_df, asset_df, vehicle_df = db.get_schedule(selected_date)
+        schedule_error = None
+    except Exception as e:
+        room_df = asset_df = vehicle_df = pd.DataFrame()
+        schedule_error = str(e)
+    
     # Tampilkan jadwal berdasarkan jenis
     tab1, tab2, tab3 = st.tabs(["Ruangan", "Aset", "Kendaraan"])
     
@@ -1368,37 +1543,18 @@ def show_jadwal():
         st.markdown(f"### Jadwal Ruangan - {selected_date}")
         
         try:
-            room_df, _, _ = db.get_all_bookings()
+            if schedule_error:
+                raise Exception(schedule_error)
             
-            if not room_df.empty:
-                # Filter untuk tanggal yang dipilih
-                filtered_df = room_df[room_df['date'] == str(selected_date)]
+            filtered_df = room_df
+            
+            if not filtered_df.empty:
+                # Pemesan: requester_name bila terisi, selain itu user_name; urut jam mulai
+                display_df = viewmodel.schedule_frame('Ruangan', filtered_df)
                 
-                if not filtered_df.empty:
-                    # Gunakan requester_name jika ada dan bukan None/NaN, jika tidak gunakan user_name
-                    filtered_df['display_name'] = filtered_df.apply(
-                        lambda row: row['requester_name'] if pd.notna(row['requester_name']) and row['requester_name'].strip() != '' else row['user_name'], 
-                        axis=1
-                    )
-                    
-                    # Hapus baris yang tidak memiliki nama pemesan
-                    filtered_df = filtered_df[filtered_df['display_name'].notna()]
-                    
-                    # Format dataframe untuk ditampilkan
-                    display_df = filtered_df[['item_name', 'start_time', 'end_time', 'display_name', 'purpose', 'status']].copy()
-                    display_df.columns = ['Ruangan', 'Jam Mulai', 'Jam Selesai', 'Pemesan', 'Keperluan', 'Status']
-                    
-                    # Format status
-                    display_df['Status'] = display_df['Status'].apply(lambda x: str(x).capitalize() if pd.notna(x) else '')
-                    
-                    # Urutkan berdasarkan jam mulai
-                    display_df = display_df.sort_values('Jam Mulai')
-                    
-                    st.dataframe(display_df, use_container_width=True, height=400)
-                else:
-                    st.info(f"Tidak ada jadwal ruangan untuk tanggal {selected_date}.")
+                st.dataframe(display_df, use_container_width=True, height=400)
             else:
-                st.info("Belum ada data booking ruangan di sistem.")
+                st.info(f"Tidak ada jadwal ruangan untuk tanggal {selected_date}.")
                 
         except Exception as e:
             st.error(f"Error loading room schedule: {str(e)}")
@@ -1408,44 +1564,19 @@ def show_jadwal():
         st.markdown(f"### Jadwal Aset Elektronik - {selected_date}")
         
         try:
-            _, asset_df, _ = db.get_all_bookings()
+            if schedule_error:
+                raise Exception(schedule_error)
             
-            if not asset_df.empty:
-                # Filter untuk tanggal yang dipilih - Aset dipinjam jika selected_date antara date dan return_date
-                if 'date' in asset_df.columns and 'return_date' in asset_df.columns:
-                    filtered_df = asset_df[
-                        (asset_df['date'] <= str(selected_date)) & 
-                        (asset_df['return_date'] >= str(selected_date))
-                    ]
-                    
-                    if not filtered_df.empty:
-                        # Gunakan requester_name jika ada dan bukan None/NaN, jika tidak gunakan user_name
-                        filtered_df['display_name'] = filtered_df.apply(
-                            lambda row: row['requester_name'] if pd.notna(row['requester_name']) and row['requester_name'].strip() != '' else row['user_name'], 
-                            axis=1
-                        )
-                        
-                        # Hapus baris yang tidak memiliki nama pemesan
-                        filtered_df = filtered_df[filtered_df['display_name'].notna()]
-                        
-                        # Format dataframe untuk ditampilkan
-                        display_df = filtered_df[['item_name', 'date', 'return_date', 'display_name', 'purpose', 'status']].copy()
-                        display_df.columns = ['Aset', 'Tanggal Pinjam', 'Tanggal Kembali', 'Pemesan', 'Keperluan', 'Status']
-                        
-                        # Format status
-                        display_df['Status'] = display_df['Status'].apply(lambda x: str(x).capitalize() if pd.notna(x) else '')
-                        
-                        # Urutkan berdasarkan tanggal pinjam
-                        display_df = display_df.sort_values('Tanggal Pinjam')
-                        
-                        st.dataframe(display_df, use_container_width=True, height=400)
-                    else:
-                        st.info(f"Tidak ada aset yang dipinjam pada tanggal {selected_date}.")
-                else:
-                    st.warning("Format data aset tidak sesuai")
-                    st.info("Tidak ada data peminjaman aset.")
+            # Aset dipinjam jika selected_date antara date dan return_date (sudah difilter di SQL)
+            filtered_df = asset_df
+            
+            if not filtered_df.empty:
+                # Pemesan: requester_name bila terisi, selain itu user_name; urut tanggal pinjam
+                display_df = viewmodel.schedule_frame('Aset', filtered_df)
+                
+                st.dataframe(display_df, use_container_width=True, height=400)
             else:
-                st.info("Belum ada data peminjaman aset di sistem.")
+                st.info(f"Tidak ada aset yang dipinjam pada tanggal {selected_date}.")
                 
         except Exception as e:
             st.error(f"Error loading asset schedule: {str(e)}")
@@ -1455,41 +1586,18 @@ def show_jadwal():
         st.markdown(f"### Jadwal Kendaraan Dinas - {selected_date}")
         
         try:
-            _, _, vehicle_df = db.get_all_bookings()
+            if schedule_error:
+                raise Exception(schedule_error)
             
-            if not vehicle_df.empty:
-                # Filter untuk tanggal yang dipilih
-                if 'date' in vehicle_df.columns:
-                    filtered_df = vehicle_df[vehicle_df['date'] == str(selected_date)]
-                    
-                    if not filtered_df.empty:
-                        # Gunakan requester_name jika ada dan bukan None/NaN, jika tidak gunakan user_name
-                        filtered_df['display_name'] = filtered_df.apply(
-                            lambda row: row['requester_name'] if pd.notna(row['requester_name']) and row['requester_name'].strip() != '' else row['user_name'], 
-                            axis=1
-                        )
-                        
-                        # Hapus baris yang tidak memiliki nama pemesan
-                        filtered_df = filtered_df[filtered_df['display_name'].notna()]
-                        
-                        # Format dataframe untuk ditampilkan
-                        display_df = filtered_df[['item_name', 'start_time', 'end_time', 'display_name', 'destination', 'purpose', 'status']].copy()
-                        display_df.columns = ['Kendaraan', 'Jam Mulai', 'Jam Selesai', 'Pemesan', 'Tujuan', 'Keperluan', 'Status']
-                        
-                        # Format status
-                        display_df['Status'] = display_df['Status'].apply(lambda x: str(x).capitalize() if pd.notna(x) else '')
-                        
-                        # Urutkan berdasarkan jam mulai
-                        display_df = display_df.sort_values('Jam Mulai')
-                        
-                        st.dataframe(display_df, use_container_width=True, height=400)
-                    else:
-                        st.info(f"Tidak ada kendaraan yang dipesan pada tanggal {selected_date}.")
-                else:
-                    st.warning("Format data kendaraan tidak sesuai")
-                    st.info("Tidak ada data pemesanan kendaraan.")
+            filtered_df = vehicle_df
+            
+            if not filtered_df.empty:
+                # Pemesan: requester_name bila terisi, selain itu user_name; urut jam mulai
+                display_df = viewmodel.schedule_frame('Kendaraan', filtered_df)
+                
+                st.dataframe(display_df, use_container_width=True, height=400)
             else:
-                st.info("Belum ada data pemesanan kendaraan di sistem.")
+                st.info(f"Tidak ada kendaraan yang dipesan pada tanggal {selected_date}.")
                 
         except Exception as e:
             st.error(f"Error loading vehicle schedule: {str(e)}")
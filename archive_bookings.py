@@ -0,0 +1,31 @@
+"""Pindahkan booking lama (dan yang dibatalkan) ke tabel arsip secara bertahap.
+
+Aman dijalankan saat aplikasi berjalan, mis. dari cron setiap malam: tiap batch adalah
+transaksi pendek, dan laporan riwayat lengkap tetap bisa membaca view bookings_history.
+
+Pemakaian:
+    python archive_bookings.py                      # database.db, horizon 365 hari
+    python archive_bookings.py database.db 180 200  # horizon 180 hari, batch 200 baris
+"""
+import argparse
+import sys
+from db import Database
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_name", nargs="?", default="database.db", help="file database (default: database.db)")
+    parser.add_argument("horizon_days", nargs="?", type=int, default=365, help="umur booking yang diarsipkan, hari (default: 365)")
+    parser.add_argument("batch_size", nargs="?", type=int, default=500, help="baris per transaksi (default: 500)")
+    args = parser.parse_args(argv[1:])
+    db = Database(args.db_name)
+
+    moved = db.archive_bookings(horizon_days=args.horizon_days, batch_size=args.batch_size)
+    for booking_type, count in moved.items():
+        print(f"{booking_type:<10} {count:>8} diarsipkan")
+    print(f"OK - {sum(moved.values())} booking dipindahkan ke arsip")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,239 @@
+import bisect
+import threading
+from collections import OrderedDict
+from recurrence import SERIES_ON_DAY_SQL
+
+
+# Predikat bentrok - HARUS identik dengan subquery di available_*_query (db.py).
+# Nilai berupa kolom integer: hari sejak 1970-01-01 dan menit sejak 00:00.
+def room_conflict(start, end, req_start, req_end):
+    """Rentang menit setengah terbuka [mulai, selesai) saling tumpang tindih"""
+    return start < req_end and end > req_start
+
+
+def asset_conflict(borrow, ret, req_borrow, req_return):
+    """Rentang hari tertutup [pinjam, kembali] saling tumpang tindih"""
+    return borrow <= req_return and ret >= req_borrow
+
+
+vehicle_conflict = room_conflict
+
+
+# Per jenis booking: (predikat, SQL pemuat bucket). Ruangan & kendaraan dimuat per hari,
+# aset sekali untuk semua tanggal karena query SQL-nya juga tidak dibatasi tanggal.
+# Kejadian seri ruangan berulang ikut dimuat dengan ID negatif (-ID seri).
+BOOKING_KINDS = {
+    'Ruangan': (room_conflict, f"""
+        SELECT id, room_id, start_minute, end_minute FROM room_bookings
+        WHERE day = :day AND status = 'disetujui'
+        UNION ALL
+        SELECT -s.id, s.room_id, s.start_minute, s.end_minute
+        FROM room_booking_series s JOIN (SELECT :day AS day) q
+        WHERE {SERIES_ON_DAY_SQL}
+    """),
+    'Aset': (asset_conflict, """
+        SELECT id, asset_id, borrow_day, return_day FROM asset_bookings
+        WHERE status = 'disetujui'
+    """),
+    'Kendaraan': (vehicle_conflict, """
+        SELECT id, vehicle_id, start_minute, end_minute FROM vehicle_bookings
+        WHERE start_day = :day AND status = 'disetujui'
+    """),
+}
+
+
+class IntervalSet:
+    """Interval booking satu resource, diurutkan berdasarkan waktu mulai.
+
+    max_end[i] = waktu selesai terbesar di items[0..i], sehingga pencarian bentrok cukup
+    bisect ke waktu mulai lalu berhenti begitu sisa interval pasti selesai sebelum rentang.
+    Interval terbalik (mulai > selesai) disimpan terpisah dan selalu dicek langsung.
+    """
+    __slots__ = ('starts', 'items', 'max_end', 'invalid', 'ids')
+
+    def __init__(self):
+        self.starts = []
+        self.items = []
+        self.max_end = []
+        self.invalid = []
+        self.ids = set()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rebuild_max_end(self, index):
+        del self.max_end[index:]
+        current = self.max_end[-1] if self.max_end else None
+        for _, end, _ in self.items[index:]:
+            current = end if current is None or end > current else current
+            self.max_end.append(current)
+
+    def add(self, start, end, booking_id):
+        if booking_id in self.ids:
+            return
+        self.ids.add(booking_id)
+        if start > end:
+            self.invalid.append((start, end, booking_id))
+            return
+        index = bisect.bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.items.insert(index, (start, end, booking_id))
+        self._rebuild_max_end(index)
+
+    def remove(self, booking_id):
+        if booking_id not in self.ids:
+            return
+        self.ids.discard(booking_id)
+        self.invalid = [item for item in self.invalid if item[2] != booking_id]
+        for index, item in enumerate(self.items):
+            if item[2] == booking_id:
+                del self.starts[index]
+                del self.items[index]
+                self._rebuild_max_end(index)
+                return
+
+    def has_conflict(self, predicate, req_start, req_end):
+        for start, end, _ in self.invalid:
+            if predicate(start, end, req_start, req_end):
+                return True
+
+        # Untuk interval valid, semua predikat bentrok menyiratkan
+        # start <= max(req) dan end >= min(req)
+        upper = max(req_start, req_end)
+        lower = min(req_start, req_end)
+        index = bisect.bisect_right(self.starts, upper) - 1
+        while index >= 0 and self.max_end[index] >= lower:
+            start, end, _ = self.items[index]
+            if predicate(start, end, req_start, req_end):
+                return True
+            index -= 1
+        return False
+
+
+class AvailabilityIndex:
+    """Indeks interval booking 'disetujui' di memori, dipakai bersama oleh semua sesi.
+
+    Bucket dimuat dari database saat pertama kali dibutuhkan lalu diperbarui langsung
+    oleh Database saat booking ditambah/dibatalkan. Perubahan dari proses lain tidak
+    terlihat - panggil invalidate() bila database ditulis dari luar aplikasi.
+    """
+
+    def __init__(self, pool, max_buckets=512):
+        self.pool = pool
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # (jenis, nomor hari) -> {resource_id: IntervalSet}
+        self._locations = {}  # (jenis, booking_id) -> (bucket_key, resource_id)
+        self._generation = 0
+        self.stats = {'hits': 0, 'loads': 0}
+
+    @staticmethod
+    def _bucket_key(kind, day):
+        return (kind, None if kind == 'Aset' else day)
+
+    def _load(self, key):
+        kind, day = key
+        query = BOOKING_KINDS[kind][1]
+        params = {} if day is None else {'day': day}
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        bucket = {}
+        for booking_id, resource_id, start, end in rows:
+            # Baris yang gagal di-backfill (kolom integer NULL) juga tidak pernah bentrok di SQL
+            if start is None or end is None:
+                continue
+            bucket.setdefault(resource_id, IntervalSet()).add(start, end, booking_id)
+        return bucket
+
+    def _get_bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets.move_to_end(key)
+                self.stats['hits'] += 1
+                return bucket
+            generation = self._generation
+
+        bucket = self._load(key)
+
+        with self._lock:
+            self.stats['loads'] += 1
+            # Ada perubahan selama memuat -> hasil tetap dipakai, tapi tidak di-cache
+            if self._generation != generation or key in self._buckets:
+                return self._buckets.get(key, bucket)
+            self._buckets[key] = bucket
+            for resource_id, intervals in bucket.items():
+                for booking_id in intervals.ids:
+                    self._locations[(key[0], booking_id)] = (key, resource_id)
+            while len(self._buckets) > self.max_buckets:
+                self._evict(next(iter(self._buckets)))
+            return bucket
+
+    def _evict(self, key):
+        bucket = self._buckets.pop(key)
+        for intervals in bucket.values():
+            for booking_id in intervals.ids:
+                self._locations.pop((key[0], booking_id), None)
+
+    def busy_resources(self, kind, day, req_start, req_end):
+        """Set resource_id yang bentrok dengan rentang yang diminta"""
+        predicate = BOOKING_KINDS[kind][0]
+        bucket = self._get_bucket(self._bucket_key(kind, day))
+        with self._lock:
+            return {
+                resource_id for resource_id, intervals in bucket.items()
+                if intervals.has_conflict(predicate, req_start, req_end)
+            }
+
+    def filter_available(self, kind, day, req_start, req_end, catalog_rows):
+        """Saring record katalog (atribut id) menjadi yang tidak bentrok"""
+        busy = self.busy_resources(kind, day, req_start, req_end)
+        # Sama seperti NOT IN di SQL: resource_id NULL yang bentrok membuat hasil kosong
+        if None in busy:
+            return []
+        return [row for row in catalog_rows if row.id not in busy]
+
+    def add(self, kind, booking_id, resource_id, day, start, end):
+        """Catat booking 'disetujui' baru (hanya bila bucket-nya sedang dimuat)"""
+        key = self._bucket_key(kind, day)
+        with self._lock:
+            self._generation += 1
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return
+            bucket.setdefault(resource_id, IntervalSet()).add(start, end, booking_id)
+            self._locations[(kind, booking_id)] = (key, resource_id)
+
+    def remove(self, kind, booking_id):
+        """Hapus booking dari indeks (mis. setelah dibatalkan)"""
+        with self._lock:
+            self._generation += 1
+            location = self._locations.pop((kind, booking_id), None)
+            if location is None:
+                return
+            key, resource_id = location
+            bucket = self._buckets.get(key)
+            if bucket is not None and resource_id in bucket:
+                bucket[resource_id].remove(booking_id)
+
+    def invalidate(self, kind=None):
+        """Buang bucket (semua atau satu jenis); akan dimuat ulang saat dibutuhkan"""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._buckets if kind is None or key[0] == kind]:
+                self._evict(key)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_availability_index(pool):
+    """Satu indeks ketersediaan per pool database untuk seluruh proses"""
+    with _indexes_lock:
+        index = _indexes.get(pool)
+        if index is None:
+            index = AvailabilityIndex(pool)
+            _indexes[pool] = index
+        return index
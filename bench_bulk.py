@@ -0,0 +1,70 @@
+"""Benchmark: add_bookings_bulk (satu transaksi + executemany) vs book_room satu per satu.
+
+Skenario: sekretariat memesan semua ruangan untuk satu minggu pelatihan, beberapa sesi
+per hari, ditambah satu duplikat per hari yang harus ditolak sebagai bentrok. Tiap jalur
+memakai database sementara yang baru.
+
+Pemakaian:
+    python bench_bulk.py            # 5 hari x 4 sesi
+    python bench_bulk.py 20 8       # 20 hari x 8 sesi
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from db import Database
+
+
+def training_requests(days, sessions):
+    with Database(":memory:").connection() as conn:
+        room_ids = [row[0] for row in conn.execute("SELECT id FROM rooms ORDER BY id")]
+    requests = []
+    first_day = date(2031, 1, 6)
+    for offset in range(days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        for session in range(sessions):
+            start = 7 * 60 + session * 60
+            for room_id in room_ids:
+                requests.append({
+                    'type': 'Ruangan', 'user_id': 1, 'room_id': room_id, 'date': day,
+                    'start_time': f"{start // 60:02d}:00", 'end_time': f"{start // 60:02d}:50",
+                    'purpose': 'Pelatihan',
+                })
+        requests.append(dict(requests[-1]))  # duplikat -> bentrok
+    return requests
+
+
+def one_by_one(db, requests):
+    return [
+        db.book_room(r['user_id'], r['room_id'], r['date'], r['start_time'], r['end_time'], r['purpose'])
+        for r in requests
+    ]
+
+
+def timed(label, requests, func):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        results = func(db, requests)
+        elapsed = time.perf_counter() - start
+    saved = sum(1 for result in results if result)
+    print(f"{label:<12} {elapsed * 1000:>10.1f} ms {saved:>8} {len(results) - saved:>8}")
+    return elapsed
+
+
+def main(argv):
+    days = int(argv[1]) if len(argv) > 1 else 5
+    sessions = int(argv[2]) if len(argv) > 2 else 4
+    requests = training_requests(days, sessions)
+
+    print(f"{len(requests)} permintaan")
+    print(f"{'jalur':<12} {'waktu':>13} {'tersimpan':>8} {'bentrok':>8}")
+    single = timed("satu-satu", requests, one_by_one)
+    bulk = timed("bulk", requests, lambda db, reqs: db.add_bookings_bulk(reqs))
+    print(f"lebih cepat {single / bulk:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,127 @@
+"""Benchmark: export booking.csv lama (DataFrame + sort) vs streaming (stream_bookings_csv).
+
+Database sementara diisi booking sintetis (60% ruangan, 25% aset, 15% kendaraan) dengan
+Waktu Booking acak selama tiga tahun. Tiap jalur diukur sekali tanpa tracemalloc (latensi)
+dan sekali dengan tracemalloc (alokasi puncak). Memori jalur streaming seharusnya tetap
+sama berapa pun jumlah booking.
+
+Pemakaian:
+    python bench_export.py                # 1.000.000 booking
+    python bench_export.py 100000         # jumlah booking lain
+    python bench_export.py 1000000 stream # hanya jalur streaming
+    python bench_export.py 1000000 stream parquet arrow  # + export kolumnar (butuh pyarrow)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from db import Database, booking_export_row, BOOKING_TABLES
+
+
+def fill_bookings(db, total, seed=7):
+    rng = random.Random(seed)
+    with db.connection() as conn:
+        rooms = [row[0] for row in conn.execute("SELECT id FROM rooms")]
+        assets = [row[0] for row in conn.execute("SELECT id FROM assets")]
+        vehicles = [row[0] for row in conn.execute("SELECT id FROM vehicles")]
+        users = [row[0] for row in conn.execute("SELECT id FROM users")] or [1]
+
+    first = datetime(2023, 1, 1)
+
+    def stamp():
+        return first + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+
+    def row(kind):
+        created = stamp()
+        start = created + timedelta(days=rng.randrange(1, 30))
+        day, hour = start.date().isoformat(), rng.randrange(7, 16)
+        status = 'dibatalkan' if rng.random() < 0.1 else 'disetujui'
+        user = rng.choice(users)
+        if kind == 'Ruangan':
+            return (user, rng.choice(rooms), day, f"{hour:02d}:00", f"{hour + 1:02d}:00",
+                    'Rapat', status, created.strftime('%Y-%m-%d %H:%M:%S'))
+        if kind == 'Aset':
+            back = (start + timedelta(days=rng.randrange(1, 5))).date().isoformat()
+            return (user, rng.choice(assets), day, back, 'Pinjam', status,
+                    created.strftime('%Y-%m-%d %H:%M:%S'))
+        return (user, rng.choice(vehicles), day, day, f"{hour:02d}:00", f"{hour + 2:02d}:00",
+                'Kantor Wilayah', 'Dinas luar', status, created.strftime('%Y-%m-%d %H:%M:%S'))
+
+    inserts = {
+        'Ruangan': "INSERT INTO room_bookings (user_id, room_id, date, start_time, end_time, purpose, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        'Aset': "INSERT INTO asset_bookings (user_id, asset_id, borrow_date, return_date, purpose, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        'Kendaraan': "INSERT INTO vehicle_bookings (user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    }
+    shares = {'Ruangan': 0.60, 'Aset': 0.25, 'Kendaraan': 0.15}
+    with db.connection() as conn:
+        for kind, share in shares.items():
+            count = int(total * share)
+            for offset in range(0, count, 50000):
+                conn.executemany(inserts[kind], [row(kind) for _ in range(min(50000, count - offset))])
+            conn.commit()
+
+
+def legacy_export(db, csv_path):
+    """Jalur export lama: tiga DataFrame -> list dict -> DataFrame -> sort -> to_csv"""
+    import pandas as pd
+    rows = []
+    for booking_type, df in zip(BOOKING_TABLES, db.get_all_bookings()):
+        for _, row in df.iterrows():
+            rows.append(booking_export_row(booking_type, row))
+    export_df = pd.DataFrame(rows).sort_values('Waktu Booking', ascending=False)
+    export_df.to_csv(csv_path, index=False, encoding='utf-8')
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    latency = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, peak
+
+
+def main(argv):
+    total = int(argv[1]) if len(argv) > 1 else 1000000
+    modes = argv[2:] or ['legacy', 'stream']
+    directory = tempfile.mkdtemp(prefix="bench-export-")
+    db = Database(os.path.join(directory, "bench.db"))
+
+    start = time.perf_counter()
+    fill_bookings(db, total)
+    print(f"{total} booking sintetis dibuat dalam {time.perf_counter() - start:.1f} s")
+
+    extensions = {'parquet': '.parquet', 'arrow': '.arrows'}
+    paths = {mode: os.path.join(directory, mode + extensions.get(mode, '.csv')) for mode in modes}
+    exports = {
+        'legacy': lambda: legacy_export(db, paths['legacy']),
+        'stream': lambda: db.export_bookings_to_csv(paths['stream']),
+        'parquet': lambda: db.export_bookings_to_csv(paths['parquet'], file_format='parquet'),
+        'arrow': lambda: db.export_bookings_to_csv(paths['arrow'], file_format='arrow'),
+    }
+    print(f"{'jalur':<8} {'waktu':>10} {'alokasi puncak':>16} {'ukuran file':>14}")
+    for mode in modes:
+        latency, peak = measure(exports[mode])
+        print(f"{mode:<8} {latency:>8.1f} s {peak / 1024 / 1024:>12.1f} MiB "
+              f"{os.path.getsize(paths[mode]) / 1024 / 1024:>10.1f} MiB")
+
+    if 'legacy' in paths and 'stream' in paths:
+        # Isi sama; urutan antar baris dengan Waktu Booking yang sama boleh berbeda
+        contents = {}
+        for mode, path in paths.items():
+            with open(path, encoding='utf-8') as f:
+                header = f.readline()
+                contents[mode] = (header, sorted(f))
+        print("isi file sama:", contents['legacy'] == contents['stream'])
+    print(f"file sementara di {directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
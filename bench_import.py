@@ -0,0 +1,62 @@
+"""Benchmark waktu import (python -X importtime) untuk skrip yang tidak butuh DataFrame.
+
+Skrip contoh hanya memverifikasi login dan menyimpan booking lewat Database. Dijalankan
+dua kali di proses baru: apa adanya (pandas diimpor malas oleh db.py) dan dengan
+`import pandas` di depan, seperti db.py sebelumnya yang mengimpor pandas di awal modul.
+
+Pemakaian:
+    python bench_import.py                 # 5 ulangan, database sementara
+    python bench_import.py 10              # 10 ulangan
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = """
+import sys
+from db import Database
+db = Database({db_path!r})
+db.verify_user('admin', 'admin123')
+db.book_room(1, 1, '2030-01-01', '08:00', '09:00', 'Rapat')
+db.book_vehicle(1, 1, '2030-01-02', '2030-01-02', '08:00', '10:00', 'Kantor', 'Dinas')
+print('pandas' in sys.modules)
+"""
+
+
+def import_time(code):
+    """Total waktu import (detik) dan status pandas dari satu proses baru"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us = line[len("import time:"):].split("|")[0]
+        total_us += int(self_us)
+    return total_us / 1e6, result.stdout.strip().splitlines()[-1] == "True"
+
+
+def main(argv):
+    repeat = int(argv[1]) if len(argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        code = SCRIPT.format(db_path=os.path.join(tmp, "bench.db"))
+        variants = [("tanpa pandas", code), ("import pandas", "import pandas\n" + code)]
+
+        print(f"{'varian':<14} {'import (ms)':>12} {'pandas dimuat':>14}")
+        results = {}
+        for label, source in variants:
+            runs = [import_time(source) for _ in range(repeat)]
+            best = min(seconds for seconds, _ in runs)
+            results[label] = best
+            print(f"{label:<14} {best * 1000:>12.1f} {str(runs[-1][1]):>14}")
+    print(f"lebih cepat {results['import pandas'] / results['tanpa pandas']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
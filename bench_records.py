@@ -0,0 +1,65 @@
+"""Micro-benchmark: baris katalog sebagai DataFrame (pd.read_sql_query) vs record __slots__.
+
+Mengukur latensi rata-rata per panggilan dan alokasi memori puncak (tracemalloc) untuk
+membaca satu tabel katalog lalu mengakses kolom id/name tiap baris.
+
+Pemakaian:
+    python bench_records.py                  # database memori (data awal + users.csv)
+    python bench_records.py database.db 2000 # database lain, 2000 ulangan
+"""
+import sys
+import time
+import tracemalloc
+import pandas as pd
+from db import Database, CATALOG_QUERIES
+
+
+def read_frame(conn, table):
+    df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+    return [(row['id'], row['name']) for _, row in df.iterrows()]
+
+
+def read_records(conn, record_class, query):
+    conn.row_factory = record_class.row_factory
+    try:
+        return [(record.id, record.name) for record in conn.execute(query).fetchall()]
+    finally:
+        conn.row_factory = None
+
+
+def measure(func, repeat):
+    func()  # pemanasan
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    latency = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, peak
+
+
+def main(argv):
+    db_name = argv[1] if len(argv) > 1 else ":memory:"
+    repeat = int(argv[2]) if len(argv) > 2 else 500
+    db = Database(db_name)
+
+    print(f"{'katalog':<10} {'baris':>6} {'DataFrame':>18} {'record':>18} {'lebih cepat':>12}")
+    with db.connection() as conn:
+        for name, (record_class, query) in CATALOG_QUERIES.items():
+            rows = len(read_records(conn, record_class, query))
+            frame_time, frame_peak = measure(lambda: read_frame(conn, name), repeat)
+            record_time, record_peak = measure(lambda: read_records(conn, record_class, query), repeat)
+            print(
+                f"{name:<10} {rows:>6} "
+                f"{frame_time * 1e6:>8.0f} us {frame_peak / 1024:>5.0f} KiB "
+                f"{record_time * 1e6:>8.0f} us {record_peak / 1024:>5.0f} KiB "
+                f"{frame_time / record_time:>11.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,138 @@
+"""Benchmark: pembentukan tabel jadwal/export/dropdown per baris (iterrows, apply) vs viewmodel.
+
+Input DataFrame sintetis berbentuk sama dengan hasil get_schedule, get_bookings dan
+get_all_rooms; sekitar 20% booking diisi requester_name (sebagian hanya spasi) dan
+sebagian kecil status NULL. Hasil kedua jalur dibandingkan agar isinya tetap sama.
+
+Pemakaian:
+    python bench_viewmodel.py           # 100.000 baris
+    python bench_viewmodel.py 20000     # jumlah baris lain
+"""
+import random
+import sys
+import time
+import pandas as pd
+import viewmodel
+
+
+def booking_frame(rows, seed=11):
+    rng = random.Random(seed)
+    kinds = rng.choices(['Ruangan', 'Aset', 'Kendaraan'], weights=[6, 3, 1], k=rows)
+    start_dates = [f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}" for _ in range(rows)]
+    hours = [rng.randrange(7, 16) for _ in range(rows)]
+    requesters = rng.choices([None, '', '  ', 'Seksi Umum', 'Kepala Kantor'], weights=[70, 5, 5, 10, 10], k=rows)
+    return pd.DataFrame({
+        'resource_kind': kinds,
+        'id': range(1, rows + 1),
+        'item_name': rng.choices(['Ruang Rapat', 'Aula', 'Laptop 1', 'Proyektor', 'Innova'], k=rows),
+        'user_name': rng.choices(['EDITH', 'SYAIFUL RAKHMAN', 'BUDI'], k=rows),
+        'requester_name': requesters,
+        'start_date': start_dates,
+        'end_date': start_dates,
+        'start_time': [f"{hour:02d}:00" for hour in hours],
+        'end_time': [f"{hour + 1:02d}:00" for hour in hours],
+        'destination': [None if kind != 'Kendaraan' else 'Kanwil' for kind in kinds],
+        'purpose': 'Rapat koordinasi',
+        'status': rng.choices(['disetujui', 'dibatalkan', None], weights=[85, 14, 1], k=rows),
+    })
+
+
+def schedule_input(df):
+    # Kolom lama seperti get_schedule (ruangan)
+    return df.rename(columns={'start_date': 'date'})[
+        ['id', 'date', 'start_time', 'end_time', 'item_name', 'user_name', 'requester_name', 'purpose', 'status']
+    ]
+
+
+def legacy_schedule(df):
+    df = df.copy()
+    df['display_name'] = df.apply(
+        lambda row: row['requester_name'] if pd.notna(row['requester_name']) and row['requester_name'].strip() != '' else row['user_name'],
+        axis=1
+    )
+    df = df[df['display_name'].notna()]
+    display_df = df[['item_name', 'start_time', 'end_time', 'display_name', 'purpose', 'status']].copy()
+    display_df.columns = ['Ruangan', 'Jam Mulai', 'Jam Selesai', 'Pemesan', 'Keperluan', 'Status']
+    display_df['Status'] = display_df['Status'].apply(lambda x: str(x).capitalize() if pd.notna(x) else '')
+    return display_df.sort_values('Jam Mulai')
+
+
+def legacy_daily_export(df):
+    rows = []
+    for booking_type in ('Ruangan', 'Aset', 'Kendaraan'):
+        for _, row in df[df['resource_kind'] == booking_type].iterrows():
+            if booking_type == 'Ruangan':
+                rows.append({
+                    'Jenis': 'Ruangan', 'Item': row.get('item_name', ''), 'Pemesan': row.get('user_name', ''),
+                    'Waktu': f"{row.get('start_time', '')} - {row.get('end_time', '')}",
+                    'Tanggal': row.get('start_date', ''), 'Keperluan': row.get('purpose', ''),
+                    'Status': row.get('status', ''),
+                })
+            elif booking_type == 'Aset':
+                rows.append({
+                    'Jenis': 'Aset', 'Item': row.get('item_name', ''), 'Pemesan': row.get('user_name', ''),
+                    'Waktu': f"{row.get('start_date', '')} s/d {row.get('end_date', '')}",
+                    'Tanggal': row.get('start_date', ''), 'Keperluan': row.get('purpose', ''),
+                    'Status': row.get('status', ''),
+                })
+            else:
+                rows.append({
+                    'Jenis': 'Kendaraan', 'Item': row.get('item_name', ''), 'Pemesan': row.get('user_name', ''),
+                    'Waktu': f"{row.get('start_date', '')} s/d {row.get('end_date', '')}",
+                    'Jam': f"{row.get('start_time', '')} - {row.get('end_time', '')}",
+                    'Tanggal': row.get('start_date', ''), 'Tujuan': row.get('destination', ''),
+                    'Keperluan': row.get('purpose', ''), 'Status': row.get('status', ''),
+                })
+    return pd.DataFrame(rows)
+
+
+def legacy_room_options(df):
+    return [f"{row['name']} (Kapasitas: {row['capacity']})" for _, row in df.iterrows()]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else 100000
+    bookings = booking_frame(rows)
+    schedule = schedule_input(bookings)
+    rooms = pd.DataFrame({
+        'id': range(1, rows + 1),
+        'name': [f"Ruang {i}" for i in range(rows)],
+        'capacity': [10 + i % 50 for i in range(rows)],
+        'status': 'tersedia',
+    })
+
+    cases = {
+        'jadwal': (
+            lambda: legacy_schedule(schedule),
+            lambda: viewmodel.schedule_frame('Ruangan', schedule),
+            lambda old, new: old.equals(new),
+        ),
+        'export harian': (
+            lambda: legacy_daily_export(bookings),
+            lambda: viewmodel.daily_export_frame(bookings),
+            lambda old, new: old.to_csv(index=False) == new.to_csv(index=False),
+        ),
+        'dropdown': (
+            lambda: legacy_room_options(rooms),
+            lambda: viewmodel.option_labels(rooms, viewmodel.CATALOG_OPTION_LABELS['rooms']).tolist(),
+            lambda old, new: old == new,
+        ),
+    }
+    print(f"{rows} baris")
+    print(f"{'bentuk':<14} {'per baris':>12} {'viewmodel':>12} {'lebih cepat':>12} {'sama':>6}")
+    for name, (legacy, vectorised, same) in cases.items():
+        legacy_time, old = timed(legacy)
+        vector_time, new = timed(vectorised)
+        print(f"{name:<14} {legacy_time * 1000:>9.0f} ms {vector_time * 1000:>9.1f} ms "
+              f"{legacy_time / vector_time:>11.0f}x {str(same(old, new)):>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
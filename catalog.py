@@ -0,0 +1,77 @@
+import threading
+
+
+class CatalogCache:
+    """Cache baca-tembus untuk tabel katalog kecil (ruangan, aset, kendaraan, user).
+
+    Setiap katalog punya nomor versi yang dinaikkan oleh method tulis di Database
+    (add_*/update_*/delete_*, sinkronisasi users.csv). Entri hanya dipakai bila versinya
+    sama dengan versi katalog saat ini. Perubahan dari proses lain tidak terlihat -
+    panggil invalidate() bila tabel katalog ditulis dari luar aplikasi.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}  # katalog -> versi
+        self._entries = {}  # (katalog, varian) -> (versi, nilai)
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def version(self, name):
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def get(self, name, loader, variant=None):
+        """Nilai katalog dari cache, atau hasil loader() bila belum ada / sudah usang
+
+        variant membedakan bentuk turunan dari katalog yang sama (mis. DataFrame atau
+        peta id -> nama); semua varian ikut usang saat versi katalognya naik.
+        """
+        key = (name, variant)
+        with self._lock:
+            version = self._versions.get(name, 0)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+
+        value = loader()
+
+        with self._lock:
+            # Katalog berubah selama memuat -> hasil tetap dipakai, tapi tidak di-cache
+            if self._versions.get(name, 0) == version:
+                self._entries[key] = (version, value)
+        return value
+
+    def invalidate(self, name=None):
+        """Naikkan versi satu katalog (atau semua) sehingga dibaca ulang saat dibutuhkan"""
+        with self._lock:
+            names = set(self._versions) | {key[0] for key in self._entries} if name is None else {name}
+            for key in names:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            for key in [key for key in self._entries if key[0] in names]:
+                del self._entries[key]
+            self.stats['invalidations'] += 1
+
+    def snapshot(self):
+        """Metrik cache untuk halaman admin"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['versions'] = dict(self._versions)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0.0
+        return stats
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(pool):
+    """Satu cache katalog per pool database untuk seluruh proses"""
+    with _caches_lock:
+        cache = _caches.get(pool)
+        if cache is None:
+            cache = CatalogCache()
+            _caches[pool] = cache
+        return cache
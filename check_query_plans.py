@@ -0,0 +1,35 @@
+"""Cek EXPLAIN QUERY PLAN untuk query utama di db.py.
+
+Keluar dengan kode 1 bila ada query yang kembali full table scan pada tabel booking.
+
+Pemakaian:
+    python check_query_plans.py              # skema baru di database memori
+    python check_query_plans.py database.db  # database yang sudah berisi data
+"""
+import argparse
+import sys
+from db import Database, QueryPlanRegression
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_name", nargs="?", default=":memory:", help="file database (default: database memori)")
+    args = parser.parse_args(argv[1:])
+    db = Database(args.db_name)
+
+    try:
+        plans = db.check_query_plans()
+    except QueryPlanRegression as e:
+        print(f"GAGAL - {e}")
+        return 1
+
+    for name, details in plans.items():
+        print(f"{name}:")
+        for detail in details:
+            print(f"    {detail}")
+    print("OK - tidak ada full table scan pada tabel booking")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,115 @@
+"""Export booking kolumnar (Parquet / Arrow IPC) lewat pyarrow - dependensi opsional.
+
+Baris masuk sebagai tuple berurutan COLUMNS (hari & menit integer seperti di tabel
+booking), lalu diubah per batch menjadi kolom bertipe: tanggal date32, jam time32,
+Waktu Booking timestamp, dan kolom kategori (jenis, item, pemesan, status) dictionary.
+Jam dan timestamp bersatuan milidetik karena Parquet tidak punya satuan detik - file
+Parquet dan Arrow bertipe sama. File ditulis per batch sehingga memori tetap kecil
+untuk riwayat sebesar apa pun.
+
+Arrow memakai format IPC stream (.arrows): format file IPC tidak mengizinkan dictionary
+yang berbeda antar batch.
+"""
+import importlib.util
+
+# Urutan kolom baris masukan (lihat db.COLUMNAR_EXPORT_SQL)
+COLUMNS = (
+    'resource_kind', 'item_name', 'user_name', 'start_day', 'end_day', 'start_minute',
+    'end_minute', 'destination', 'purpose', 'status', 'created_at',
+)
+
+# format -> (ekstensi file, mime, kompresi yang didukung; yang pertama default)
+FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet', ('zstd', 'snappy', 'gzip', 'brotli', 'none')),
+    'arrow': ('.arrows', 'application/vnd.apache.arrow.stream', ('zstd', 'lz4', 'none')),
+}
+
+# Kolom kategori dengan sedikit nilai berbeda: disimpan sebagai dictionary
+DICTIONARY_COLUMNS = ('Jenis', 'Item', 'Pemesan', 'Status')
+
+
+def available():
+    """True bila pyarrow terpasang"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def schema():
+    import pyarrow as pa
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('Jenis', category),
+        ('Tanggal Mulai', pa.date32()),
+        ('Tanggal Selesai', pa.date32()),
+        ('Jam Mulai', pa.time32('ms')),
+        ('Jam Selesai', pa.time32('ms')),
+        ('Item', category),
+        ('Pemesan', category),
+        ('Tujuan', pa.string()),
+        ('Keperluan', pa.string()),
+        ('Status', category),
+        ('Waktu Booking', pa.timestamp('ms')),
+    ])
+
+
+def record_batch(rows):
+    """RecordBatch bertipe dari list tuple berurutan COLUMNS"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    values = dict(zip(COLUMNS, zip(*rows))) if rows else {column: () for column in COLUMNS}
+
+    def category(column):
+        return pa.array(values[column], pa.string()).dictionary_encode()
+
+    def day(column):
+        return pa.array(values[column], pa.int32()).cast(pa.date32())
+
+    def clock(column):
+        minutes = pa.array(values[column], pa.int32())
+        return pc.multiply(minutes, pa.scalar(60000, pa.int32())).cast(pa.time32('ms'))
+
+    created = pc.strptime(
+        pa.array(values['created_at'], pa.string()),
+        format='%Y-%m-%d %H:%M:%S', unit='ms', error_is_null=True
+    )
+    return pa.record_batch([
+        category('resource_kind'),
+        day('start_day'),
+        day('end_day'),
+        clock('start_minute'),
+        clock('end_minute'),
+        category('item_name'),
+        category('user_name'),
+        pa.array(values['destination'], pa.string()),
+        pa.array(values['purpose'], pa.string()),
+        category('status'),
+        created,
+    ], schema=schema())
+
+
+def write(path, chunks, file_format='parquet', compression=None):
+    """Tulis potongan baris (iterable list tuple) ke file Parquet / Arrow; mengembalikan jumlah baris
+
+    compression None memakai default format (zstd); 'none' tanpa kompresi.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Format export tidak dikenal: {file_format}")
+    compressions = FORMATS[file_format][2]
+    compression = compression or compressions[0]
+    if compression not in compressions:
+        raise ValueError(f"Kompresi {compression} tidak didukung untuk {file_format}")
+    if not available():
+        raise ImportError("Export Parquet/Arrow membutuhkan paket pyarrow (pip install pyarrow)")
+
+    import pyarrow as pa
+    codec = None if compression == 'none' else compression
+    count = 0
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema(), compression=codec or 'none', use_dictionary=list(DICTIONARY_COLUMNS))
+    else:
+        writer = pa.ipc.new_stream(path, schema(), options=pa.ipc.IpcWriteOptions(compression=codec))
+    with writer:
+        for rows in chunks:
+            writer.write_batch(record_batch(rows))
+            count += len(rows)
+    return count
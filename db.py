@@ -1,179 +1,990 @@
 import sqlite3
 from datetime import datetime
-import pandas as pd
 import csv
 import os
+import io
+import time
+import hashlib
+import json
+import heapq
+import itertools
+import operator
+import random
+from pool import get_pool
+from availability import get_availability_index, BOOKING_KINDS
+from catalog import get_catalog_cache
+from export_worker import get_export_worker
+from records import Room, Asset, Vehicle, User
+import columnar
+import schema
+import recurrence
+
+# ============================================================================
+# QUERY UTAMA (dipakai method Database dan dicek oleh check_query_plans)
+# ============================================================================
+# Predikat bentrok per jenis booking - harus sama dengan predikat di availability.py.
+# Memakai kolom integer (hari sejak 1970-01-01, menit sejak 00:00) agar perbandingan
+# rentang bisa memakai index dan tidak tergantung format teks jam ('08:00' vs '08:00:00').
+ROOM_OVERLAP_SQL = "(start_minute < ? AND end_minute > ?)"
+
+ASSET_OVERLAP_SQL = "(borrow_day <= ? AND return_day >= ?)"
+
+VEHICLE_OVERLAP_SQL = "(start_minute < ? AND end_minute > ?)"
+
+
+def room_overlap_params(start_minute, end_minute):
+    return (end_minute, start_minute)
+
+
+def asset_overlap_params(borrow_day, return_day):
+    return (return_day, borrow_day)
+
+
+def vehicle_overlap_params(start_minute, end_minute):
+    return (end_minute, start_minute)
+
+
+def available_rooms_query(date, start_time, end_time):
+    """SQL + parameter untuk ruangan yang tersedia"""
+    query = f"""
+        SELECT {Room.columns('r')} FROM rooms r
+        WHERE r.id NOT IN (
+            SELECT room_id FROM room_bookings
+            WHERE day = ? 
+            AND status = 'disetujui'
+            AND {ROOM_OVERLAP_SQL}
+        )
+        AND r.id NOT IN (
+            SELECT s.room_id FROM room_booking_series s JOIN (SELECT ? AS day) q
+            WHERE {ROOM_OVERLAP_SQL} AND {recurrence.SERIES_ON_DAY_SQL}
+        )
+    """
+    params = (schema.day_number(date),) + room_overlap_params(schema.minute_of_day(start_time),
+                                                              schema.minute_of_day(end_time))
+    return query, params * 2
+
+
+def available_assets_query(borrow_date, return_date, asset_type=None):
+    """SQL + parameter untuk aset yang tersedia"""
+    query = f"""
+        SELECT {Asset.columns('a')} FROM assets a
+        WHERE a.condition = 'baik'
+    """
+    params = []
+    
+    if asset_type:
+        query += " AND a.type = ?"
+        params.append(asset_type)
+    
+    query += f"""
+        AND a.id NOT IN (
+            SELECT asset_id FROM asset_bookings
+            WHERE status = 'disetujui'
+            AND {ASSET_OVERLAP_SQL}
+        )
+    """
+    params.extend(asset_overlap_params(schema.day_number(borrow_date), schema.day_number(return_date)))
+    return query, tuple(params)
+
+
+def available_vehicles_query(date_str, start_time, end_time, vehicle_type=None):
+    """SQL + parameter untuk kendaraan yang tersedia"""
+    query = f"""
+        SELECT {Vehicle.columns('v')} FROM vehicles v
+        WHERE v.status = 'tersedia'
+    """
+    params = []
+
+    if vehicle_type:
+        query += " AND v.type = ?"
+        params.append(vehicle_type)
+
+    query += f"""
+        AND v.id NOT IN (
+            SELECT vehicle_id FROM vehicle_bookings
+            WHERE start_day = ? 
+            AND status = 'disetujui'
+            AND {VEHICLE_OVERLAP_SQL}
+        )
+    """
+    params.append(schema.day_number(date_str))
+    params.extend(vehicle_overlap_params(schema.minute_of_day(start_time), schema.minute_of_day(end_time)))
+    return query, tuple(params)
+
+
+# Cek bentrok untuk satu resource, dijalankan di dalam transaksi book_*.
+# Ruangan juga dicek terhadap kejadian seri berulang pada hari itu (ID negatif = -ID seri).
+ROOM_CONFLICT_SQL = f"""
+    SELECT id FROM room_bookings
+    WHERE day = ? AND status = 'disetujui' AND room_id = ?
+    AND {ROOM_OVERLAP_SQL}
+    UNION ALL
+    SELECT -s.id FROM room_booking_series s JOIN (SELECT ? AS day) q
+    WHERE s.room_id = ? AND {ROOM_OVERLAP_SQL} AND {recurrence.SERIES_ON_DAY_SQL}
+"""
+
+
+def room_conflict_params(day, room_id, start_minute, end_minute):
+    """Parameter ROOM_CONFLICT_SQL (booking biasa + seri berulang)"""
+    return ((day, room_id) + room_overlap_params(start_minute, end_minute)) * 2
+
+
+ASSET_CONFLICT_SQL = f"""
+    SELECT id FROM asset_bookings
+    WHERE status = 'disetujui' AND asset_id = ?
+    AND {ASSET_OVERLAP_SQL}
+"""
+
+VEHICLE_CONFLICT_SQL = f"""
+    SELECT id FROM vehicle_bookings
+    WHERE start_day = ? AND status = 'disetujui' AND vehicle_id = ?
+    AND {VEHICLE_OVERLAP_SQL}
+"""
+
+
+# INSERT booking baru (langsung 'disetujui'), dipakai book_* dan add_bookings_bulk
+ROOM_INSERT_SQL = """
+    INSERT INTO room_bookings (user_id, room_id, date, start_time, end_time, purpose, requester_name, status,
+                               day, start_minute, end_minute)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 'disetujui', ?, ?, ?)
+"""
+
+ASSET_INSERT_SQL = """
+    INSERT INTO asset_bookings (user_id, asset_id, borrow_date, return_date, purpose, requester_name, status,
+                                borrow_day, return_day)
+    VALUES (?, ?, ?, ?, ?, ?, 'disetujui', ?, ?)
+"""
+
+VEHICLE_INSERT_SQL = """
+    INSERT INTO vehicle_bookings (user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name, status,
+                                  start_day, end_day, start_minute, end_minute)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'disetujui', ?, ?, ?, ?)
+"""
+
+# Per jenis untuk add_bookings_bulk: (SQL cek bentrok, SQL INSERT, pesan bila bentrok)
+BOOKING_WRITE_SQL = {
+    'Ruangan': (ROOM_CONFLICT_SQL, ROOM_INSERT_SQL, "Ruangan sudah dibooking pada waktu tersebut"),
+    'Aset': (ASSET_CONFLICT_SQL, ASSET_INSERT_SQL, "Aset sudah dipinjam pada periode tersebut"),
+    'Kendaraan': (VEHICLE_CONFLICT_SQL, VEHICLE_INSERT_SQL, "Kendaraan sudah dipesan pada waktu tersebut"),
+}
+
+# Kunci permintaan add_bookings_bulk per jenis (selain user_id dan requester_name),
+# urut sesuai kolom teks di *_INSERT_SQL; kunci pertama adalah ID resource
+BULK_BOOKING_FIELDS = {
+    'Ruangan': ('room_id', 'date', 'start_time', 'end_time', 'purpose'),
+    'Aset': ('asset_id', 'borrow_date', 'return_date', 'purpose'),
+    'Kendaraan': ('vehicle_id', 'start_date', 'end_date', 'start_time', 'end_time', 'destination', 'purpose'),
+}
+
+
+# Seri booking ruangan berulang (recurrence.py) - kejadiannya dihitung saat dibaca
+ROOM_SERIES_INSERT_SQL = """
+    INSERT INTO room_booking_series (user_id, room_id, start_date, until_date, occurrence_count, frequency, every,
+                                     start_time, end_time, purpose, requester_name, status,
+                                     first_day, last_day, month_day, first_month, start_minute, end_minute)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'disetujui', ?, ?, ?, ?, ?, ?)
+"""
+
+# Seri lain pada ruangan yang sama dengan rentang tanggal dan jam yang bertumpuk
+ROOM_SERIES_CANDIDATES_SQL = f"""
+    SELECT id, frequency, every, first_day, last_day FROM room_booking_series
+    WHERE room_id = ? AND status = 'disetujui' AND last_day >= ? AND first_day <= ?
+    AND {ROOM_OVERLAP_SQL}
+"""
+
+# Seri beserta nama ruangan & pemesan (lihat series_occurrences)
+ROOM_SERIES_SQL = """
+    SELECT s.id, s.user_id, s.room_id, r.name AS item_name, u.name AS user_name,
+           s.start_date, s.until_date, s.occurrence_count, s.start_time, s.end_time,
+           s.start_minute, s.end_minute, s.purpose, s.requester_name, s.status, s.created_at,
+           s.frequency, s.every, s.first_day, s.last_day
+    FROM room_booking_series s
+    LEFT JOIN rooms r ON s.room_id = r.id
+    LEFT JOIN users u ON s.user_id = u.id
+"""
+
+# Seri yang menyentuh jendela tanggal (semua status)
+ROOM_SERIES_WINDOW_SQL = ROOM_SERIES_SQL + "WHERE s.last_day >= ? AND s.first_day <= ?"
+
+# Seri milik satu user (halaman Riwayat, hitungan beranda), terbaru dulu
+ROOM_SERIES_USER_SQL = ROOM_SERIES_SQL + "WHERE s.user_id = ? ORDER BY s.created_at DESC, s.id DESC"
+
+# Semua seri urut created_at menurun, seperti EXPORT_BOOKINGS_SQL
+ROOM_SERIES_EXPORT_SQL = ROOM_SERIES_SQL + "ORDER BY s.created_at DESC"
+
+# Tambah jumlah ke satu rollup booking_stats (kejadian seri, lihat recurrence.occurrence_stats)
+BOOKING_STATS_ADD_SQL = """
+    INSERT INTO booking_stats (scope, kind, key, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (scope, kind, key) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def series_skipped_days(conn, series_ids=None):
+    """Hari kejadian yang dilewati per seri -> {ID seri: set(hari)}; series_ids None untuk semua seri"""
+    skipped = {}
+    if series_ids is None:
+        rows = conn.execute("SELECT series_id, day FROM room_booking_series_exceptions").fetchall()
+    else:
+        series_ids = list(series_ids)
+        rows = []
+        for offset in range(0, len(series_ids), 500):
+            chunk = series_ids[offset:offset + 500]
+            rows += conn.execute(
+                f"SELECT series_id, day FROM room_booking_series_exceptions WHERE series_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+    for series_id, day in rows:
+        skipped.setdefault(series_id, set()).add(day)
+    return skipped
+
+
+def series_occurrences(series, skipped, first=None, last=None):
+    """Kejadian satu seri (baris ROOM_SERIES_SQL) dalam [first, last] sebagai dict berkolom view bookings
+    
+    id bernilai -ID seri. first/last None berarti seluruh seri. Kejadian yang dilewati dan
+    kejadian seri yang dibatalkan berstatus 'dibatalkan' (recurrence.occurrence_status).
+    """
+    days = recurrence.occurrence_days(
+        series['frequency'], series['every'], series['first_day'], series['last_day'],
+        series['first_day'] if first is None else first, series['last_day'] if last is None else last
+    )
+    for day in days:
+        day_date = schema.date_of_day(day).isoformat()
+        yield {
+            'resource_kind': 'Ruangan', 'id': -series['id'], 'user_id': series['user_id'],
+            'resource_id': series['room_id'], 'item_name': series['item_name'], 'user_name': series['user_name'],
+            'start_date': day_date, 'end_date': day_date,
+            'start_time': series['start_time'], 'end_time': series['end_time'],
+            'start_day': day, 'end_day': day,
+            'start_at': day * 1440 + series['start_minute'], 'end_at': day * 1440 + series['end_minute'],
+            'destination': None, 'purpose': series['purpose'], 'requester_name': series['requester_name'],
+            'status': recurrence.occurrence_status(series['status'], day, skipped),
+            'created_at': series['created_at'],
+        }
+
+
+def add_series_stats(cursor, room_id, occurrences, delta=1):
+    """Tambah delta ke booking_stats untuk kejadian seri [(status, hari)] - pengganti trigger,
+    karena kejadian seri tidak tersimpan sebagai baris booking"""
+    cursor.executemany(BOOKING_STATS_ADD_SQL, [
+        key + (count * delta,) for key, count in recurrence.occurrence_stats(room_id, occurrences).items()
+    ])
+
+
+def prepare_bulk_booking(request):
+    """Validasi satu permintaan add_bookings_bulk tanpa menyentuh database
+    
+    Mengembalikan (jenis, resource_id, hari, mulai, selesai, nilai integer INSERT, parameter cek
+    bentrok). hari adalah kunci bucket indeks ketersediaan (None untuk aset). ValueError berisi
+    pesan untuk pengguna bila permintaan tidak valid.
+    """
+    booking_type = request.get('type')
+    fields = BULK_BOOKING_FIELDS.get(booking_type)
+    if fields is None:
+        raise ValueError(f"Jenis booking tidak dikenal: {booking_type!r}")
+    missing = [field for field in ('user_id',) + fields if request.get(field) is None]
+    if missing:
+        raise ValueError(f"Data booking tidak lengkap: {', '.join(missing)}")
+    resource_id = request[fields[0]]
+    
+    try:
+        if booking_type == 'Ruangan':
+            day = schema.day_number(request['date'])
+            start, end = schema.minute_of_day(request['start_time']), schema.minute_of_day(request['end_time'])
+            end_day = day
+        elif booking_type == 'Aset':
+            day = None
+            start, end = schema.day_number(request['borrow_date']), schema.day_number(request['return_date'])
+        else:
+            day, end_day = schema.day_number(request['start_date']), schema.day_number(request['end_date'])
+            start, end = schema.minute_of_day(request['start_time']), schema.minute_of_day(request['end_time'])
+    except (TypeError, ValueError):
+        raise ValueError("Format tanggal/jam tidak valid")
+    
+    if booking_type == 'Ruangan':
+        if start >= end:
+            raise ValueError("Jam selesai harus lebih dari jam mulai")
+        return (booking_type, resource_id, day, start, end, (day, start, end),
+                room_conflict_params(day, resource_id, start, end))
+    if booking_type == 'Aset':
+        if end < start:
+            raise ValueError("Tanggal kembali harus lebih dari tanggal pinjam")
+        return (booking_type, resource_id, day, start, end, (start, end),
+                (resource_id,) + asset_overlap_params(start, end))
+    if (end_day, end) <= (day, start):
+        raise ValueError("Waktu selesai harus lebih dari waktu mulai")
+    return (booking_type, resource_id, day, start, end, (day, end_day, start, end),
+            (day, resource_id) + vehicle_overlap_params(start, end))
+
+# Jenis booking -> tabel booking, urutan ini juga urutan tuple hasil get_*_bookings
+BOOKING_TABLES = {
+    'Ruangan': 'room_bookings',
+    'Aset': 'asset_bookings',
+    'Kendaraan': 'vehicle_bookings',
+}
+
+# Query lintas jenis memakai view 'bookings' (schema.BOOKINGS_VIEW): satu query,
+# filter WHERE diteruskan SQLite ke index masing-masing tabel
+# Riwayat user - hanya booking yang resource-nya masih ada (seperti JOIN sebelumnya)
+USER_BOOKINGS_SQL = """
+    SELECT * FROM bookings
+    WHERE user_id = ? AND item_name IS NOT NULL
+    ORDER BY created_at DESC, id DESC
+"""
+
+ALL_BOOKINGS_SQL = """
+    SELECT * FROM bookings
+    ORDER BY start_at DESC
+"""
+
+# Riwayat user per halaman: langsung ke tabel per jenis agar urutan (created_at, id)
+# diambil dari index (user_id, created_at) tanpa sort. {filters} diisi user_bookings_page_query.
+USER_BOOKINGS_PAGE_SQL = {
+    'Ruangan': """
+        SELECT rb.id, rb.user_id, rb.room_id, rb.date, rb.start_time, rb.end_time, rb.purpose,
+               rb.requester_name, rb.status, rb.created_at, r.name as item_name, 'Ruangan' as type
+        FROM room_bookings rb
+        JOIN rooms r ON rb.room_id = r.id
+        WHERE rb.user_id = ? {filters}
+        ORDER BY rb.created_at DESC, rb.id DESC
+        LIMIT ?
+    """,
+    'Aset': """
+        SELECT ab.id, ab.user_id, ab.asset_id, ab.borrow_date, ab.return_date, ab.purpose,
+               ab.requester_name, ab.status, ab.created_at, a.name as item_name, 'Aset' as type
+        FROM asset_bookings ab
+        JOIN assets a ON ab.asset_id = a.id
+        WHERE ab.user_id = ? {filters}
+        ORDER BY ab.created_at DESC, ab.id DESC
+        LIMIT ?
+    """,
+    'Kendaraan': """
+        SELECT vb.id, vb.user_id, vb.vehicle_id, vb.start_date, vb.end_date, vb.start_time, vb.end_time,
+               vb.destination, vb.purpose, vb.requester_name, vb.status, vb.created_at,
+               v.name as item_name, 'Kendaraan' as type
+        FROM vehicle_bookings vb
+        JOIN vehicles v ON vb.vehicle_id = v.id
+        WHERE vb.user_id = ? {filters}
+        ORDER BY vb.created_at DESC, vb.id DESC
+        LIMIT ?
+    """,
+}
+
+# Jenis booking -> (alias tabel, kolom hari mulai, kolom hari selesai)
+BOOKING_DAY_COLUMNS = {
+    'Ruangan': ('rb', 'day', 'day'),
+    'Aset': ('ab', 'borrow_day', 'return_day'),
+    'Kendaraan': ('vb', 'start_day', 'end_day'),
+}
+
+
+# Kolom booking.csv per jenis (setelah 'Jenis'): (judul kolom, kolom lama seperti get_all_bookings).
+# (Jenis, ID) adalah kunci stabil satu booking - id AUTOINCREMENT tidak pernah dipakai ulang, juga
+# setelah diarsipkan. Kejadian seri berulang ber-ID '-<ID seri>:<tanggal>' (series_export_row).
+# File inkremental bisa memuat beberapa baris per kunci: baris terakhir yang berlaku.
+BOOKING_EXPORT_COLUMNS = {
+    'Ruangan': (
+        ('ID', 'id'), ('Tanggal', 'date'), ('Jam Mulai', 'start_time'), ('Jam Selesai', 'end_time'),
+        ('Item', 'item_name'), ('Pemesan', 'user_name'), ('Keperluan', 'purpose'),
+        ('Status', 'status'), ('Waktu Booking', 'created_at'),
+    ),
+    'Aset': (
+        ('ID', 'id'), ('Tanggal Pinjam', 'date'), ('Tanggal Kembali', 'return_date'),
+        ('Item', 'item_name'), ('Pemesan', 'user_name'), ('Keperluan', 'purpose'),
+        ('Status', 'status'), ('Waktu Booking', 'created_at'),
+    ),
+    'Kendaraan': (
+        ('ID', 'id'), ('Tanggal Mulai', 'date'), ('Tanggal Kembali', 'end_date'),
+        ('Jam Mulai', 'start_time'), ('Jam Selesai', 'end_time'),
+        ('Item', 'item_name'), ('Pemesan', 'user_name'), ('Tujuan', 'destination'),
+        ('Keperluan', 'purpose'), ('Status', 'status'), ('Waktu Booking', 'created_at'),
+    ),
+}
+
+# Baris export per jenis, urut created_at menurun lewat index idx_*_created (tanpa temp b-tree).
+# Kolom berurutan sama dengan BOOKING_EXPORT_COLUMNS. {table} diisi tabel live atau tabel
+# arsipnya (export_tables): export lengkap mencakup seluruh riwayat seperti booking_stats.
+EXPORT_BOOKINGS_SQL = {
+    'Ruangan': """
+        SELECT rb.id, rb.date, rb.start_time, rb.end_time, r.name, u.name, rb.purpose, rb.status,
+               COALESCE(rb.created_at, '')
+        FROM {table} rb
+        LEFT JOIN rooms r ON rb.room_id = r.id
+        LEFT JOIN users u ON rb.user_id = u.id
+        ORDER BY rb.created_at DESC
+    """,
+    'Aset': """
+        SELECT ab.id, ab.borrow_date, ab.return_date, a.name, u.name, ab.purpose, ab.status,
+               COALESCE(ab.created_at, '')
+        FROM {table} ab
+        LEFT JOIN assets a ON ab.asset_id = a.id
+        LEFT JOIN users u ON ab.user_id = u.id
+        ORDER BY ab.created_at DESC
+    """,
+    'Kendaraan': """
+        SELECT vb.id, vb.start_date, vb.end_date, vb.start_time, vb.end_time, v.name, u.name,
+               vb.destination, vb.purpose, vb.status, COALESCE(vb.created_at, '')
+        FROM {table} vb
+        LEFT JOIN vehicles v ON vb.vehicle_id = v.id
+        LEFT JOIN users u ON vb.user_id = u.id
+        ORDER BY vb.created_at DESC
+    """,
+}
+
+
+# Baris export kolumnar (urutan columnar.COLUMNS) per jenis, urut created_at menurun seperti
+# EXPORT_BOOKINGS_SQL ({table} sama). Hari/menit integer langsung menjadi kolom date32/time32.
+COLUMNAR_EXPORT_SQL = {
+    'Ruangan': """
+        SELECT 'Ruangan', r.name, u.name, rb.day, rb.day, rb.start_minute, rb.end_minute,
+               NULL, rb.purpose, rb.status, COALESCE(rb.created_at, '')
+        FROM {table} rb
+        LEFT JOIN rooms r ON rb.room_id = r.id
+        LEFT JOIN users u ON rb.user_id = u.id
+        ORDER BY rb.created_at DESC
+    """,
+    'Aset': """
+        SELECT 'Aset', a.name, u.name, ab.borrow_day, ab.return_day, NULL, NULL,
+               NULL, ab.purpose, ab.status, COALESCE(ab.created_at, '')
+        FROM {table} ab
+        LEFT JOIN assets a ON ab.asset_id = a.id
+        LEFT JOIN users u ON ab.user_id = u.id
+        ORDER BY ab.created_at DESC
+    """,
+    'Kendaraan': """
+        SELECT 'Kendaraan', v.name, u.name, vb.start_day, vb.end_day, vb.start_minute, vb.end_minute,
+               vb.destination, vb.purpose, vb.status, COALESCE(vb.created_at, '')
+        FROM {table} vb
+        LEFT JOIN vehicles v ON vb.vehicle_id = v.id
+        LEFT JOIN users u ON vb.user_id = u.id
+        ORDER BY vb.created_at DESC
+    """,
+}
+
+
+def columnar_daily_query(date):
+    """SQL + parameter baris export kolumnar untuk booking yang berlangsung pada tanggal tsb
+    
+    Sumbernya sama dengan export harian CSV (view bookings_history), urut ruangan, aset, kendaraan.
+    """
+    query, params = bookings_query(date=date, history=True)
+    return f"""
+        SELECT resource_kind, item_name, user_name, start_day, end_day,
+               CASE WHEN resource_kind = 'Aset' THEN NULL ELSE start_at - start_day * 1440 END,
+               CASE WHEN resource_kind = 'Aset' THEN NULL ELSE end_at - end_day * 1440 END,
+               destination, purpose, status, COALESCE(created_at, '')
+        FROM ({query})
+        ORDER BY CASE resource_kind WHEN 'Ruangan' THEN 0 WHEN 'Aset' THEN 1 ELSE 2 END, start_at DESC
+    """, params
+
+
+def export_tables(kind):
+    """Tabel sumber export lengkap satu jenis: tabel live lalu tabel arsipnya"""
+    table = BOOKING_TABLES[kind]
+    return (table, schema.ARCHIVE_TABLES[table])
+
+
+def exported_kinds(conn):
+    """Jenis booking yang punya baris (live, arsip, atau seri berulang untuk ruangan), urut BOOKING_TABLES"""
+    return [
+        kind for kind in BOOKING_TABLES
+        if any(
+            conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+            for table in export_tables(kind) + (('room_booking_series',) if kind == 'Ruangan' else ())
+        )
+    ]
+
+
+def series_export_occurrences(conn):
+    """Semua kejadian seri berulang (dict series_occurrences), urut created_at menurun"""
+    skipped = series_skipped_days(conn)
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    for series in cursor.execute(ROOM_SERIES_EXPORT_SQL):
+        yield from series_occurrences(series, skipped.get(series['id'], ()))
+
+
+def series_export_row(occurrence):
+    """Kejadian seri -> baris berurutan EXPORT_BOOKINGS_SQL['Ruangan'], ID unik per kejadian"""
+    return (
+        f"{occurrence['id']}:{occurrence['start_date']}", occurrence['start_date'],
+        occurrence['start_time'], occurrence['end_time'], occurrence['item_name'], occurrence['user_name'],
+        occurrence['purpose'], occurrence['status'], occurrence['created_at'] or '',
+    )
+
+
+def series_columnar_row(occurrence):
+    """Kejadian seri -> baris berurutan columnar.COLUMNS"""
+    day = occurrence['start_day']
+    return (
+        'Ruangan', occurrence['item_name'], occurrence['user_name'], day, day,
+        occurrence['start_at'] - day * 1440, occurrence['end_at'] - day * 1440, None,
+        occurrence['purpose'], occurrence['status'], occurrence['created_at'] or '',
+    )
+
+
+def export_sources(conn, kind, queries, series_row):
+    """Sumber baris export lengkap satu jenis, masing-masing urut created_at menurun: tabel live,
+    tabel arsip, dan untuk ruangan kejadian seri berulang (dipetakan lewat series_row)"""
+    sources = [conn.execute(queries[kind].format(table=table)) for table in export_tables(kind)]
+    if kind == 'Ruangan':
+        sources.append(map(series_row, series_export_occurrences(conn)))
+    return sources
+
+
+def chunked(rows, size):
+    """Potong iterator baris menjadi list berisi paling banyak size baris"""
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def booking_export_row(booking_type, row):
+    """Satu baris export booking.csv dari baris booking berkolom lama (Series atau dict)"""
+    export_row = {'Jenis': booking_type}
+    for title, key in BOOKING_EXPORT_COLUMNS[booking_type]:
+        export_row[title] = row.get(key, '')
+    return export_row
+
+
+def latest_export_rows(rows):
+    """Baris booking.csv (dict, urut file) -> baris terakhir per booking (Jenis, ID), urut kemunculan pertama"""
+    latest = {}
+    for row in rows:
+        latest[(row['Jenis'], row['ID'])] = row
+    return list(latest.values())
+
+
+# Log booking_changes (seq AUTOINCREMENT, tidak pernah dipakai ulang): seq terakhir yang pernah
+# dibuat, dan seq terakhir yang sudah dipangkas setelah compaction (baris <= nilai ini hilang)
+CHANGES_HIGH_WATER_SQL = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'booking_changes'), 0)"
+CHANGES_PRUNED_SQL = f"SELECT COALESCE((SELECT MIN(seq) - 1 FROM booking_changes), ({CHANGES_HIGH_WATER_SQL}))"
+
+
+def stream_bookings_csv(conn, csv_path, chunk_size=1000, write_empty=False):
+    """Tulis export lengkap booking.csv tanpa memuat seluruh riwayat ke memori
+    
+    Tabel live, arsip dan kejadian seri tiap jenis (export_sources) dibaca urut Waktu Booking
+    menurun, lalu semuanya digabung k-way (heapq.merge) dan ditulis per chunk_size baris - memori
+    puncak tidak bergantung pada jumlah booking. Kolom dan urutannya sama dengan export lama (hanya
+    urutan antar booking dengan Waktu Booking yang sama bisa berbeda). Mengembalikan jumlah
+    baris; 0 berarti tidak ada booking dan file tidak dibuat, kecuali write_empty=True (file
+    berisi header semua jenis saja).
+    """
+    kinds = exported_kinds(conn)
+    if not kinds:
+        if not write_empty:
+            return 0
+        kinds = list(BOOKING_TABLES)
+    
+    header = ['Jenis']
+    for kind in kinds:
+        header += [title for title, _ in BOOKING_EXPORT_COLUMNS[kind] if title not in header]
+    
+    def source_rows(kind, source):
+        positions = [header.index(title) for title, _ in BOOKING_EXPORT_COLUMNS[kind]]
+        for values in source:
+            row = [''] * len(header)
+            row[0] = kind
+            for position, value in zip(positions, values):
+                row[position] = value
+            yield row
+    
+    rows = heapq.merge(
+        *(
+            source_rows(kind, source)
+            for kind in kinds for source in export_sources(conn, kind, EXPORT_BOOKINGS_SQL, series_export_row)
+        ),
+        key=operator.itemgetter(header.index('Waktu Booking')), reverse=True
+    )
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        # Akhir baris os.linesep seperti DataFrame.to_csv
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(header)
+        for chunk in chunked(rows, chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+def stream_bookings_columnar(conn, path, file_format='parquet', compression=None, chunk_size=16384):
+    """Export lengkap ke Parquet / Arrow (lihat columnar), di-stream seperti stream_bookings_csv
+    
+    Satu batch (row group Parquet) per chunk_size baris. Mengembalikan jumlah baris;
+    0 berarti tidak ada booking dan file tidak dibuat.
+    """
+    kinds = exported_kinds(conn)
+    if not kinds:
+        return 0
+    rows = heapq.merge(
+        *(
+            source
+            for kind in kinds for source in export_sources(conn, kind, COLUMNAR_EXPORT_SQL, series_columnar_row)
+        ),
+        key=operator.itemgetter(len(columnar.COLUMNS) - 1), reverse=True
+    )
+    return columnar.write(path, chunked(rows, chunk_size), file_format, compression)
+
+
+# Kandidat arsip per jenis: selesai sebelum horizon, atau dibatalkan dan sudah lewat.
+# Parameter: (hari ini, hari batas horizon, ukuran batch); memakai index hari selesai.
+ARCHIVE_CANDIDATES_SQL = {
+    booking_type: f"""
+        SELECT id FROM {BOOKING_TABLES[booking_type]}
+        WHERE {end_column} < ? AND ({end_column} < ? OR status = 'dibatalkan')
+        LIMIT ?
+    """
+    for booking_type, (_, _, end_column) in BOOKING_DAY_COLUMNS.items()
+}
+
+
+def user_bookings_page_query(user_id, booking_type, page_size=20, after=None, status=None,
+                             date_from=None, date_to=None):
+    """SQL + parameter satu halaman riwayat (keyset: created_at, id menurun)
+    
+    after = (created_at, id) baris terakhir halaman sebelumnya. Satu baris ekstra diambil
+    untuk mengetahui apakah masih ada halaman berikutnya.
+    """
+    alias, start_column, end_column = BOOKING_DAY_COLUMNS[booking_type]
+    filters = []
+    params = [user_id]
+
+    if after is not None:
+        filters.append(f"AND ({alias}.created_at, {alias}.id) < (?, ?)")
+        params.extend(after)
+
+    if status is not None:
+        filters.append(f"AND {alias}.status = ?")
+        params.append(status)
+
+    # Booking yang berlangsung (sebagian) di dalam rentang tanggal
+    if date_from is not None:
+        filters.append(f"AND {alias}.{end_column} >= ?")
+        params.append(schema.day_number(date_from))
+    if date_to is not None:
+        filters.append(f"AND {alias}.{start_column} <= ?")
+        params.append(schema.day_number(date_to))
+
+    params.append(page_size + 1)
+    query = USER_BOOKINGS_PAGE_SQL[booking_type].format(filters=" ".join(filters))
+    return query, tuple(params)
+
+
+# Hitungan booking user per jenis & status - cukup index (user_id, status), tanpa join
+USER_BOOKING_COUNTS_SQL = " UNION ALL ".join(
+    f"SELECT '{booking_type}', status, COUNT(*) FROM {table} WHERE user_id = ? GROUP BY status"
+    for booking_type, table in BOOKING_TABLES.items()
+)
+
+
+# Kolom view -> kolom DataFrame per jenis yang dipakai app.py (bentuk lama get_user_bookings)
+USER_BOOKING_COLUMNS = {
+    'Ruangan': {
+        'id': 'id', 'user_id': 'user_id', 'resource_id': 'room_id', 'start_date': 'date',
+        'start_time': 'start_time', 'end_time': 'end_time', 'purpose': 'purpose',
+        'requester_name': 'requester_name', 'status': 'status', 'created_at': 'created_at',
+        'item_name': 'item_name', 'resource_kind': 'type',
+    },
+    'Aset': {
+        'id': 'id', 'user_id': 'user_id', 'resource_id': 'asset_id', 'start_date': 'borrow_date',
+        'end_date': 'return_date', 'purpose': 'purpose', 'requester_name': 'requester_name',
+        'status': 'status', 'created_at': 'created_at', 'item_name': 'item_name',
+        'resource_kind': 'type',
+    },
+    'Kendaraan': {
+        'id': 'id', 'user_id': 'user_id', 'resource_id': 'vehicle_id', 'start_date': 'start_date',
+        'end_date': 'end_date', 'start_time': 'start_time', 'end_time': 'end_time',
+        'destination': 'destination', 'purpose': 'purpose', 'requester_name': 'requester_name',
+        'status': 'status', 'created_at': 'created_at', 'item_name': 'item_name',
+        'resource_kind': 'type',
+    },
+}
+
+# Bentuk lama get_all_bookings (jadwal & export)
+ALL_BOOKING_COLUMNS = {
+    'Ruangan': {
+        'id': 'id', 'start_date': 'date', 'start_time': 'start_time', 'end_time': 'end_time',
+        'start_day': 'day', 'item_name': 'item_name', 'user_name': 'user_name',
+        'requester_name': 'requester_name', 'purpose': 'purpose', 'status': 'status',
+        'created_at': 'created_at',
+    },
+    'Aset': {
+        'id': 'id', 'start_date': 'date', 'end_date': 'return_date', 'start_day': 'day',
+        'end_day': 'return_day', 'item_name': 'item_name', 'user_name': 'user_name',
+        'requester_name': 'requester_name', 'purpose': 'purpose', 'status': 'status',
+        'created_at': 'created_at',
+    },
+    'Kendaraan': {
+        'id': 'id', 'start_date': 'date', 'end_date': 'end_date', 'start_time': 'start_time',
+        'end_time': 'end_time', 'start_day': 'day', 'end_day': 'end_day',
+        'item_name': 'item_name', 'user_name': 'user_name', 'requester_name': 'requester_name',
+        'destination': 'destination', 'purpose': 'purpose', 'status': 'status',
+        'created_at': 'created_at',
+    },
+}
+
+
+def bookings_query(user_id=None, date=None, booking_type=None, status=None, history=False):
+    """SQL + parameter untuk view bookings dengan filter opsional
+    
+    history=True membaca view bookings_history (termasuk booking yang sudah diarsipkan).
+    """
+    conditions = []
+    params = []
+
+    if user_id is not None:
+        conditions.append("user_id = ?")
+        params.append(user_id)
+
+    if date is not None:
+        # Booking yang berlangsung pada tanggal tersebut (hari mulai s/d hari selesai)
+        day = schema.day_number(date)
+        conditions.append("start_day <= ? AND end_day >= ?")
+        params.extend([day, day])
+
+    if booking_type is not None:
+        conditions.append("resource_kind = ?")
+        params.append(booking_type)
+
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status)
+
+    query = "SELECT * FROM bookings_history" if history else "SELECT * FROM bookings"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY start_at DESC"
+    return query, tuple(params)
+
+
+def split_bookings(df, columns):
+    """Pecah DataFrame view bookings menjadi (ruangan, aset, kendaraan) dengan kolom lama"""
+    frames = []
+    for booking_type, mapping in columns.items():
+        part = df[df['resource_kind'] == booking_type]
+        frames.append(part[list(mapping)].rename(columns=mapping).reset_index(drop=True))
+    return tuple(frames)
+
+
+def hot_queries():
+    """Query utama beserta contoh parameter, untuk EXPLAIN QUERY PLAN"""
+    queries = {
+        'available_rooms': available_rooms_query('2025-01-06', '08:00:00', '10:00:00'),
+        'available_assets': available_assets_query('2025-01-06', '2025-01-08', 'Laptop'),
+        'available_vehicles': available_vehicles_query('2025-01-06', '08:12:00', '12:16:00', 'Mobil'),
+        'room_conflict': (ROOM_CONFLICT_SQL, room_conflict_params(20094, 1, 480, 600)),
+        'asset_conflict': (ASSET_CONFLICT_SQL, (1,) + asset_overlap_params(20094, 20096)),
+        'vehicle_conflict': (VEHICLE_CONFLICT_SQL, (20094, 1) + vehicle_overlap_params(492, 736)),
+    }
+    queries['user_bookings'] = (USER_BOOKINGS_SQL, (1,))
+    queries['all_bookings'] = (ALL_BOOKINGS_SQL, ())
+    queries['bookings_on_day'] = bookings_query(date='2025-01-06')
+    queries['bookings_on_day_history'] = bookings_query(date='2025-01-06', history=True)
+    queries['user_booking_counts'] = (USER_BOOKING_COUNTS_SQL, (1,) * len(BOOKING_TABLES))
+    for booking_type in USER_BOOKINGS_PAGE_SQL:
+        queries[f'user_bookings_page[{booking_type}]'] = user_bookings_page_query(
+            1, booking_type, after=('2025-01-06 08:00:00', 100)
+        )
+    for booking_type, query in ARCHIVE_CANDIDATES_SQL.items():
+        queries[f'archive_candidates[{booking_type}]'] = (query, (20094, 19729, 500))
+    for booking_type in BOOKING_TABLES:
+        for table in export_tables(booking_type):
+            queries[f'export_bookings[{table}]'] = (EXPORT_BOOKINGS_SQL[booking_type].format(table=table), ())
+            queries[f'columnar_export[{table}]'] = (COLUMNAR_EXPORT_SQL[booking_type].format(table=table), ())
+    queries['columnar_daily'] = columnar_daily_query('2025-01-06')
+    return queries
+
+
+# Tabel yang tidak boleh di-scan penuh oleh query utama (termasuk alias-nya)
+BOOKING_TABLE_NAMES = {
+    'room_bookings', 'asset_bookings', 'vehicle_bookings', 'rb', 'ab', 'vb'
+} | set(schema.ARCHIVE_TABLES.values())
+
+# Query yang memang membaca seluruh booking (daftar lengkap) - scan di sini wajar
+FULL_SCAN_QUERIES = {'all_bookings'}
+
+
+class QueryPlanRegression(Exception):
+    """Query utama kembali melakukan full table scan pada tabel booking"""
+
+
+class BookingResult:
+    """Hasil book_room / book_asset / book_vehicle
+    
+    Bernilai True hanya bila booking tersimpan, sehingga bisa dipakai seperti hasil
+    add_*_booking yang lama. Bila bentrok, conflicts berisi ID booking yang bertabrakan
+    (ID negatif = -ID seri booking ruangan berulang).
+    """
+    OK = 'ok'
+    CONFLICT = 'conflict'
+    INVALID = 'invalid'
+    ERROR = 'error'
+    
+    def __init__(self, status, booking_id=None, conflicts=(), message=''):
+        self.status = status
+        self.booking_id = booking_id
+        self.conflicts = list(conflicts)
+        self.message = message
+    
+    def __bool__(self):
+        return self.status == BookingResult.OK
+    
+    def __repr__(self):
+        return (f"BookingResult(status={self.status!r}, booking_id={self.booking_id!r}, "
+                f"conflicts={self.conflicts!r}, message={self.message!r})")
+
+
+def is_busy_error(error):
+    """True bila error berasal dari SQLITE_BUSY / SQLITE_LOCKED"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+# Katalog untuk CatalogCache (catalog.py): nama -> (kelas record, query pemuat)
+CATALOG_QUERIES = {
+    'rooms': (Room, f"SELECT {Room.columns()} FROM rooms"),
+    'assets': (Asset, f"SELECT {Asset.columns()} FROM assets"),
+    'vehicles': (Vehicle, f"SELECT {Vehicle.columns()} FROM vehicles"),
+    'users': (User, f"SELECT {User.columns()} FROM users ORDER BY username, name"),
+}
+
 
 class Database:
-    def __init__(self, db_name="database.db"):
+    def __init__(self, db_name="database.db", availability_backend="index"):
         self.db_name = db_name
+        self.pool = get_pool(db_name)
+        # "index": indeks interval di memori, "sql": subquery NOT IN langsung ke database
+        self.availability_backend = availability_backend
+        self.availability = get_availability_index(self.pool)
+        # Katalog kecil (ruangan/aset/kendaraan/user) dibaca dari memori, dibagi semua sesi
+        self.catalog = get_catalog_cache(self.pool)
         self.init_database()
     
     def get_connection(self):
-        return sqlite3.connect(self.db_name, check_same_thread=False)
+        """Pinjam koneksi dari pool bersama - conn.close() mengembalikannya ke pool"""
+        return self.pool.acquire()
     
-    def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Tabel Users - DITAMBAHKAN UNIQUE constraint
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                name TEXT NOT NULL,
-                role TEXT DEFAULT 'user'
-            )
-        ''')
-        
-        # Tabel Ruangan
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rooms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                capacity INTEGER,
-                status TEXT DEFAULT 'tersedia'
-            )
-        ''')
-        
-        # Tabel Aset Elektronik
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                status TEXT DEFAULT 'tersedia',
-                condition TEXT DEFAULT 'baik'
-            )
-        ''')
-        
-        # Tabel Kendaraan
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vehicles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                plate_number TEXT,
-                status TEXT DEFAULT 'tersedia'
-            )
-        ''')
-        
-        # Tabel Booking Ruangan - LANGSUNG DISETUJUI
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS room_bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                room_id INTEGER,
-                date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                purpose TEXT,
-                requester_name TEXT,
-                status TEXT DEFAULT 'disetujui',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (room_id) REFERENCES rooms (id)
-            )
-        ''')
-        
-        # Tabel Booking Aset - LANGSUNG DISETUJUI
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS asset_bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                asset_id INTEGER,
-                borrow_date TEXT NOT NULL,
-                return_date TEXT NOT NULL,
-                purpose TEXT,
-                requester_name TEXT,
-                status TEXT DEFAULT 'disetujui',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (asset_id) REFERENCES assets (id)
-            )
-        ''')
-        
-        # Tabel Booking Kendaraan - LANGSUNG DISETUJUI
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vehicle_bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                vehicle_id INTEGER,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                destination TEXT,
-                purpose TEXT,
-                requester_name TEXT,
-                status TEXT DEFAULT 'disetujui',
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (vehicle_id) REFERENCES vehicles (id)
-            )
-        ''')
+    def connection(self):
+        """Context manager: pinjam koneksi, commit/rollback otomatis, lalu kembalikan ke pool"""
+        return self.pool.connection()
+    
+    def get_pool_stats(self):
+        """Metrik pool koneksi (checkout, tunggu, koneksi terbuka) untuk halaman admin"""
+        return self.pool.stats()
+    
+    def get_catalog_stats(self):
+        """Metrik cache katalog (hit/miss, versi) untuk halaman admin"""
+        return self.catalog.snapshot()
+    
+    def invalidate_catalog(self, name=None):
+        """Buang cache katalog (mis. setelah tabel diubah dari luar aplikasi)"""
+        self.catalog.invalidate(name)
+    
+    def _catalog(self, name, cursor=None):
+        """Record tabel katalog dari cache; cursor dipakai bila sudah di dalam transaksi"""
+        record_class, query = CATALOG_QUERIES[name]
+        
+        def load(cursor):
+            # Cursor baru agar row_factory tidak mengubah cursor milik pemanggil
+            cursor = cursor.connection.cursor()
+            cursor.row_factory = record_class.row_factory
+            return cursor.execute(query).fetchall()
         
-        conn.commit()
-        conn.close()
+        if cursor is not None:
+            return self.catalog.get(name, lambda: load(cursor))
         
-        # Insert data awal
-        self.insert_initial_data()
-        # Load users dari CSV
-        self.load_users_from_csv("users.csv")
+        def load_pooled():
+            with self.connection() as conn:
+                return load(conn.cursor())
+        return self.catalog.get(name, load_pooled)
     
-    def insert_initial_data(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Cek apakah sudah ada data ruangan
-        cursor.execute("SELECT COUNT(*) FROM rooms")
-        if cursor.fetchone()[0] == 0:
-            rooms = [
-                ('Ruang Rapat', 10),
-                ('Ruang Konsul 1', 7),
-                ('Ruang Konsul 2', 8),
-                ('Ruang Konsul 3', 9),
-                ('Studio', 10),
-                ('Aula', 20),
-            ]
-            cursor.executemany("INSERT INTO rooms (name, capacity) VALUES (?, ?)", rooms)
-        
-        # Cek apakah sudah ada data aset
-        cursor.execute("SELECT COUNT(*) FROM assets")
-        if cursor.fetchone()[0] == 0:
-            assets = [
-                ('Laptop Dell Latitude 1', 'Laptop'),
-                ('Laptop Dell Latitude 2', 'Laptop'),
-                ('Laptop HP ProBook 1', 'Laptop'),
-                ('Laptop HP ProBook 2', 'Laptop'),
-                ('Laptop Lenovo ThinkPad 1', 'Laptop'),
-                ('Laptop Lenovo ThinkPad 2', 'Laptop'),
-            ]
-            cursor.executemany("INSERT INTO assets (name, type) VALUES (?, ?)", assets)
-        
-        # Cek apakah sudah ada data kendaraan
-        cursor.execute("SELECT COUNT(*) FROM vehicles")
-        if cursor.fetchone()[0] == 0:
-            vehicles = [
-                ('Toyota Avanza 1', 'Mobil', 'L 1234 AB'),
-                ('Toyota Avanza 2', 'Mobil', 'L 5678 CD'),
-                ('Honda Mobilio', 'Mobil', 'L 9012 EF'),
-                ("Toyota Innova Reborn", "Mobil", "L 3456 GH"),
-                ("Suzuki Ertiga", "Mobil", "L 3344 MN")
-            ]
-            cursor.executemany("INSERT INTO vehicles (name, type, plate_number) VALUES (?, ?, ?)", vehicles)
+    def _catalog_frame(self, name):
+        """DataFrame katalog untuk halaman yang menampilkan tabel - dibangun sekali per versi"""
+        import pandas as pd
         
-        conn.commit()
-        conn.close()
+        def build():
+            columns = list(CATALOG_QUERIES[name][0].__slots__)
+            rows = [record.astuple() for record in self._catalog(name)]
+            return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        
+        # Salinan: DataFrame di cache dipakai bersama semua sesi
+        return self.catalog.get(name, build, variant='frame').copy()
+    
+    def explain_hot_queries(self):
+        """EXPLAIN QUERY PLAN untuk setiap query utama -> {nama: [detail plan]}"""
+        plans = {}
+        with self.connection() as conn:
+            for name, (query, params) in hot_queries().items():
+                rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+                plans[name] = [row[3] for row in rows]
+        return plans
+    
+    def check_query_plans(self):
+        """Gagal (QueryPlanRegression) bila ada query utama yang full scan tabel booking"""
+        plans = self.explain_hot_queries()
+        regressions = []
+        for name, details in plans.items():
+            if name in FULL_SCAN_QUERIES:
+                continue
+            for detail in details:
+                words = detail.split()
+                if len(words) >= 2 and words[0] == 'SCAN' and words[1] in BOOKING_TABLE_NAMES and 'USING' not in words:
+                    regressions.append(f"{name}: {detail}")
+        if regressions:
+            raise QueryPlanRegression("Full table scan terdeteksi:\n" + "\n".join(regressions))
+        return plans
+    
+    def run_write_transaction(self, work, retries=5, base_delay=0.05):
+        """Jalankan work(cursor) di dalam BEGIN IMMEDIATE, ulangi dengan backoff bila database sibuk
+        
+        BEGIN IMMEDIATE langsung mengambil write lock, sehingga pengecekan dan INSERT di dalam
+        work tidak bisa diselingi penulis lain (dari thread maupun proses lain).
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("BEGIN IMMEDIATE")
+                    return work(cursor)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == retries:
+                    raise
+                time.sleep(base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+    
+    def _requester_name(self, cursor, user_id, requester_name):
+        # Jika requester_name tidak diberikan, ambil dari tabel users
+        if requester_name:
+            return requester_name
+        
+        def load():
+            return {user.id: user.name for user in self._catalog('users', cursor)}
+        
+        return self.catalog.get('users', load, variant='names').get(user_id, "Tidak Diketahui")
+    
+    def init_database(self):
+        """Migrasi skema, data awal, dan load users - hanya sekali per proses"""
+        schema.ensure_initialized(
+            self.pool,
+            # Load users dari CSV
+            on_first_init=lambda: self.load_users_from_csv("users.csv")
+        )
+    
+    def insert_initial_data(self):
+        """Isi data awal ruangan, aset, dan kendaraan bila tabelnya masih kosong"""
+        with self.connection() as conn:
+            schema.seed_initial_data(conn.cursor())
     
     def debug_users(self):
         """Fungsi debug untuk mengecek semua user di database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, username, name, role FROM users ORDER BY username")
-        users = cursor.fetchall()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, username, name, role FROM users ORDER BY username")
+            users = cursor.fetchall()
         
         print("\n" + "="*50)
         print("DEBUG: USERS IN DATABASE")
@@ -187,9 +998,6 @@ class Database:
     
     def debug_verify_user(self, username, password):
         """Debug khusus untuk verifikasi user"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         username = str(username).strip()
         password = str(password).strip()
         
@@ -197,19 +1005,20 @@ class Database:
         print(f"  Input username: '{username}' (length: {len(username)})")
         print(f"  Input password: '{password}' (length: {len(password)})")
         
-        # Cari exact match
-        cursor.execute(
-            "SELECT id, username, name, role FROM users WHERE username = ? AND password = ?",
-            (username, password)
-        )
-        user = cursor.fetchone()
-        
-        # Debug: cari partial match
-        cursor.execute("SELECT username FROM users WHERE username LIKE ?", (f"%{username}%",))
-        similar = cursor.fetchall()
-        print(f"  Similar usernames in DB: {similar}")
-        
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Cari exact match
+            cursor.execute(
+                "SELECT id, username, name, role FROM users WHERE username = ? AND password = ?",
+                (username, password)
+            )
+            user = cursor.fetchone()
+            
+            # Debug: cari partial match
+            cursor.execute("SELECT username FROM users WHERE username LIKE ?", (f"%{username}%",))
+            similar = cursor.fetchall()
+            print(f"  Similar usernames in DB: {similar}")
         
         if user:
             print(f"  RESULT: FOUND - {user}")
@@ -223,78 +1032,150 @@ class Database:
             print(f"  RESULT: NOT FOUND")
             return None
     
+    def debug_availability(self, booking_type, *args):
+        """Debug: bandingkan hasil indeks ketersediaan dengan query SQL"""
+        methods = {
+            'Ruangan': (self._get_available_rooms_index, self._get_available_rooms_sql),
+            'Aset': (self._get_available_assets_index, self._get_available_assets_sql),
+            'Kendaraan': (self._get_available_vehicles_index, self._get_available_vehicles_sql),
+        }
+        indexed, sql = methods[booking_type]
+        from_index = indexed(*args)
+        from_sql = sql(*args)
+        
+        match = sorted(from_index) == sorted(from_sql)
+        print(f"\nDEBUG availability {booking_type} {args}:")
+        print(f"  Index: {[row.id for row in from_index]}")
+        print(f"  SQL  : {[row.id for row in from_sql]}")
+        print(f"  RESULT: {'SAMA' if match else 'BERBEDA'}")
+        return match
+    
     def load_users_from_csv(self, csv_file="users.csv"):
-        """Load users dari file CSV - DIPERBAIKI dengan membaca sebagai string"""
+        """Load users dari file CSV - sinkronisasi inkremental, lihat sync_users_from_csv"""
+        report = self.sync_users_from_csv(csv_file)
+        return report['status'] != 'error'
+    
+    def sync_users_from_csv(self, csv_file="users.csv", force=False):
+        """Sinkronkan tabel users dengan CSV berdasarkan USERNAME (insert/update/delete)
+        
+        File dilewati bila sidik jarinya (mtime, ukuran, sha256) sama dengan sinkronisasi
+        terakhir. ID user yang sudah ada tidak berubah, sehingga booking tetap terhubung.
+        Akun dengan role 'admin' tidak pernah dihapus.
+        """
+        started = time.perf_counter()
+        report = {
+            'status': 'synced',
+            'inserted': 0,
+            'updated': 0,
+            'deleted': 0,
+            'unchanged': 0,
+            'elapsed_ms': 0.0,
+        }
+        
+        def finish(status):
+            report['status'] = status
+            report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return report
+        
         try:
             if not os.path.exists(csv_file):
                 print(f"File {csv_file} tidak ditemukan")
-                return False
+                return finish('error')
             
-            # PERBAIKAN DI SINI: Baca CSV dengan dtype=str untuk menjaga leading zeros
-            df = pd.read_csv(csv_file, dtype=str)
+            source = os.path.abspath(csv_file)
+            file_stat = os.stat(csv_file)
             
-            # Pastikan semua data menjadi string
-            df['USERNAME'] = df['USERNAME'].astype(str).str.strip()
-            df['PASSWORD'] = df['PASSWORD'].astype(str).str.strip()
-            df['NAMA'] = df['NAMA'].astype(str).str.strip()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT mtime, size, sha256 FROM sync_state WHERE source = ?", (source,))
+                previous = cursor.fetchone()
             
-            # Konfirmasi data
-            print(f"Contoh data dari CSV: {df['USERNAME'].head().tolist()}")
+            # Cek cepat: mtime dan ukuran sama -> file tidak berubah
+            if not force and previous and previous[0] == file_stat.st_mtime and previous[1] == file_stat.st_size:
+                return finish('skipped')
             
-            conn = self.get_connection()
-            cursor = conn.cursor()
-        
-            # Hapus semua user (kecuali admin) untuk menghindari duplikat
-            cursor.execute("DELETE FROM users WHERE username != 'admin'")
-            
-            # Insert user baru dari CSV
-            success_count = 0
-            for _, row in df.iterrows():
-                try:
-                    username = str(row['USERNAME']).strip()
-                    password = str(row['PASSWORD']).strip()
-                    name = str(row['NAMA']).strip()
-                    
-                    if username and password and name:
-                        # Insert atau replace user
-                        cursor.execute(
-                            "INSERT OR REPLACE INTO users (username, password, name, role) VALUES (?, ?, ?, 'user')",
-                            (username, password, name)
-                        )
-                        success_count += 1
-                except Exception as e:
-                    print(f"Error inserting user {username}: {e}")
-            
-            # Tambahkan admin default jika belum ada
-            cursor.execute("SELECT COUNT(*) FROM users WHERE username='admin'")
-            if cursor.fetchone()[0] == 0:
-                cursor.execute(
-                    "INSERT INTO users (username, password, name, role) VALUES (?, ?, ?, 'admin')",
-                    ('admin', 'admin123', 'Administrator')
-                )
-                success_count += 1
+            with open(csv_file, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
             
-            conn.commit()
+            # Isi file sama (mis. hanya di-touch) -> cukup perbarui mtime
+            if not force and previous and previous[2] == digest:
+                with self.connection() as conn:
+                    conn.execute(
+                        "UPDATE sync_state SET mtime = ?, size = ? WHERE source = ?",
+                        (file_stat.st_mtime, file_stat.st_size, source)
+                    )
+                return finish('skipped')
             
-            # Verifikasi data yang sudah dimasukkan
-            cursor.execute("SELECT username FROM users WHERE username LIKE '0%' LIMIT 5")
-            sample_users = cursor.fetchall()
-            print(f"Sample users di database: {sample_users}")
+            # Baca semua kolom sebagai string untuk menjaga leading zeros
+            csv_users = {}
+            for row in csv.DictReader(io.StringIO(raw.decode('utf-8-sig'))):
+                username = (row.get('USERNAME') or '').strip()
+                password = (row.get('PASSWORD') or '').strip()
+                name = (row.get('NAMA') or '').strip()
+                if username and password and name:
+                    csv_users[username] = (password, name)
             
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                cursor.execute("SELECT id, username, password, name, role FROM users")
+                existing = {row[1]: row for row in cursor.fetchall()}
+                
+                to_insert = []
+                to_update = []
+                for username, (password, name) in csv_users.items():
+                    current = existing.get(username)
+                    if current is None:
+                        to_insert.append((username, password, name))
+                    elif current[2] != password or current[3] != name:
+                        to_update.append((password, name, current[0]))
+                    else:
+                        report['unchanged'] += 1
+                
+                to_delete = [
+                    (row[0],) for username, row in existing.items()
+                    if username not in csv_users and username != 'admin' and row[4] != 'admin'
+                ]
+                
+                cursor.executemany(
+                    "INSERT INTO users (username, password, name, role) VALUES (?, ?, ?, 'user')",
+                    to_insert
+                )
+                cursor.executemany("UPDATE users SET password = ?, name = ? WHERE id = ?", to_update)
+                cursor.executemany("DELETE FROM users WHERE id = ?", to_delete)
+                
+                # Tambahkan admin default jika belum ada
+                if 'admin' not in existing and 'admin' not in csv_users:
+                    cursor.execute(
+                        "INSERT INTO users (username, password, name, role) VALUES (?, ?, ?, 'admin')",
+                        ('admin', 'admin123', 'Administrator')
+                    )
+                    report['inserted'] += 1
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO sync_state (source, mtime, size, sha256, synced_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (source, file_stat.st_mtime, file_stat.st_size, digest))
             
-            print(f"Successfully loaded {success_count} users from {csv_file}")
-            return True
+            report['inserted'] += len(to_insert)
+            report['updated'] = len(to_update)
+            report['deleted'] = len(to_delete)
+            finish('synced')
+            self.invalidate_catalog('users')
+            print(
+                f"Sinkronisasi {csv_file}: {report['inserted']} baru, {report['updated']} diubah, "
+                f"{report['deleted']} dihapus, {report['unchanged']} tetap ({report['elapsed_ms']} ms)"
+            )
+            return report
             
         except Exception as e:
             print(f"Error loading users from CSV: {e}")
-            return False
+            return finish('error')
         
     def verify_user(self, username, password):
         """Verifikasi login user - DIPERBAIKI dengan handling leading zeros"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         # PERBAIKAN: Pastikan input menjadi string dan strip whitespace
         username = str(username).strip()
         password = str(password).strip()
@@ -302,19 +1183,20 @@ class Database:
         print(f"DEBUG login attempt - Username: '{username}', Password: '{password}'")
         print(f"DEBUG username length: {len(username)}")
         
-        # Debug: tampilkan user dengan angka 0 di depan
-        cursor.execute("SELECT username FROM users WHERE username LIKE '0%' LIMIT 5")
-        zero_users = cursor.fetchall()
-        print(f"DEBUG users dengan leading zero: {zero_users}")
-        
-        # Cari user dengan username dan password
-        cursor.execute(
-            "SELECT id, username, name, role FROM users WHERE username = ? AND password = ?",
-            (username, password)
-        )
-        user = cursor.fetchone()
-        
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Debug: tampilkan user dengan angka 0 di depan
+            cursor.execute("SELECT username FROM users WHERE username LIKE '0%' LIMIT 5")
+            zero_users = cursor.fetchall()
+            print(f"DEBUG users dengan leading zero: {zero_users}")
+            
+            # Cari user dengan username dan password
+            cursor.execute(
+                "SELECT id, username, name, role FROM users WHERE username = ? AND password = ?",
+                (username, password)
+            )
+            user = cursor.fetchone()
         
         if user:
             print(f"DEBUG login SUCCESS for user: {user}")
@@ -330,34 +1212,27 @@ class Database:
     
     def get_users_by_division(self, division):
         """Ambil daftar user berdasarkan divisi"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, name FROM users WHERE username = ? ORDER BY name",
-            (division,)
-        )
-        users = cursor.fetchall()
-        conn.close()
-        return users
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, name FROM users WHERE username = ? ORDER BY name",
+                (division,)
+            )
+            return cursor.fetchall()
     
     def get_all_users(self):
         """Ambil semua user untuk admin"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM users ORDER BY username, name", conn)
-        conn.close()
-        return df
+        return self._catalog_frame('users')
     
     def add_user(self, username, password, name, role='user'):
         """Tambah user baru"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO users (username, password, name, role) VALUES (?, ?, ?, ?)",
-                (username, password, name, role)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (username, password, name, role) VALUES (?, ?, ?, ?)",
+                    (username, password, name, role)
+                )
+            self.invalidate_catalog('users')
             return True
         except:
             return False
@@ -365,14 +1240,12 @@ class Database:
     def update_user(self, user_id, username, password, name, role):
         """Update user"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE users SET username=?, password=?, name=?, role=? WHERE id=?",
-                (username, password, name, role, user_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "UPDATE users SET username=?, password=?, name=?, role=? WHERE id=?",
+                    (username, password, name, role, user_id)
+                )
+            self.invalidate_catalog('users')
             return True
         except:
             return False
@@ -380,291 +1253,556 @@ class Database:
     def delete_user(self, user_id):
         """Hapus user"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE id=?", (user_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("DELETE FROM users WHERE id=?", (user_id,))
+            self.invalidate_catalog('users')
             return True
         except:
             return False
     
     def get_all_rooms(self):
         """Ambil semua ruangan"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM rooms", conn)
-        conn.close()
-        return df
+        return self._catalog_frame('rooms')
     
     def get_available_rooms(self, date, start_time, end_time):
         """Cek ruangan yang tersedia"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-    
-        cursor.execute("""
-            SELECT r.* FROM rooms r
-            WHERE r.id NOT IN (
-                SELECT room_id FROM room_bookings
-                WHERE date = ? 
-                AND status = 'disetujui'
-                AND (
-                    (start_time <= ? AND end_time > ?) OR
-                    (start_time < ? AND end_time >= ?) OR
-                    (start_time >= ? AND end_time <= ?)
-                )
-            )
-        """, (date, start_time, start_time, end_time, end_time, start_time, end_time))
+        if self.availability_backend == "index":
+            return self._get_available_rooms_index(date, start_time, end_time)
+        return self._get_available_rooms_sql(date, start_time, end_time)
+    
+    def _get_available_rooms_index(self, date, start_time, end_time):
+        rooms = self._catalog('rooms')
+        return self.availability.filter_available(
+            'Ruangan', schema.day_number(date),
+            schema.minute_of_day(start_time), schema.minute_of_day(end_time), rooms
+        )
     
-        rooms = cursor.fetchall()
-        conn.close()
-        return rooms
+    def _get_available_rooms_sql(self, date, start_time, end_time):
+        query, params = available_rooms_query(date, start_time, end_time)
+        with self.connection() as conn:
+            conn.row_factory = Room.row_factory
+            return conn.execute(query, params).fetchall()
     
-    def add_room_booking(self, user_id, room_id, date, start_time, end_time, purpose, requester_name=None):
-        """Tambah booking ruangan - LANGSUNG DISETUJUI dengan nama pemesan"""
+    def book_room(self, user_id, room_id, date, start_time, end_time, purpose, requester_name=None):
+        """Booking ruangan secara atomik: cek bentrok + INSERT dalam satu transaksi"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Jika requester_name tidak diberikan, ambil dari tabel users
-            if not requester_name:
-                cursor.execute("SELECT name FROM users WHERE id=?", (user_id,))
-                user_result = cursor.fetchone()
-                requester_name = user_result[0] if user_result else "Tidak Diketahui"
-            
-            cursor.execute("""
-                INSERT INTO room_bookings (user_id, room_id, date, start_time, end_time, purpose, requester_name, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 'disetujui')
-            """, (user_id, room_id, date, start_time, end_time, purpose, requester_name))
+            day = schema.day_number(date)
+            start_minute, end_minute = schema.minute_of_day(start_time), schema.minute_of_day(end_time)
+        except (TypeError, ValueError):
+            return BookingResult(BookingResult.INVALID, message="Format tanggal/jam tidak valid")
+        if start_minute >= end_minute:
+            return BookingResult(BookingResult.INVALID, message="Jam selesai harus lebih dari jam mulai")
+        
+        def work(cursor):
+            cursor.execute(ROOM_CONFLICT_SQL, room_conflict_params(day, room_id, start_minute, end_minute))
+            conflicts = [row[0] for row in cursor.fetchall()]
+            if conflicts:
+                return BookingResult(BookingResult.CONFLICT, conflicts=conflicts,
+                                     message="Ruangan sudah dibooking pada waktu tersebut")
             
-            conn.commit()
-            conn.close()
-            return True
+            name = self._requester_name(cursor, user_id, requester_name)
+            cursor.execute(ROOM_INSERT_SQL, (user_id, room_id, date, start_time, end_time, purpose, name, day, start_minute, end_minute))
+            return BookingResult(BookingResult.OK, booking_id=cursor.lastrowid)
+        
+        try:
+            result = self.run_write_transaction(work)
         except Exception as e:
             print(f"Error adding room booking: {e}")
-            return False
+            return BookingResult(BookingResult.ERROR, message=str(e))
+        
+        if result:
+            self.availability.add('Ruangan', result.booking_id, room_id, day, start_minute, end_minute)
+        return result
     
-    def get_all_assets(self):
-        """Ambil semua aset"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM assets", conn)
-        conn.close()
-        return df
+    def add_room_booking(self, user_id, room_id, date, start_time, end_time, purpose, requester_name=None):
+        """Tambah booking ruangan - LANGSUNG DISETUJUI dengan nama pemesan"""
+        return bool(self.book_room(user_id, room_id, date, start_time, end_time, purpose, requester_name))
     
-    def get_available_assets(self, borrow_date, return_date, asset_type=None):
-        """Cek aset yang tersedia"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def book_room_series(self, user_id, room_id, start_date, start_time, end_time, purpose,
+                         frequency='mingguan', every=1, until=None, count=None, requester_name=None):
+        """Booking ruangan berulang (harian/mingguan/bulanan) disimpan sebagai satu baris seri
         
-        query = """
-            SELECT a.* FROM assets a
-            WHERE a.condition = 'baik'
+        Seri berakhir pada tanggal until atau setelah count kejadian (isi salah satu). Semua
+        kejadian dicek terhadap booking dan seri lain dalam satu transaksi; booking_id hasilnya
+        adalah ID seri.
         """
-        params = []
-        
-        if asset_type:
-            query += " AND a.type = ?"
-            params.append(asset_type)
-        
-        query += """
-            AND a.id NOT IN (
-                SELECT asset_id FROM asset_bookings
-                WHERE status = 'disetujui'
-                AND (
-                    (borrow_date <= ? AND return_date >= ?) OR
-                    (borrow_date <= ? AND return_date >= ?) OR
-                    (borrow_date >= ? AND return_date <= ?)
-                )
+        try:
+            first_day = schema.day_number(start_date)
+            start_minute, end_minute = schema.minute_of_day(start_time), schema.minute_of_day(end_time)
+            until_day = None if until is None else schema.day_number(until)
+            every = int(every)
+            count = None if count is None else int(count)
+        except (TypeError, ValueError):
+            return BookingResult(BookingResult.INVALID, message="Format tanggal/jam tidak valid")
+        if start_minute >= end_minute:
+            return BookingResult(BookingResult.INVALID, message="Jam selesai harus lebih dari jam mulai")
+        if (frequency not in recurrence.FREQUENCIES or not 1 <= every <= recurrence.MAX_EVERY
+                or (count is not None and count < 1)):
+            return BookingResult(BookingResult.INVALID, message="Aturan pengulangan tidak valid")
+        if (until_day is None) == (count is None):
+            return BookingResult(BookingResult.INVALID, message="Isi salah satu: tanggal akhir atau jumlah pengulangan")
+        
+        if count is not None:
+            if count > recurrence.MAX_OCCURRENCES:
+                return BookingResult(BookingResult.INVALID,
+                                     message=f"Seri maksimal {recurrence.MAX_OCCURRENCES} kejadian")
+            last_day = recurrence.last_occurrence_day(frequency, every, first_day, count)
+        else:
+            last_day = until_day
+        # Batasi sebelum kejadian dihitung: seri sampai tahun 9999 tidak bisa dibaca kembali
+        if last_day is None or last_day - first_day > recurrence.MAX_SPAN_DAYS:
+            return BookingResult(BookingResult.INVALID, message="Seri maksimal berlangsung 10 tahun")
+        days = recurrence.occurrence_days(frequency, every, first_day, last_day, first_day, last_day)
+        if not days:
+            return BookingResult(BookingResult.INVALID, message="Tidak ada jadwal dalam rentang tanggal tersebut")
+        if len(days) > recurrence.MAX_OCCURRENCES:
+            return BookingResult(BookingResult.INVALID,
+                                 message=f"Seri maksimal {recurrence.MAX_OCCURRENCES} kejadian")
+        first_date = schema.date_of_day(first_day)
+        
+        def work(cursor):
+            conflicts = self._room_series_conflicts(cursor, room_id, days, start_minute, end_minute)
+            if conflicts:
+                dates = sorted({schema.date_of_day(day).isoformat() for _, day in conflicts})
+                return BookingResult(BookingResult.CONFLICT, conflicts=sorted({id_ for id_, _ in conflicts}),
+                                     message=f"Ruangan sudah dibooking pada {len(dates)} tanggal seri "
+                                             f"(mis. {dates[0]})")
+            
+            name = self._requester_name(cursor, user_id, requester_name)
+            cursor.execute(ROOM_SERIES_INSERT_SQL, (
+                user_id, room_id, first_date.isoformat(), None if until is None else str(until)[:10], count,
+                frequency, every, start_time, end_time, purpose, name,
+                first_day, last_day, first_date.day, recurrence.month_index(first_date), start_minute, end_minute,
+            ))
+            series_id = cursor.lastrowid
+            add_series_stats(cursor, room_id, [('disetujui', day) for day in days])
+            return BookingResult(BookingResult.OK, booking_id=series_id)
+        
+        try:
+            result = self.run_write_transaction(work)
+        except Exception as e:
+            print(f"Error adding room series: {e}")
+            return BookingResult(BookingResult.ERROR, message=str(e))
+        
+        if result:
+            # Kejadian seri tersebar di banyak bucket hari - muat ulang saat dibutuhkan
+            self.availability.invalidate('Ruangan')
+        return result
+    
+    def _room_series_conflicts(self, cursor, room_id, days, start_minute, end_minute):
+        """(ID booking / -ID seri, hari) yang bentrok dengan kejadian seri baru pada days"""
+        conflicts = []
+        overlap = room_overlap_params(start_minute, end_minute)
+        for offset in range(0, len(days), 500):
+            chunk = days[offset:offset + 500]
+            cursor.execute(f"""
+                SELECT id, day FROM room_bookings
+                WHERE day IN ({', '.join('?' * len(chunk))}) AND status = 'disetujui' AND room_id = ?
+                AND {ROOM_OVERLAP_SQL}
+            """, tuple(chunk) + (room_id,) + overlap)
+            conflicts.extend(cursor.fetchall())
+        
+        wanted = set(days)
+        cursor.execute(ROOM_SERIES_CANDIDATES_SQL, (room_id, days[0], days[-1]) + overlap)
+        for series_id, frequency, every, first_day, last_day in cursor.fetchall():
+            shared = wanted.intersection(
+                recurrence.occurrence_days(frequency, every, first_day, last_day, days[0], days[-1])
             )
+            if shared:
+                cursor.execute("SELECT day FROM room_booking_series_exceptions WHERE series_id = ?", (series_id,))
+                shared.difference_update(row[0] for row in cursor.fetchall())
+                conflicts.extend((-series_id, day) for day in shared)
+        return conflicts
+    
+    def get_room_series_occurrences(self, date_from, date_to=None):
+        """Kejadian seri ruangan berulang dalam rentang tanggal, dihitung saat dibaca
+        
+        Baris berupa dict berkolom sama dengan view bookings; id bernilai -ID seri. Kejadian
+        yang dilewati atau dibatalkan ikut dengan status 'dibatalkan', seperti booking biasa.
         """
-        params.extend([return_date, borrow_date, borrow_date, return_date, borrow_date, return_date])
+        first, last = schema.day_number(date_from), schema.day_number(date_to or date_from)
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            series = conn.execute(ROOM_SERIES_WINDOW_SQL, (first, last)).fetchall()
+            if not series:
+                return []
+            skipped = series_skipped_days(conn, [row['id'] for row in series])
         
-        cursor.execute(query, params)
-        assets = cursor.fetchall()
-        conn.close()
-        return assets
+        return [
+            occurrence
+            for row in series
+            for occurrence in series_occurrences(row, skipped.get(row['id'], ()), first, last)
+        ]
     
-    def add_asset_booking(self, user_id, asset_id, borrow_date, return_date, purpose, requester_name=None):
-        """Tambah booking aset - LANGSUNG DISETUJUI dengan nama pemesan"""
+    def get_user_room_series(self, user_id):
+        """Seri booking ruangan milik user (halaman Riwayat), terbaru dulu -> DataFrame
+        
+        Satu baris per seri dengan aturannya, rentang tanggal, jumlah kejadian yang masih
+        disetujui (active_count) dan kejadian disetujui berikutnya mulai hari ini (next_date).
+        """
+        import pandas as pd
+        today = schema.day_number(datetime.now())
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            series = conn.execute(ROOM_SERIES_USER_SQL, (user_id,)).fetchall()
+            skipped = series_skipped_days(conn, [row['id'] for row in series])
+        
+        rows = []
+        for row in series:
+            approved = [
+                occurrence['start_day'] for occurrence in series_occurrences(row, skipped.get(row['id'], ()))
+                if occurrence['status'] == 'disetujui'
+            ]
+            upcoming = [day for day in approved if day >= today]
+            rows.append({
+                'id': -row['id'], 'item_name': row['item_name'], 'frequency': row['frequency'],
+                'every': row['every'], 'first_date': schema.date_of_day(row['first_day']).isoformat(),
+                'last_date': schema.date_of_day(row['last_day']).isoformat(),
+                'start_time': row['start_time'], 'end_time': row['end_time'], 'purpose': row['purpose'],
+                'status': row['status'], 'active_count': len(approved),
+                'next_date': schema.date_of_day(upcoming[0]).isoformat() if upcoming else None,
+            })
+        return pd.DataFrame(rows, columns=[
+            'id', 'item_name', 'frequency', 'every', 'first_date', 'last_date', 'start_time', 'end_time',
+            'purpose', 'status', 'active_count', 'next_date',
+        ])
+    
+    def get_room_series_upcoming(self, series_id, date_from=None):
+        """Tanggal kejadian seri (ID positif atau -ID) yang masih disetujui mulai date_from (default hari ini)"""
+        series_id = abs(series_id)
+        first = schema.day_number(date_from or datetime.now())
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(ROOM_SERIES_SQL + "WHERE s.id = ?", (series_id,)).fetchone()
+            if row is None:
+                return []
+            skipped = series_skipped_days(conn, [series_id])
+        return [
+            occurrence['start_date']
+            for occurrence in series_occurrences(row, skipped.get(series_id, ()), first, row['last_day'])
+            if occurrence['status'] == 'disetujui'
+        ]
+    
+    def _cancel_room_series(self, cursor, series_id, occurrence_date=None):
+        """Batalkan seluruh seri atau lewati satu kejadiannya, dengan rollup booking_stats-nya
+        
+        Hanya kejadian yang berpindah dari 'disetujui' ke 'dibatalkan' yang mengubah rollup,
+        sehingga pembatalan berulang tidak menghitung dua kali.
+        """
+        row = cursor.execute(
+            "SELECT room_id, status, frequency, every, first_day, last_day FROM room_booking_series WHERE id = ?",
+            (series_id,)
+        ).fetchone()
+        if row is None:
+            return
+        room_id, status, frequency, every, first_day, last_day = row
+        skipped = series_skipped_days(cursor, [series_id]).get(series_id, set())
+        
+        if occurrence_date is None:
+            cursor.execute("UPDATE room_booking_series SET status='dibatalkan' WHERE id=?", (series_id,))
+            window = (first_day, last_day)
+        else:
+            # Pengecualian satu kejadian: satu baris, dicek lewat primary key oleh query ketersediaan
+            day = schema.day_number(occurrence_date)
+            cursor.execute(
+                "INSERT OR IGNORE INTO room_booking_series_exceptions (series_id, day) VALUES (?, ?)",
+                (series_id, day)
+            )
+            window = (day, day)
+        if status != 'disetujui':
+            return
+        
+        cancelled = [
+            day for day in recurrence.occurrence_days(frequency, every, first_day, last_day, *window)
+            if day not in skipped
+        ]
+        add_series_stats(cursor, room_id, [('disetujui', day) for day in cancelled], -1)
+        add_series_stats(cursor, room_id, [('dibatalkan', day) for day in cancelled])
+    
+    def get_all_assets(self):
+        """Ambil semua aset"""
+        return self._catalog_frame('assets')
+    
+    def get_available_assets(self, borrow_date, return_date, asset_type=None):
+        """Cek aset yang tersedia"""
+        if self.availability_backend == "index":
+            return self._get_available_assets_index(borrow_date, return_date, asset_type)
+        return self._get_available_assets_sql(borrow_date, return_date, asset_type)
+    
+    def _get_available_assets_index(self, borrow_date, return_date, asset_type=None):
+        assets = [
+            asset for asset in self._catalog('assets')
+            if asset.condition == 'baik' and (not asset_type or asset.type == asset_type)
+        ]
+        return self.availability.filter_available(
+            'Aset', None, schema.day_number(borrow_date), schema.day_number(return_date), assets
+        )
+    
+    def _get_available_assets_sql(self, borrow_date, return_date, asset_type=None):
+        query, params = available_assets_query(borrow_date, return_date, asset_type)
+        with self.connection() as conn:
+            conn.row_factory = Asset.row_factory
+            return conn.execute(query, params).fetchall()
+    
+    def book_asset(self, user_id, asset_id, borrow_date, return_date, purpose, requester_name=None):
+        """Peminjaman aset secara atomik: cek bentrok + INSERT dalam satu transaksi"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Jika requester_name tidak diberikan, ambil dari tabel users
-            if not requester_name:
-                cursor.execute("SELECT name FROM users WHERE id=?", (user_id,))
-                user_result = cursor.fetchone()
-                requester_name = user_result[0] if user_result else "Tidak Diketahui"
-            
-            cursor.execute("""
-                INSERT INTO asset_bookings (user_id, asset_id, borrow_date, return_date, purpose, requester_name, status)
-                VALUES (?, ?, ?, ?, ?, ?, 'disetujui')
-            """, (user_id, asset_id, borrow_date, return_date, purpose, requester_name))
+            borrow_day, return_day = schema.day_number(borrow_date), schema.day_number(return_date)
+        except (TypeError, ValueError):
+            return BookingResult(BookingResult.INVALID, message="Format tanggal tidak valid")
+        if return_day < borrow_day:
+            return BookingResult(BookingResult.INVALID, message="Tanggal kembali harus lebih dari tanggal pinjam")
+        
+        def work(cursor):
+            cursor.execute(ASSET_CONFLICT_SQL, (asset_id,) + asset_overlap_params(borrow_day, return_day))
+            conflicts = [row[0] for row in cursor.fetchall()]
+            if conflicts:
+                return BookingResult(BookingResult.CONFLICT, conflicts=conflicts,
+                                     message="Aset sudah dipinjam pada periode tersebut")
             
-            conn.commit()
-            conn.close()
-            return True
+            name = self._requester_name(cursor, user_id, requester_name)
+            cursor.execute(ASSET_INSERT_SQL, (user_id, asset_id, borrow_date, return_date, purpose, name, borrow_day, return_day))
+            return BookingResult(BookingResult.OK, booking_id=cursor.lastrowid)
+        
+        try:
+            result = self.run_write_transaction(work)
         except Exception as e:
             print(f"Error adding asset booking: {e}")
-            return False
+            return BookingResult(BookingResult.ERROR, message=str(e))
+        
+        if result:
+            self.availability.add('Aset', result.booking_id, asset_id, None, borrow_day, return_day)
+        return result
+    
+    def add_asset_booking(self, user_id, asset_id, borrow_date, return_date, purpose, requester_name=None):
+        """Tambah booking aset - LANGSUNG DISETUJUI dengan nama pemesan"""
+        return bool(self.book_asset(user_id, asset_id, borrow_date, return_date, purpose, requester_name))
     
     def get_all_vehicles(self):
         """Ambil semua kendaraan"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM vehicles", conn)
-        conn.close()
-        return df
+        return self._catalog_frame('vehicles')
     
     def get_available_vehicles(self, date_str, start_time, end_time, vehicle_type=None):
         """Cek kendaraan yang tersedia berdasarkan tanggal dan jam"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        if self.availability_backend == "index":
+            return self._get_available_vehicles_index(date_str, start_time, end_time, vehicle_type)
+        return self._get_available_vehicles_sql(date_str, start_time, end_time, vehicle_type)
     
-        query = """
-            SELECT v.* FROM vehicles v
-            WHERE v.status = 'tersedia'
-        """
-        params = []
-    
-        if vehicle_type:
-            query += " AND v.type = ?"
-            params.append(vehicle_type)
-    
-        query += """
-            AND v.id NOT IN (
-                SELECT vehicle_id FROM vehicle_bookings
-                WHERE start_date = ? 
-                AND status = 'disetujui'
-                AND (
-                    (start_time <= ? AND end_time > ?) OR
-                    (start_time < ? AND end_time >= ?) OR
-                    (start_time >= ? AND end_time <= ?)
-                )
-            )
-        """
-        params.extend([date_str, end_time, start_time, end_time, start_time, start_time, end_time])
+    def _get_available_vehicles_index(self, date_str, start_time, end_time, vehicle_type=None):
+        vehicles = [
+            vehicle for vehicle in self._catalog('vehicles')
+            if vehicle.status == 'tersedia' and (not vehicle_type or vehicle.type == vehicle_type)
+        ]
+        return self.availability.filter_available(
+            'Kendaraan', schema.day_number(date_str),
+            schema.minute_of_day(start_time), schema.minute_of_day(end_time), vehicles
+        )
     
-        cursor.execute(query, params)
-        vehicles = cursor.fetchall()
-        conn.close()
-        return vehicles
+    def _get_available_vehicles_sql(self, date_str, start_time, end_time, vehicle_type=None):
+        query, params = available_vehicles_query(date_str, start_time, end_time, vehicle_type)
+        with self.connection() as conn:
+            conn.row_factory = Vehicle.row_factory
+            return conn.execute(query, params).fetchall()
     
-    def add_vehicle_booking(self, user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name=None):
-        """Tambah booking kendaraan - LANGSUNG DISETUJUI dengan nama pemesan"""
+    def book_vehicle(self, user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name=None):
+        """Pemesanan kendaraan secara atomik: cek bentrok + INSERT dalam satu transaksi"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Jika requester_name tidak diberikan, ambil dari tabel users
-            if not requester_name:
-                cursor.execute("SELECT name FROM users WHERE id=?", (user_id,))
-                user_result = cursor.fetchone()
-                requester_name = user_result[0] if user_result else "Tidak Diketahui"
-            
-            cursor.execute("""
-                INSERT INTO vehicle_bookings (user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'disetujui')
-            """, (user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name))
+            start_day, end_day = schema.day_number(start_date), schema.day_number(end_date)
+            start_minute, end_minute = schema.minute_of_day(start_time), schema.minute_of_day(end_time)
+        except (TypeError, ValueError):
+            return BookingResult(BookingResult.INVALID, message="Format tanggal/jam tidak valid")
+        if (end_day, end_minute) <= (start_day, start_minute):
+            return BookingResult(BookingResult.INVALID, message="Waktu selesai harus lebih dari waktu mulai")
+        
+        def work(cursor):
+            cursor.execute(VEHICLE_CONFLICT_SQL, (start_day, vehicle_id) + vehicle_overlap_params(start_minute, end_minute))
+            conflicts = [row[0] for row in cursor.fetchall()]
+            if conflicts:
+                return BookingResult(BookingResult.CONFLICT, conflicts=conflicts,
+                                     message="Kendaraan sudah dipesan pada waktu tersebut")
             
-            conn.commit()
-            conn.close()
-            return True
+            name = self._requester_name(cursor, user_id, requester_name)
+            cursor.execute(VEHICLE_INSERT_SQL, (user_id, vehicle_id, start_date, end_date, start_time, end_time,
+                                                destination, purpose, name, start_day, end_day, start_minute, end_minute))
+            return BookingResult(BookingResult.OK, booking_id=cursor.lastrowid)
+        
+        try:
+            result = self.run_write_transaction(work)
         except Exception as e:
             print(f"Error adding vehicle booking: {e}")
-            return False
+            return BookingResult(BookingResult.ERROR, message=str(e))
+        
+        if result:
+            self.availability.add('Kendaraan', result.booking_id, vehicle_id, start_day, start_minute, end_minute)
+        return result
+    
+    def add_vehicle_booking(self, user_id, vehicle_id, start_date, end_date, start_time, end_time, destination, purpose, requester_name=None):
+        """Tambah booking kendaraan - LANGSUNG DISETUJUI dengan nama pemesan"""
+        return bool(self.book_vehicle(user_id, vehicle_id, start_date, end_date, start_time, end_time,
+                                      destination, purpose, requester_name))
+    
+    def add_bookings_bulk(self, requests):
+        """Simpan banyak booking sekaligus dalam satu transaksi -> list BookingResult, urut sesuai requests
+        
+        Setiap permintaan berupa dict: 'type' ('Ruangan'/'Aset'/'Kendaraan'), user_id, kunci yang
+        sama dengan parameter book_* jenisnya (lihat BULK_BOOKING_FIELDS) dan opsional requester_name.
+        Permintaan dicek terhadap booking yang sudah ada dan terhadap permintaan sebelumnya di list
+        yang sama; yang lolos disimpan dengan executemany per jenis. Bila bentrok dengan permintaan
+        lain di list, conflicts berisi ID booking permintaan tersebut.
+        """
+        results = [None] * len(requests)
+        pending = []
+        for index, request in enumerate(requests):
+            try:
+                pending.append((index, request) + prepare_bulk_booking(request))
+            except ValueError as e:
+                results[index] = BookingResult(BookingResult.INVALID, message=str(e))
+        
+        def work(cursor):
+            accepted = {}  # (jenis, resource_id, hari) -> [(mulai, selesai, index permintaan)]
+            rows = {booking_type: [] for booking_type in BOOKING_TABLES}
+            conflicts = {}  # index -> (ID booking lama, index permintaan di list)
+            for index, request, booking_type, resource_id, day, start, end, values, conflict_params in pending:
+                cursor.execute(BOOKING_WRITE_SQL[booking_type][0], conflict_params)
+                existing = [row[0] for row in cursor.fetchall()]
+                predicate = BOOKING_KINDS[booking_type][0]
+                slot = accepted.setdefault((booking_type, resource_id, day), [])
+                in_batch = [other for other_start, other_end, other in slot
+                            if predicate(other_start, other_end, start, end)]
+                if existing or in_batch:
+                    conflicts[index] = (existing, in_batch)
+                    continue
+                
+                slot.append((start, end, index))
+                name = self._requester_name(cursor, request['user_id'], request.get('requester_name'))
+                row = ((request['user_id'],) + tuple(request[field] for field in BULK_BOOKING_FIELDS[booking_type])
+                       + (name,) + values)
+                rows[booking_type].append((index, row))
+            
+            booking_ids = {}
+            for booking_type, entries in rows.items():
+                if not entries:
+                    continue
+                table = BOOKING_TABLES[booking_type]
+                last_id = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                cursor.executemany(BOOKING_WRITE_SQL[booking_type][1], [row for _, row in entries])
+                # AUTOINCREMENT + write lock transaksi ini: ID baru naik sesuai urutan baris
+                cursor.execute(f"SELECT id FROM {table} WHERE id > ? ORDER BY id", (last_id,))
+                booking_ids.update(zip([index for index, _ in entries], [row[0] for row in cursor.fetchall()]))
+            return booking_ids, conflicts
+        
+        try:
+            booking_ids, conflicts = self.run_write_transaction(work)
+        except Exception as e:
+            print(f"Error adding bulk bookings: {e}")
+            for index, *_ in pending:
+                results[index] = BookingResult(BookingResult.ERROR, message=str(e))
+            return results
+        
+        for index, request, booking_type, resource_id, day, start, end, _, _ in pending:
+            if index in booking_ids:
+                results[index] = BookingResult(BookingResult.OK, booking_id=booking_ids[index])
+                self.availability.add(booking_type, booking_ids[index], resource_id, day, start, end)
+            else:
+                existing, in_batch = conflicts[index]
+                results[index] = BookingResult(BookingResult.CONFLICT,
+                                               conflicts=existing + [booking_ids[other] for other in in_batch],
+                                               message=BOOKING_WRITE_SQL[booking_type][2])
+        return results
         
     def get_user_bookings(self, user_id):
         """Ambil semua booking user"""
-        conn = self.get_connection()
-        
-        room_df = pd.read_sql_query("""
-            SELECT rb.*, r.name as item_name, 'Ruangan' as type
-            FROM room_bookings rb
-            JOIN rooms r ON rb.room_id = r.id
-            WHERE rb.user_id = ?
-            ORDER BY rb.created_at DESC
-        """, conn, params=(user_id,))
-        
-        asset_df = pd.read_sql_query("""
-            SELECT ab.*, a.name as item_name, 'Aset' as type
-            FROM asset_bookings ab
-            JOIN assets a ON ab.asset_id = a.id
-            WHERE ab.user_id = ?
-            ORDER BY ab.created_at DESC
-        """, conn, params=(user_id,))
-        
-        vehicle_df = pd.read_sql_query("""
-            SELECT vb.*, v.name as item_name, 'Kendaraan' as type
-            FROM vehicle_bookings vb
-            JOIN vehicles v ON vb.vehicle_id = v.id
-            WHERE vb.user_id = ?
-            ORDER BY vb.created_at DESC
-        """, conn, params=(user_id,))
-        
-        conn.close()
-        return room_df, asset_df, vehicle_df
+        import pandas as pd
+        with self.connection() as conn:
+            df = pd.read_sql_query(USER_BOOKINGS_SQL, conn, params=(user_id,))
+        
+        return split_bookings(df, USER_BOOKING_COLUMNS)
+    
+    def get_user_booking_counts(self, user_id):
+        """Jumlah booking user per jenis dan status dalam satu query
+        
+        Hasil: {'Ruangan': {'total': n, 'disetujui': n, ...}, 'Aset': {...}, 'Kendaraan': {...},
+        'total': {...}} - kunci 'total' berisi gabungan ketiga jenis. Kejadian seri ruangan
+        berulang dihitung sebagai booking ruangan.
+        """
+        with self.connection() as conn:
+            rows = conn.execute(USER_BOOKING_COUNTS_SQL, (user_id,) * len(BOOKING_TABLES)).fetchall()
+            conn.row_factory = sqlite3.Row
+            series = conn.execute(ROOM_SERIES_USER_SQL, (user_id,)).fetchall()
+            skipped = series_skipped_days(conn, [row['id'] for row in series])
+        
+        occurrence_counts = {}
+        for row in series:
+            for occurrence in series_occurrences(row, skipped.get(row['id'], ())):
+                occurrence_counts[occurrence['status']] = occurrence_counts.get(occurrence['status'], 0) + 1
+        rows += [('Ruangan', status, count) for status, count in occurrence_counts.items()]
+        
+        counts = {booking_type: {'total': 0} for booking_type in BOOKING_TABLES}
+        counts['total'] = {'total': 0}
+        for booking_type, status, count in rows:
+            for key in (booking_type, 'total'):
+                counts[key]['total'] += count
+                counts[key][status] = counts[key].get(status, 0) + count
+        return counts
+    
+    def get_user_bookings_page(self, user_id, booking_type, page_size=20, after=None, status=None,
+                               date_from=None, date_to=None):
+        """Satu halaman riwayat booking user untuk satu jenis -> (DataFrame, cursor berikutnya)
+        
+        Kolom sama seperti get_user_bookings. Cursor berikutnya None bila sudah halaman terakhir;
+        berikan ke parameter after untuk mengambil halaman selanjutnya.
+        """
+        import pandas as pd
+        query, params = user_bookings_page_query(user_id, booking_type, page_size, after,
+                                                 status, date_from, date_to)
+        with self.connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        if len(df) <= page_size:
+            return df, None
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        return df, (last['created_at'], int(last['id']))
+    
+    def get_schedule(self, date):
+        """Jadwal semua jenis booking yang berlangsung pada tanggal tertentu - satu query
+        
+        Mengembalikan (room_df, asset_df, vehicle_df) dengan kolom yang sama seperti get_all_bookings
+        """
+        import pandas as pd
+        query, params = bookings_query(date=date, history=True)
+        with self.connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        return split_bookings(self._with_series_occurrences(df, date), ALL_BOOKING_COLUMNS)
+    
+    def _with_series_occurrences(self, df, date):
+        """Tambahkan kejadian seri berulang pada tanggal tsb (tidak tersimpan sebagai baris
+        booking) ke DataFrame view bookings, tetap urut waktu mulai terbaru"""
+        import pandas as pd
+        occurrences = self.get_room_series_occurrences(date)
+        if not occurrences:
+            return df
+        df = pd.concat([df, pd.DataFrame(occurrences, columns=df.columns)], ignore_index=True)
+        return df.sort_values('start_at', ascending=False, kind='stable', ignore_index=True)
+    
+    def get_bookings(self, user_id=None, date=None, booking_type=None, status=None, history=False):
+        """Booking semua jenis dalam satu DataFrame (kolom resource_kind), urut waktu mulai terbaru
+        
+        history=True ikut membaca booking yang sudah diarsipkan (laporan riwayat lengkap).
+        """
+        import pandas as pd
+        query, params = bookings_query(user_id, date, booking_type, status, history)
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
     
     def get_all_bookings(self):
         """Ambil semua booking untuk admin - PERBAIKAN DENGAN requester_name"""
-        conn = self.get_connection()
-        
+        import pandas as pd
         try:
-            # Ruangan - tambah requester_name
-            room_df = pd.read_sql_query("""
-                SELECT 
-                    rb.id,
-                    rb.date,
-                    rb.start_time,
-                    rb.end_time,
-                    r.name as item_name,
-                    u.name as user_name,
-                    rb.requester_name as requester_name,  -- Pastikan ada kolom ini
-                    rb.purpose,
-                    rb.status,
-                    rb.created_at
-                FROM room_bookings rb
-                LEFT JOIN rooms r ON rb.room_id = r.id
-                LEFT JOIN users u ON rb.user_id = u.id
-                ORDER BY rb.date DESC, rb.start_time DESC
-            """, conn)
-            
-            # Aset - tambah requester_name
-            asset_df = pd.read_sql_query("""
-                SELECT 
-                    ab.id,
-                    ab.borrow_date as date,
-                    ab.return_date,
-                    a.name as item_name,
-                    u.name as user_name,
-                    ab.requester_name as requester_name,  -- Pastikan ada kolom ini
-                    ab.purpose,
-                    ab.status,
-                    ab.created_at
-                FROM asset_bookings ab
-                LEFT JOIN assets a ON ab.asset_id = a.id
-                LEFT JOIN users u ON ab.user_id = u.id
-                ORDER BY ab.borrow_date DESC
-            """, conn)
-            
-            # Kendaraan - tambah requester_name
-            vehicle_df = pd.read_sql_query("""
-                SELECT 
-                    vb.id,
-                    vb.start_date as date,
-                    vb.end_date,
-                    vb.start_time,
-                    vb.end_time,
-                    v.name as item_name,
-                    u.name as user_name,
-                    vb.requester_name as requester_name,  -- Pastikan ada kolom ini
-                    vb.destination,
-                    vb.purpose,
-                    vb.status,
-                    vb.created_at
-                FROM vehicle_bookings vb
-                LEFT JOIN vehicles v ON vb.vehicle_id = v.id
-                LEFT JOIN users u ON vb.user_id = u.id
-                ORDER BY vb.start_date DESC, vb.start_time DESC
-            """, conn)
+            with self.connection() as conn:
+                df = pd.read_sql_query(ALL_BOOKINGS_SQL, conn)
+            room_df, asset_df, vehicle_df = split_bookings(df, ALL_BOOKING_COLUMNS)
             
             # Debug print untuk memastikan kolom ada
             print(f"\n=== DEBUG get_all_bookings ===")
@@ -685,105 +1823,198 @@ class Database:
             import traceback
             traceback.print_exc()
             return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-        finally:
-            conn.close()
 
         
     def update_booking_status(self, booking_id, booking_type, status):
         """Update status booking"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if booking_type == 'Ruangan':
-                cursor.execute("UPDATE room_bookings SET status=? WHERE id=?", (status, booking_id))
-            elif booking_type == 'Aset':
-                cursor.execute("UPDATE asset_bookings SET status=? WHERE id=?", (status, booking_id))
-            elif booking_type == 'Kendaraan':
-                cursor.execute("UPDATE vehicle_bookings SET status=? WHERE id=?", (status, booking_id))
+            with self.connection() as conn:
+                table = BOOKING_TABLES.get(booking_type)
+                if table is not None:
+                    conn.execute(f"UPDATE {table} SET status=? WHERE id=?", (status, booking_id))
             
-            conn.commit()
-            conn.close()
+            self.availability.remove(booking_type, booking_id)
+            if status == 'disetujui':
+                # Jarang terjadi (persetujuan ulang oleh admin) - muat ulang dari database
+                self.availability.invalidate(booking_type)
             return True
         except:
             return False
         
-    def cancel_booking(self, booking_id, booking_type):
-        """Batalkan booking berdasarkan ID dan jenis"""
+    def cancel_booking(self, booking_id, booking_type, occurrence_date=None):
+        """Batalkan booking berdasarkan ID dan jenis
+        
+        ID ruangan negatif menunjuk seri berulang (-ID seri): dengan occurrence_date hanya
+        kejadian pada tanggal itu yang dilewati, tanpa occurrence_date seluruh seri dibatalkan.
+        """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            if booking_type == 'Ruangan':
-                cursor.execute("UPDATE room_bookings SET status='dibatalkan' WHERE id=?", (booking_id,))
-            elif booking_type == 'Aset':
-                cursor.execute("UPDATE asset_bookings SET status='dibatalkan' WHERE id=?", (booking_id,))
-            elif booking_type == 'Kendaraan':
-                cursor.execute("UPDATE vehicle_bookings SET status='dibatalkan' WHERE id=?", (booking_id,))
+            with self.connection() as conn:
+                table = BOOKING_TABLES.get(booking_type)
+                if table is None:
+                    return False
+                series = booking_type == 'Ruangan' and booking_id < 0
+                if not series:
+                    conn.execute(f"UPDATE {table} SET status='dibatalkan' WHERE id=?", (booking_id,))
+                else:
+                    self._cancel_room_series(conn.cursor(), -booking_id, occurrence_date)
+            if series:
+                self.availability.invalidate('Ruangan')
             else:
-                return False
-            
-            conn.commit()
-            conn.close()
+                self.availability.remove(booking_type, booking_id)
             return True
         except Exception as e:
             print(f"Error canceling booking: {e}")
             return False
     
     def get_statistics(self):
-        """Ambil statistik untuk dashboard"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """Ambil statistik untuk dashboard - dibaca dari rollup booking_stats (dijaga trigger)"""
         stats = {}
         
-        cursor.execute("SELECT COUNT(*) FROM room_bookings")
-        stats['total_room_bookings'] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM asset_bookings")
-        stats['total_asset_bookings'] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM vehicle_bookings")
-        stats['total_vehicle_bookings'] = cursor.fetchone()[0]
-        
-        # Semua langsung disetujui, jadi tidak ada yang menunggu
-        stats['pending_room'] = 0
-        stats['pending_asset'] = 0
-        stats['pending_vehicle'] = 0
-        
-        cursor.execute("""
-            SELECT r.name, COUNT(*) as count
-            FROM room_bookings rb
-            JOIN rooms r ON rb.room_id = r.id
-            GROUP BY rb.room_id
-            ORDER BY count DESC
-            LIMIT 1
-        """)
-        result = cursor.fetchone()
-        stats['most_booked_room'] = result[0] if result else 'Belum ada'
-        
-        cursor.execute("""
-            SELECT a.name, COUNT(*) as count
-            FROM asset_bookings ab
-            JOIN assets a ON ab.asset_id = a.id
-            GROUP BY ab.asset_id
-            ORDER BY count DESC
-            LIMIT 1
-        """)
-        result = cursor.fetchone()
-        stats['most_booked_asset'] = result[0] if result else 'Belum ada'
-        
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            for key, booking_type in [('total_room_bookings', 'Ruangan'),
+                                      ('total_asset_bookings', 'Aset'),
+                                      ('total_vehicle_bookings', 'Kendaraan')]:
+                cursor.execute(
+                    "SELECT count FROM booking_stats WHERE scope = 'total' AND kind = ? AND key = ''",
+                    (booking_type,)
+                )
+                result = cursor.fetchone()
+                stats[key] = result[0] if result else 0
+            
+            # Semua langsung disetujui, jadi tidak ada yang menunggu
+            stats['pending_room'] = 0
+            stats['pending_asset'] = 0
+            stats['pending_vehicle'] = 0
+            
+            cursor.execute("""
+                SELECT r.name
+                FROM booking_stats s
+                JOIN rooms r ON r.id = s.key
+                WHERE s.scope = 'resource' AND s.kind = 'Ruangan' AND s.count > 0
+                ORDER BY s.count DESC
+                LIMIT 1
+            """)
+            result = cursor.fetchone()
+            stats['most_booked_room'] = result[0] if result else 'Belum ada'
+            
+            cursor.execute("""
+                SELECT a.name
+                FROM booking_stats s
+                JOIN assets a ON a.id = s.key
+                WHERE s.scope = 'resource' AND s.kind = 'Aset' AND s.count > 0
+                ORDER BY s.count DESC
+                LIMIT 1
+            """)
+            result = cursor.fetchone()
+            stats['most_booked_asset'] = result[0] if result else 'Belum ada'
+        
         return stats
     
+    def get_booking_stats(self, scope, booking_type):
+        """Rollup per resource / status / hari untuk satu jenis booking -> {key: jumlah}"""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT key, count FROM booking_stats WHERE scope = ? AND kind = ? AND count > 0",
+                (scope, booking_type)
+            ).fetchall()
+        return dict(rows)
+    
+    def rebuild_statistics(self):
+        """Hitung ulang booking_stats dari tabel booking; kembalikan selisih dengan rollup lama"""
+        def work(cursor):
+            expected = schema.compute_booking_stats(cursor)
+            current = {
+                (scope, kind, key): count
+                for scope, kind, key, count in cursor.execute(
+                    "SELECT scope, kind, key, count FROM booking_stats WHERE count != 0"
+                )
+            }
+            mismatches = {
+                key: (current.get(key, 0), expected.get(key, 0))
+                for key in set(current) | set(expected)
+                if current.get(key, 0) != expected.get(key, 0)
+            }
+            cursor.execute("DELETE FROM booking_stats")
+            cursor.executemany(
+                "INSERT INTO booking_stats (scope, kind, key, count) VALUES (?, ?, ?, ?)",
+                [key + (count,) for key, count in expected.items()]
+            )
+            return {'rows': len(expected), 'mismatches': mismatches}
+        
+        report = self.run_write_transaction(work)
+        if report['mismatches']:
+            print(f"booking_stats dibangun ulang: {len(report['mismatches'])} rollup tidak sesuai")
+        return report
+    
+    def archive_bookings(self, horizon_days=365, batch_size=500, max_batches=None, pause=0.05):
+        """Pindahkan booking lama ke tabel arsip secara bertahap -> {jenis: jumlah dipindahkan}
+        
+        Yang dipindahkan: booking yang selesai lebih dari horizon_days hari lalu, dan booking
+        dibatalkan yang tanggalnya sudah lewat. Tiap batch adalah transaksi pendek sendiri
+        (INSERT ke arsip + DELETE dari tabel live) dengan jeda pause detik, sehingga write lock
+        tidak ditahan lama dan booking baru tetap bisa masuk di sela-selanya. Log booking_changes
+        yang lebih tua dari horizon_days ikut dipangkas.
+        """
+        today = schema.day_number(datetime.now())
+        cutoff = today - horizon_days
+        moved = {booking_type: 0 for booking_type in BOOKING_TABLES}
+        batches = 0
+        
+        for booking_type, table in BOOKING_TABLES.items():
+            archive = schema.ARCHIVE_TABLES[table]
+            
+            def work(cursor):
+                ids = [row[0] for row in cursor.execute(
+                    ARCHIVE_CANDIDATES_SQL[booking_type], (today, cutoff, batch_size)
+                ).fetchall()]
+                if not ids:
+                    return ids
+                columns = ", ".join(schema.ARCHIVED_COLUMNS[table])
+                placeholders = ", ".join('?' * len(ids))
+                # Trigger arsip menambah booking_stats sebanyak yang dikurangi trigger DELETE
+                cursor.execute(f"""
+                    INSERT INTO {archive} ({columns}, archived_at)
+                    SELECT {columns}, CURRENT_TIMESTAMP FROM {table} WHERE id IN ({placeholders})
+                """, ids)
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+                return ids
+            
+            while max_batches is None or batches < max_batches:
+                try:
+                    ids = self.run_write_transaction(work)
+                except Exception as e:
+                    print(f"Error archiving {table}: {e}")
+                    return moved
+                if not ids:
+                    break
+                batches += 1
+                moved[booking_type] += len(ids)
+                for booking_id in ids:
+                    self.availability.remove(booking_type, booking_id)
+                if len(ids) < batch_size:
+                    break
+                time.sleep(pause)
+        
+        try:
+            # File export inkremental yang tertinggal sejauh itu dipadatkan ulang (append_bookings_csv)
+            self.run_write_transaction(lambda cursor: cursor.execute(
+                "DELETE FROM booking_changes WHERE changed_at < datetime('now', ?)", (f"-{horizon_days} days",)
+            ))
+        except Exception as e:
+            print(f"Error pruning booking_changes: {e}")
+        
+        if any(moved.values()):
+            print(f"Arsip booking: {moved} ({batches} batch)")
+        return moved
+    
     def add_room(self, name, capacity):
         """Tambah ruangan baru"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO rooms (name, capacity) VALUES (?, ?)", (name, capacity))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("INSERT INTO rooms (name, capacity) VALUES (?, ?)", (name, capacity))
+            self.invalidate_catalog('rooms')
             return True
         except:
             return False
@@ -791,14 +2022,12 @@ class Database:
     def update_room(self, room_id, name, capacity, status):
         """Update ruangan"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE rooms SET name=?, capacity=?, status=? WHERE id=?",
-                (name, capacity, status, room_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "UPDATE rooms SET name=?, capacity=?, status=? WHERE id=?",
+                    (name, capacity, status, room_id)
+                )
+            self.invalidate_catalog('rooms')
             return True
         except:
             return False
@@ -806,11 +2035,9 @@ class Database:
     def delete_room(self, room_id):
         """Hapus ruangan"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM rooms WHERE id=?", (room_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("DELETE FROM rooms WHERE id=?", (room_id,))
+            self.invalidate_catalog('rooms')
             return True
         except:
             return False
@@ -818,11 +2045,9 @@ class Database:
     def add_asset(self, name, asset_type):
         """Tambah aset baru"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO assets (name, type) VALUES (?, ?)", (name, asset_type))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("INSERT INTO assets (name, type) VALUES (?, ?)", (name, asset_type))
+            self.invalidate_catalog('assets')
             return True
         except:
             return False
@@ -830,14 +2055,12 @@ class Database:
     def update_asset(self, asset_id, name, asset_type, status, condition):
         """Update aset"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE assets SET name=?, type=?, status=?, condition=? WHERE id=?",
-                (name, asset_type, status, condition, asset_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "UPDATE assets SET name=?, type=?, status=?, condition=? WHERE id=?",
+                    (name, asset_type, status, condition, asset_id)
+                )
+            self.invalidate_catalog('assets')
             return True
         except:
             return False
@@ -845,11 +2068,9 @@ class Database:
     def delete_asset(self, asset_id):
         """Hapus aset"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM assets WHERE id=?", (asset_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("DELETE FROM assets WHERE id=?", (asset_id,))
+            self.invalidate_catalog('assets')
             return True
         except:
             return False
@@ -857,14 +2078,12 @@ class Database:
     def add_vehicle(self, name, vehicle_type, plate_number):
         """Tambah kendaraan baru"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO vehicles (name, type, plate_number) VALUES (?, ?, ?)",
-                (name, vehicle_type, plate_number)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT INTO vehicles (name, type, plate_number) VALUES (?, ?, ?)",
+                    (name, vehicle_type, plate_number)
+                )
+            self.invalidate_catalog('vehicles')
             return True
         except:
             return False
@@ -872,14 +2091,12 @@ class Database:
     def update_vehicle(self, vehicle_id, name, vehicle_type, plate_number, status):
         """Update kendaraan"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE vehicles SET name=?, type=?, plate_number=?, status=? WHERE id=?",
-                (name, vehicle_type, plate_number, status, vehicle_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute(
+                    "UPDATE vehicles SET name=?, type=?, plate_number=?, status=? WHERE id=?",
+                    (name, vehicle_type, plate_number, status, vehicle_id)
+                )
+            self.invalidate_catalog('vehicles')
             return True
         except:
             return False
@@ -887,149 +2104,201 @@ class Database:
     def delete_vehicle(self, vehicle_id):
         """Hapus kendaraan"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM vehicles WHERE id=?", (vehicle_id,))
-            conn.commit()
-            conn.close()
+            with self.connection() as conn:
+                conn.execute("DELETE FROM vehicles WHERE id=?", (vehicle_id,))
+            self.invalidate_catalog('vehicles')
             return True
         except:
             return False
     
-    def export_bookings_to_csv(self, csv_path="booking.csv"):
-        """Export semua data booking ke file CSV - DIPERBAIKI"""
+    def export_bookings_to_csv(self, csv_path="booking.csv", chunk_size=None, file_format='csv', compression=None):
+        """Export semua data booking ke file CSV (streaming, lihat stream_bookings_csv)
+        
+        file_format 'parquet' / 'arrow' menulis file kolumnar bertipe lewat pyarrow dengan
+        kompresi compression (lihat columnar.FORMATS). chunk_size None = default per format.
+        """
         try:
-            # Ambil semua data booking
-            room_df, asset_df, vehicle_df = self.get_all_bookings()
-            
-            # Buat list untuk menampung semua data
-            all_bookings = []
-            
-            # Proses data ruangan
-            for _, row in room_df.iterrows():
-                all_bookings.append({
-                    'Jenis': 'Ruangan',
-                    'Tanggal': row.get('date', ''),
-                    'Jam Mulai': row.get('start_time', ''),
-                    'Jam Selesai': row.get('end_time', ''),
-                    'Item': row.get('item_name', ''),
-                    'Pemesan': row.get('user_name', ''),
-                    'Keperluan': row.get('purpose', ''),
-                    'Status': row.get('status', ''),
-                    'Waktu Booking': row.get('created_at', '')
-                })
-            
-            # Proses data aset
-            for _, row in asset_df.iterrows():
-                all_bookings.append({
-                    'Jenis': 'Aset',
-                    'Tanggal Pinjam': row.get('date', ''),
-                    'Tanggal Kembali': row.get('return_date', ''),
-                    'Item': row.get('item_name', ''),
-                    'Pemesan': row.get('user_name', ''),
-                    'Keperluan': row.get('purpose', ''),
-                    'Status': row.get('status', ''),
-                    'Waktu Booking': row.get('created_at', '')
-                })
-            
-            # Proses data kendaraan
-            for _, row in vehicle_df.iterrows():
-                all_bookings.append({
-                    'Jenis': 'Kendaraan',
-                    'Tanggal Mulai': row.get('date', ''),
-                    'Tanggal Kembali': row.get('end_date', ''),
-                    'Jam Mulai': row.get('start_time', ''),
-                    'Jam Selesai': row.get('end_time', ''),
-                    'Item': row.get('item_name', ''),
-                    'Pemesan': row.get('user_name', ''),
-                    'Tujuan': row.get('destination', ''),
-                    'Keperluan': row.get('purpose', ''),
-                    'Status': row.get('status', ''),
-                    'Waktu Booking': row.get('created_at', '')
-                })
-            
-            # Buat DataFrame
-            if all_bookings:
-                export_df = pd.DataFrame(all_bookings)
-                # Urutkan berdasarkan waktu booking
-                if 'Waktu Booking' in export_df.columns:
-                    export_df = export_df.sort_values('Waktu Booking', ascending=False)
-                
-                # Simpan ke CSV
-                export_df.to_csv(csv_path, index=False, encoding='utf-8')
-                print(f"Data berhasil diexport ke {csv_path} ({len(export_df)} records)")
-                return True
-            else:
+            with self.connection() as conn:
+                # Satu transaksi baca: ketiga cursor melihat snapshot yang sama
+                conn.execute("BEGIN")
+                if file_format == 'csv':
+                    count = stream_bookings_csv(conn, csv_path, chunk_size or 1000)
+                else:
+                    count = stream_bookings_columnar(conn, csv_path, file_format, compression, chunk_size or 16384)
+            if not count:
                 print("Tidak ada data untuk diexport")
                 return False
-                
+            print(f"Data berhasil diexport ke {csv_path} ({count} records)")
+            return True
         except Exception as e:
             print(f"Error exporting to CSV: {e}")
             import traceback
             traceback.print_exc()
             return False
-
-    def export_daily_bookings(self, date_str, csv_path="booking_harian.csv"):
-        """Export booking harian ke CSV - DIPERBAIKI"""
+    
+    def compact_bookings_csv(self, csv_path="booking.csv"):
+        """Tulis ulang file export inkremental menjadi export lengkap (isi sama dengan export_bookings_to_csv)
+        
+        High-water mark log booking_changes dan data booking dibaca dalam satu transaksi baca,
+        sehingga perubahan sesudahnya pasti ditambahkan oleh append_bookings_csv berikutnya -
+        tidak hilang dan tidak tercatat dua kali. Sesudahnya log sampai high-water mark dipangkas;
+        database tanpa booking menghasilkan file berisi header saja.
+        """
+        tmp_path = f"{csv_path}.tmp"
+        try:
+            with self.connection() as conn:
+                conn.execute("BEGIN")
+                high_water = conn.execute(CHANGES_HIGH_WATER_SQL).fetchone()[0]
+                stream_bookings_csv(conn, tmp_path, write_empty=True)
+            with open(tmp_path, newline='', encoding='utf-8') as f:
+                columns = next(csv.reader(f))
+            os.replace(tmp_path, csv_path)
+            self._save_export_state(csv_path, {'high_water': high_water, 'columns': columns, 'appended': 0})
+        except Exception as e:
+            print(f"Error compacting {csv_path}: {e}")
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
         try:
-            # Ambil semua data
-            room_df, asset_df, vehicle_df = self.get_all_bookings()
+            # File lain yang high-water mark-nya lebih lama dipadatkan ulang (lihat append_bookings_csv)
+            self.run_write_transaction(
+                lambda cursor: cursor.execute("DELETE FROM booking_changes WHERE seq <= ?", (high_water,))
+            )
+        except Exception as e:
+            print(f"Error pruning booking_changes: {e}")
+        return True
+    
+    def append_bookings_csv(self, csv_path="booking.csv", compact_after=1000):
+        """Perbarui file export secara inkremental dari log booking_changes
+        
+        Booking baru ditambahkan sebagai baris di akhir file, perubahan status (pembatalan)
+        sebagai baris delta dengan status barunya. Pembaca file mengelompokkan baris per
+        (Jenis, ID) dan memakai baris terakhir, seperti latest_export_rows - setelah compaction
+        tiap kunci tinggal satu baris. File dipadatkan ulang (compact_bookings_csv) bila belum
+        punya state, log yang dibutuhkannya sudah dipangkas oleh compaction file lain, ada
+        perubahan seri berulang, kolomnya tidak cukup untuk baris baru (termasuk file lama tanpa
+        kolom ID), atau sudah ada compact_after baris tambahan.
+        """
+        state = self._load_export_state(csv_path)
+        if state is None or not os.path.exists(csv_path):
+            return self.compact_bookings_csv(csv_path)
+        
+        try:
+            with self.connection() as conn:
+                # Satu transaksi baca: pemangkasan log tidak bisa menyela di antara kedua query
+                conn.execute("BEGIN")
+                # Sebagian perubahan sesudah high-water mark file ini sudah dipangkas: tulis ulang file
+                pruned = conn.execute(CHANGES_PRUNED_SQL).fetchone()[0] > state['high_water']
+                conn.row_factory = sqlite3.Row
+                changes = [] if pruned else conn.execute(
+                    "SELECT seq, kind, booking_id, status FROM booking_changes WHERE seq > ? ORDER BY seq",
+                    (state['high_water'],)
+                ).fetchall()
+                if not changes and not pruned:
+                    return True
+                # Perubahan seri (ID negatif) menyentuh banyak kejadian sekaligus: tulis ulang file
+                series_changed = any(change['booking_id'] < 0 for change in changes)
+                
+                rows = {}
+                for booking_type in BOOKING_TABLES:
+                    ids = sorted({change['booking_id'] for change in changes if change['kind'] == booking_type})
+                    for offset in range(0, len(ids), 500):
+                        chunk = ids[offset:offset + 500]
+                        for row in conn.execute(
+                            f"SELECT * FROM bookings_history WHERE resource_kind = ? AND id IN ({', '.join('?' * len(chunk))})",
+                            (booking_type,) + tuple(chunk)
+                        ):
+                            rows[(booking_type, row['id'])] = row
+            if pruned or series_changed:
+                return self.compact_bookings_csv(csv_path)
             
-            # Filter untuk tanggal tertentu
-            daily_bookings = []
+            export_rows = []
+            for change in changes:
+                row = rows.get((change['kind'], change['booking_id']))
+                if row is None:
+                    continue  # sudah dihapus - hilang saat compaction berikutnya
+                legacy = {ALL_BOOKING_COLUMNS[change['kind']].get(key, key): row[key] for key in row.keys()}
+                legacy['status'] = change['status']
+                export_rows.append(booking_export_row(change['kind'], legacy))
             
-            # Filter ruangan untuk tanggal tertentu
-            if not room_df.empty and 'date' in room_df.columns:
-                daily_rooms = room_df[room_df['date'] == date_str]
-                for _, row in daily_rooms.iterrows():
-                    daily_bookings.append({
-                        'Jenis': 'Ruangan',
-                        'Item': row.get('item_name', ''),
-                        'Pemesan': row.get('user_name', ''),
-                        'Waktu': f"{row.get('start_time', '')} - {row.get('end_time', '')}",
-                        'Tanggal': row.get('date', ''),
-                        'Keperluan': row.get('purpose', ''),
-                        'Status': row.get('status', '')
-                    })
+            columns = state['columns']
+            appended = state['appended'] + len(export_rows)
+            if appended > compact_after or any(key not in columns for row in export_rows for key in row):
+                return self.compact_bookings_csv(csv_path)
             
-            # Filter aset untuk tanggal tertentu
-            if not asset_df.empty and 'date' in asset_df.columns and 'return_date' in asset_df.columns:
-                daily_assets = asset_df[
-                    (asset_df['date'] <= date_str) & 
-                    (asset_df['return_date'] >= date_str)
-                ]
-                for _, row in daily_assets.iterrows():
-                    daily_bookings.append({
-                        'Jenis': 'Aset',
-                        'Item': row.get('item_name', ''),
-                        'Pemesan': row.get('user_name', ''),
-                        'Waktu': f"{row.get('date', '')} s/d {row.get('return_date', '')}",
-                        'Tanggal': row.get('date', ''),
-                        'Keperluan': row.get('purpose', ''),
-                        'Status': row.get('status', '')
-                    })
+            with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator=os.linesep)
+                writer.writerows([[row.get(column, '') for column in columns] for row in export_rows])
+            self._save_export_state(csv_path, {
+                'high_water': changes[-1]['seq'], 'columns': columns, 'appended': appended
+            })
+            return True
+        except Exception as e:
+            print(f"Error appending to {csv_path}: {e}")
+            return False
+    
+    @staticmethod
+    def _export_state_path(csv_path):
+        return f"{csv_path}.state.json"
+    
+    def _load_export_state(self, csv_path):
+        try:
+            with open(self._export_state_path(csv_path), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_export_state(self, csv_path, state):
+        # Tulis ke file sementara lalu rename: state tidak pernah setengah jadi
+        path = self._export_state_path(csv_path)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
+
+    def request_export(self, csv_path="booking.csv", incremental=True):
+        """Jadwalkan export booking ke CSV di thread latar (digabung bila banyak booking beruntun)
+        
+        incremental=True menambah baris baru ke file (append_bookings_csv), False menulis ulang
+        seluruh file (export_bookings_to_csv).
+        """
+        get_export_worker(self, csv_path, incremental).notify()
+    
+    def get_export_stats(self, csv_path="booking.csv", incremental=True):
+        """Metrik export latar (antrean, latensi export terakhir) untuk halaman admin"""
+        return get_export_worker(self, csv_path, incremental).snapshot()
+    
+    def export_daily_bookings(self, date_str, csv_path="booking_harian.csv", file_format='csv', compression=None):
+        """Export booking harian ke CSV - DIPERBAIKI
+        
+        file_format 'parquet' / 'arrow': file kolumnar bertipe (skema columnar.schema), bukan
+        kolom teks gabungan seperti CSV harian.
+        """
+        from viewmodel import daily_export_frame
+        try:
+            if file_format != 'csv':
+                with self.connection() as conn:
+                    rows = conn.execute(*columnar_daily_query(date_str)).fetchall()
+                occurrences = self.get_room_series_occurrences(date_str)
+                if occurrences:
+                    # Urutan sama dengan columnar_daily_query: ruangan dulu, lalu waktu mulai terbaru
+                    rows += [series_columnar_row(occurrence) for occurrence in occurrences]
+                    kinds = list(BOOKING_TABLES)
+                    rows.sort(key=lambda row: (kinds.index(row[0]), -(row[3] * 1440 + (row[5] or 0))))
+                if not rows:
+                    print(f"Tidak ada data untuk tanggal {date_str}")
+                    return False
+                columnar.write(csv_path, [rows], file_format, compression)
+                print(f"Data harian berhasil diexport ke {csv_path} ({len(rows)} records)")
+                return True
             
-            # Filter kendaraan untuk tanggal tertentu
-            if not vehicle_df.empty and 'date' in vehicle_df.columns and 'end_date' in vehicle_df.columns:
-                daily_vehicles = vehicle_df[
-                    (vehicle_df['date'] <= date_str) & 
-                    (vehicle_df['end_date'] >= date_str)
-                ]
-                for _, row in daily_vehicles.iterrows():
-                    daily_bookings.append({
-                        'Jenis': 'Kendaraan',
-                        'Item': row.get('item_name', ''),
-                        'Pemesan': row.get('user_name', ''),
-                        'Waktu': f"{row.get('date', '')} s/d {row.get('end_date', '')}",
-                        'Jam': f"{row.get('start_time', '')} - {row.get('end_time', '')}",
-                        'Tanggal': row.get('date', ''),
-                        'Tujuan': row.get('destination', ''),
-                        'Keperluan': row.get('purpose', ''),
-                        'Status': row.get('status', '')
-                    })
+            # Satu query ke view bookings_history, hanya booking yang berlangsung pada tanggal tsb,
+            # ditambah kejadian seri berulang pada tanggal itu
+            df = self._with_series_occurrences(self.get_bookings(date=date_str, history=True), date_str)
+            df_daily = daily_export_frame(df)
             
-            if daily_bookings:
-                df_daily = pd.DataFrame(daily_bookings)
+            if not df_daily.empty:
                 df_daily.to_csv(csv_path, index=False, encoding='utf-8')
                 print(f"Data harian berhasil diexport ke {csv_path} ({len(df_daily)} records)")
                 return True
@@ -0,0 +1,157 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+
+_STOP = object()
+
+
+class ExportWorker:
+    """Export file CSV di thread latar (write-behind) setelah booking berubah
+
+    notify() hanya memasukkan event ke antrean. Thread daemon menunggu sampai tidak ada
+    event baru selama `debounce` detik (paling lama `max_delay` sejak event pertama), lalu
+    menjalankan satu export untuk seluruh event yang terkumpul. File ditulis ke file
+    sementara di folder yang sama lalu di-rename, sehingga pembaca tidak pernah melihat
+    file setengah jadi. Error export dicatat di metrik dan tidak sampai ke pemanggil.
+    """
+
+    def __init__(self, export, csv_path, debounce=1.0, max_delay=10.0, atomic=True):
+        self.export = export  # callable(path) -> bool, mis. Database.export_bookings_to_csv
+        self.csv_path = csv_path
+        # False: export mengelola file tujuannya sendiri (mis. append inkremental)
+        self.atomic = atomic
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0  # event yang belum tercakup export selesai
+        self._thread = None
+        self.stats = {
+            'events': 0,
+            'exports': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'last_export_ms': None,
+            'last_export_at': None,
+            'last_error': None,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="simaru-export", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Catat bahwa data booking berubah; export berjalan di latar setelah debounce"""
+        with self._lock:
+            self.stats['events'] += 1
+            self._pending += 1
+            self._ensure_thread()
+        self._queue.put(time.monotonic())
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = 1, False
+            deadline = min(time.monotonic() + self.debounce, first + self.max_delay)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch += 1
+                deadline = min(time.monotonic() + self.debounce, first + self.max_delay)
+
+            self._export_once(batch)
+            if stop:
+                return
+
+    def _export_once(self, batch):
+        directory = os.path.dirname(os.path.abspath(self.csv_path))
+        tmp_path = None
+        start = time.perf_counter()
+        try:
+            if not self.atomic:
+                ok = self.export(self.csv_path)
+            else:
+                fd, tmp_path = tempfile.mkstemp(prefix=".export-", suffix=".csv", dir=directory)
+                os.close(fd)
+                ok = self.export(tmp_path)
+                if ok:
+                    os.replace(tmp_path, self.csv_path)
+            if ok:
+                with self._lock:
+                    self.stats['exports'] += 1
+                    self.stats['coalesced'] += batch - 1
+                    self.stats['last_export_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                    self.stats['last_export_at'] = time.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                # Method export Database menangkap error-nya sendiri dan mengembalikan False
+                self._failed("export mengembalikan False (lihat log)")
+        except Exception as e:
+            print(f"Error background export {self.csv_path}: {e}")
+            self._failed(str(e))
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._pending -= batch
+                self._idle.notify_all()
+
+    def _failed(self, message):
+        with self._lock:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = message
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua event yang sudah masuk selesai diexport; True bila sempat"""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout=None):
+        """Selesaikan event yang tersisa lalu hentikan thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def snapshot(self):
+        """Metrik untuk halaman admin: kedalaman antrean dan latensi export terakhir"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = self._pending
+        stats['queue_depth'] = self._queue.qsize()
+        return stats
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def get_export_worker(db, csv_path="booking.csv", incremental=False):
+    """Satu worker per (pool database, file tujuan, mode) untuk seluruh proses
+
+    incremental=True memakai db.append_bookings_csv (menambah baris ke file yang ada),
+    selain itu db.export_bookings_to_csv menulis ulang file secara atomik.
+    """
+    key = (db.pool, os.path.abspath(csv_path), incremental)
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is None:
+            if incremental:
+                worker = ExportWorker(db.append_bookings_csv, csv_path, atomic=False)
+            else:
+                worker = ExportWorker(db.export_bookings_to_csv, csv_path)
+            _workers[key] = worker
+        return worker
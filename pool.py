@@ -0,0 +1,231 @@
+import sqlite3
+import threading
+import time
+import os
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Tidak ada koneksi bebas di pool sampai batas waktu tunggu habis"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """Koneksi SQLite milik pool - close() mengembalikan koneksi ke pool, bukan menutupnya"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._checked_out = False
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            super().close()
+
+    def _close_real(self):
+        sqlite3.Connection.close(self)
+
+
+class ConnectionPool:
+    """Pool koneksi SQLite terbatas yang dipakai bersama oleh semua thread Streamlit"""
+
+    def __init__(self, db_name, max_size=8, timeout=30.0, ping_after=30.0, busy_timeout=5.0, journal_mode="WAL"):
+        self.db_name = db_name
+        # Setiap koneksi ':memory:' adalah database terpisah, jadi hanya boleh satu
+        self.max_size = 1 if db_name == ":memory:" else max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.busy_timeout = busy_timeout
+        # WAL: pembaca tidak memblokir penulis (dan sebaliknya) antar sesi
+        self.journal_mode = journal_mode
+
+        self._cond = threading.Condition()
+        self._idle = []  # LIFO: koneksi yang terakhir dipakai punya cache paling hangat
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'opened': 0,
+            'closed': 0,
+            'health_failures': 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        conn._pool = self
+        if self.journal_mode and self.db_name != ":memory:":
+            try:
+                conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            except sqlite3.OperationalError:
+                # Mode sudah diatur koneksi lain / database sedang dikunci
+                pass
+        return conn
+
+    def _is_healthy(self, conn):
+        """Health check ringan hanya untuk koneksi yang lama menganggur"""
+        if time.monotonic() - conn._last_used < self.ping_after:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._open -= 1
+            self._stats['closed'] += 1
+            self._cond.notify()
+        try:
+            conn._close_real()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self):
+        """Pinjam koneksi dari pool, tunggu bila semua koneksi sedang dipakai"""
+        wait_start = None
+        conn = None
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout(f"Pool untuk {self.db_name} sudah ditutup")
+            self._stats['checkouts'] += 1
+            while True:
+                # Peminjam baru antre di belakang yang sudah menunggu (adil/FIFO)
+                if wait_start is not None or not self._waiting:
+                    if self._idle:
+                        conn = self._idle.pop()
+                        break
+                    if self._open < self.max_size:
+                        self._open += 1
+                        self._stats['opened'] += 1
+                        break
+                if wait_start is None:
+                    wait_start = time.monotonic()
+                    self._stats['waits'] += 1
+                remaining = self.timeout - (time.monotonic() - wait_start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._stats['wait_time'] += time.monotonic() - wait_start
+                    raise PoolTimeout(
+                        f"Tidak ada koneksi bebas ke {self.db_name} setelah {self.timeout} detik"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            if wait_start is not None:
+                self._stats['wait_time'] += time.monotonic() - wait_start
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                # Koneksi basi ditutup dan langsung diganti koneksi baru (jumlah terbuka tetap)
+                with self._cond:
+                    self._stats['health_failures'] += 1
+                    self._stats['closed'] += 1
+                    self._stats['opened'] += 1
+                try:
+                    conn._close_real()
+                except sqlite3.Error:
+                    pass
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn):
+        """Kembalikan koneksi ke pool; transaksi yang belum di-commit dibatalkan"""
+        if not conn._checked_out:
+            return
+        conn._checked_out = False
+
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                conn._last_used = time.monotonic()
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+
+        self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager: pinjam koneksi, commit bila sukses / rollback bila error, lalu kembalikan"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Metrik pool untuk halaman admin"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._in_use
+            stats['max_size'] = self.max_size
+        stats['avg_wait_ms'] = round(stats['wait_time'] / stats['waits'] * 1000, 2) if stats['waits'] else 0.0
+        return stats
+
+    def close_all(self):
+        """Tutup semua koneksi menganggur dan tolak peminjaman baru"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._stats['closed'] += len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn._close_real()
+            except sqlite3.Error:
+                pass
+
+
+# Satu pool per file database untuk seluruh proses
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name, **kwargs):
+    """Ambil (atau buat) pool bersama untuk file database tertentu"""
+    key = db_name if db_name == ":memory:" else os.path.abspath(db_name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_name, **kwargs)
+            _pools[key] = pool
+        return pool
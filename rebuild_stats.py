@@ -0,0 +1,31 @@
+"""Bangun ulang rollup booking_stats dari tabel booking dan laporkan selisihnya.
+
+Keluar dengan kode 1 bila rollup lama tidak sesuai dengan hasil hitung ulang.
+
+Pemakaian:
+    python rebuild_stats.py              # database.db
+    python rebuild_stats.py database.db
+"""
+import argparse
+import sys
+from db import Database
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_name", nargs="?", default="database.db", help="file database (default: database.db)")
+    args = parser.parse_args(argv[1:])
+    db = Database(args.db_name)
+    report = db.rebuild_statistics()
+
+    for (scope, kind, key), (old, new) in sorted(report['mismatches'].items(), key=str):
+        print(f"{kind} {scope} {key!r}: {old} -> {new}")
+    if report['mismatches']:
+        print(f"GAGAL - {len(report['mismatches'])} rollup tidak sesuai (sudah diperbaiki)")
+        return 1
+    print(f"OK - {report['rows']} rollup sesuai")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,96 @@
+"""Record ringan (__slots__) untuk tabel katalog: ruangan, aset, kendaraan dan user.
+
+Dipakai cache katalog dan hasil cek ketersediaan. Booking dan riwayat tetap DataFrame karena
+setiap pemanggilnya menampilkannya sebagai tabel.
+"""
+
+
+class Record:
+    """Baris hasil query yang ringan: atribut tetap lewat __slots__, tanpa DataFrame/dict per baris.
+
+    Kolom query harus berurutan sama dengan __slots__ (pakai columns() untuk SELECT-nya),
+    lalu pasang row_factory pada cursor/koneksi:
+
+        conn.row_factory = Room.row_factory
+        rooms = conn.execute(f"SELECT {Room.columns()} FROM rooms").fetchall()
+
+    Subkelas menulis __init__ dengan argumen posisi urut __slots__: dipanggil sekali per baris
+    hasil query, jadi jauh lebih cepat daripada loop setattr.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        return cls(*row)
+
+    @classmethod
+    def columns(cls, alias=None):
+        """Daftar kolom untuk SELECT, urut sesuai __slots__"""
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + field for field in cls.__slots__)
+
+    def astuple(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def asdict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __lt__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.astuple() < other.astuple()
+
+    def __hash__(self):
+        return hash((type(self).__name__,) + self.astuple())
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class Room(Record):
+    __slots__ = ('id', 'name', 'capacity', 'status')
+
+    def __init__(self, id, name, capacity, status):
+        self.id = id
+        self.name = name
+        self.capacity = capacity
+        self.status = status
+
+
+class Asset(Record):
+    __slots__ = ('id', 'name', 'type', 'status', 'condition')
+
+    def __init__(self, id, name, type, status, condition):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.status = status
+        self.condition = condition
+
+
+class Vehicle(Record):
+    __slots__ = ('id', 'name', 'type', 'plate_number', 'status')
+
+    def __init__(self, id, name, type, plate_number, status):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.plate_number = plate_number
+        self.status = status
+
+
+class User(Record):
+    __slots__ = ('id', 'username', 'password', 'name', 'role')
+
+    def __init__(self, id, username, password, name, role):
+        self.id = id
+        self.username = username
+        self.password = password
+        self.name = name
+        self.role = role
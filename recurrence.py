@@ -0,0 +1,141 @@
+"""Aturan booking ruangan berulang (tabel room_booking_series).
+
+Kejadian seri tidak pernah disimpan per tanggal: occurrence_days menghitungnya untuk jendela
+yang sedang dibaca (jadwal, riwayat, export, pengecekan bentrok), dan SERIES_ON_DAY_SQL menguji
+satu hari di dalam query SQL (ketersediaan ruangan, indeks ketersediaan). Keduanya HARUS identik.
+
+Kejadian yang dilewati (room_booking_series_exceptions) dan seluruh kejadian seri yang
+dibatalkan dibaca sebagai booking berstatus 'dibatalkan', sama seperti booking biasa.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+import schema
+
+FREQUENCIES = ('harian', 'mingguan', 'bulanan')
+
+# Batas kejadian per seri agar satu seri tidak menjangkau puluhan tahun
+MAX_OCCURRENCES = 1000
+
+# Batas `every` (sama dengan input di halaman booking) dan rentang satu seri (~10 tahun)
+MAX_EVERY = 12
+MAX_SPAN_DAYS = 3653
+
+# Hari / bulan terakhir yang masih bisa diwakili date (9999-12-31)
+LAST_DAY = schema.day_number(date.max)
+
+# Predikat "seri s punya kejadian pada hari q.day" - butuh join (SELECT ? AS day) q.
+# Bulanan: tanggal yang sama tiap `every` bulan; bulan tanpa tanggal tersebut dilewati.
+SERIES_ON_DAY_SQL = """
+    s.status = 'disetujui' AND s.first_day <= q.day AND s.last_day >= q.day
+    AND CASE s.frequency
+        WHEN 'harian' THEN (q.day - s.first_day) % s.every = 0
+        WHEN 'mingguan' THEN (q.day - s.first_day) % (7 * s.every) = 0
+        ELSE CAST(strftime('%d', q.day * 86400, 'unixepoch') AS INTEGER) = s.month_day
+            AND (CAST(strftime('%Y', q.day * 86400, 'unixepoch') AS INTEGER) * 12
+                 + CAST(strftime('%m', q.day * 86400, 'unixepoch') AS INTEGER) - 1
+                 - s.first_month) % s.every = 0
+    END
+    AND NOT EXISTS (
+        SELECT 1 FROM room_booking_series_exceptions e WHERE e.series_id = s.id AND e.day = q.day
+    )
+"""
+
+
+def month_index(value):
+    """Nomor bulan berurutan (tahun * 12 + bulan - 1), sama seperti kolom first_month"""
+    return value.year * 12 + value.month - 1
+
+
+LAST_MONTH = month_index(date.max)
+
+
+def _monthly_day(month, month_day):
+    """Hari kejadian bulanan pada bulan tertentu, atau None bila tanggalnya tidak ada"""
+    year, month = divmod(month, 12)
+    try:
+        return schema.day_number(date(year, month + 1, month_day))
+    except ValueError:
+        return None
+
+
+def occurrence_days(frequency, every, first_day, last_day, window_start, window_end):
+    """Hari kejadian seri di dalam [window_start, window_end] (inklusif), belum dikurangi pengecualian"""
+    start, end = max(first_day, window_start), min(last_day, window_end)
+    if start > end:
+        return []
+
+    if frequency != 'bulanan':
+        step = every * (7 if frequency == 'mingguan' else 1)
+        # Lompat langsung ke kejadian pertama di jendela, tanpa mengiterasi dari awal seri
+        first = start + (first_day - start) % step
+        return list(range(first, end + 1, step))
+
+    first_date = schema.date_of_day(first_day)
+    base = month_index(first_date)
+    skipped = month_index(schema.date_of_day(start)) - base
+    month = base + -(-skipped // every) * every
+    days = []
+    while month <= LAST_MONTH:
+        day = _monthly_day(month, first_date.day)
+        if day is not None:
+            if day > end:
+                break
+            if day >= start:
+                days.append(day)
+        elif _monthly_day(month, 1) > end:
+            break
+        month += every
+    return days
+
+
+def last_occurrence_day(frequency, every, first_day, count):
+    """Hari kejadian ke-count (seri berbasis jumlah kejadian), atau None bila melewati 9999-12-31"""
+    if frequency != 'bulanan':
+        day = first_day + (count - 1) * every * (7 if frequency == 'mingguan' else 1)
+        return day if day <= LAST_DAY else None
+    first_date = schema.date_of_day(first_day)
+    month = month_index(first_date)
+    while month <= LAST_MONTH:
+        day = _monthly_day(month, first_date.day)
+        if day is not None:
+            count -= 1
+            if count == 0:
+                return day
+        month += every
+    return None
+
+
+def occurrence_status(series_status, day, skipped):
+    """Status satu kejadian: 'dibatalkan' bila dilewati, selain itu status serinya"""
+    return 'dibatalkan' if day in skipped else series_status
+
+
+def occurrence_stats(room_id, occurrences):
+    """Rollup booking_stats untuk kejadian seri [(status, hari)] -> {(scope, 'Ruangan', key): jumlah}
+
+    Bentuknya sama dengan rollup trigger booking biasa (lihat schema._stats_scopes); dipakai
+    saat seri dibuat / dibatalkan dan saat rollup dihitung ulang.
+    """
+    stats = Counter()
+    for status, day in occurrences:
+        stats[('total', 'Ruangan', '')] += 1
+        stats[('resource', 'Ruangan', '' if room_id is None else room_id)] += 1
+        stats[('status', 'Ruangan', status or '')] += 1
+        stats[('day', 'Ruangan', day)] += 1
+    return stats
+
+
+def series_stats(cursor):
+    """Rollup booking_stats seluruh kejadian seri (untuk schema.compute_booking_stats)"""
+    skipped = defaultdict(set)
+    for series_id, day in cursor.execute("SELECT series_id, day FROM room_booking_series_exceptions"):
+        skipped[series_id].add(day)
+    stats = Counter()
+    for series_id, room_id, status, frequency, every, first_day, last_day in cursor.execute(
+        "SELECT id, room_id, status, frequency, every, first_day, last_day FROM room_booking_series"
+    ).fetchall():
+        days = occurrence_days(frequency, every, first_day, last_day, first_day, last_day)
+        stats.update(occurrence_stats(
+            room_id, [(occurrence_status(status, day, skipped[series_id]), day) for day in days]
+        ))
+    return stats
@@ -0,0 +1,831 @@
+import threading
+from datetime import date, datetime, time
+
+
+def create_base_tables(cursor):
+    """Tabel-tabel dasar aplikasi"""
+    # Tabel Users - DITAMBAHKAN UNIQUE constraint
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            name TEXT NOT NULL,
+            role TEXT DEFAULT 'user'
+        )
+    ''')
+
+    # Tabel Ruangan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            capacity INTEGER,
+            status TEXT DEFAULT 'tersedia'
+        )
+    ''')
+
+    # Tabel Aset Elektronik
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT DEFAULT 'tersedia',
+            condition TEXT DEFAULT 'baik'
+        )
+    ''')
+
+    # Tabel Kendaraan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            plate_number TEXT,
+            status TEXT DEFAULT 'tersedia'
+        )
+    ''')
+
+    # Tabel Booking Ruangan - LANGSUNG DISETUJUI
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            room_id INTEGER,
+            date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (room_id) REFERENCES rooms (id)
+        )
+    ''')
+
+    # Tabel Booking Aset - LANGSUNG DISETUJUI
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS asset_bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            asset_id INTEGER,
+            borrow_date TEXT NOT NULL,
+            return_date TEXT NOT NULL,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (asset_id) REFERENCES assets (id)
+        )
+    ''')
+
+    # Tabel Booking Kendaraan - LANGSUNG DISETUJUI
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vehicle_bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            vehicle_id INTEGER,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            destination TEXT,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (vehicle_id) REFERENCES vehicles (id)
+        )
+    ''')
+
+
+def seed_initial_data(cursor):
+    """Data awal ruangan, aset, dan kendaraan - hanya diisi bila tabel masih kosong"""
+    # Cek apakah sudah ada data ruangan
+    cursor.execute("SELECT COUNT(*) FROM rooms")
+    if cursor.fetchone()[0] == 0:
+        rooms = [
+            ('Ruang Rapat', 10),
+            ('Ruang Konsul 1', 7),
+            ('Ruang Konsul 2', 8),
+            ('Ruang Konsul 3', 9),
+            ('Studio', 10),
+            ('Aula', 20),
+        ]
+        cursor.executemany("INSERT INTO rooms (name, capacity) VALUES (?, ?)", rooms)
+
+    # Cek apakah sudah ada data aset
+    cursor.execute("SELECT COUNT(*) FROM assets")
+    if cursor.fetchone()[0] == 0:
+        assets = [
+            ('Laptop Dell Latitude 1', 'Laptop'),
+            ('Laptop Dell Latitude 2', 'Laptop'),
+            ('Laptop HP ProBook 1', 'Laptop'),
+            ('Laptop HP ProBook 2', 'Laptop'),
+            ('Laptop Lenovo ThinkPad 1', 'Laptop'),
+            ('Laptop Lenovo ThinkPad 2', 'Laptop'),
+        ]
+        cursor.executemany("INSERT INTO assets (name, type) VALUES (?, ?)", assets)
+
+    # Cek apakah sudah ada data kendaraan
+    cursor.execute("SELECT COUNT(*) FROM vehicles")
+    if cursor.fetchone()[0] == 0:
+        vehicles = [
+            ('Toyota Avanza 1', 'Mobil', 'L 1234 AB'),
+            ('Toyota Avanza 2', 'Mobil', 'L 5678 CD'),
+            ('Honda Mobilio', 'Mobil', 'L 9012 EF'),
+            ("Toyota Innova Reborn", "Mobil", "L 3456 GH"),
+            ("Suzuki Ertiga", "Mobil", "L 3344 MN")
+        ]
+        cursor.executemany("INSERT INTO vehicles (name, type, plate_number) VALUES (?, ?, ?)", vehicles)
+
+
+def create_sync_state_table(cursor):
+    """Sidik jari file sumber (mis. users.csv) yang terakhir disinkronkan"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            mtime REAL,
+            size INTEGER,
+            sha256 TEXT,
+            synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+# Index untuk query utama di db.py (lihat hot_queries / check_query_plans)
+BOOKING_INDEXES = [
+    # Cek ketersediaan: filter tanggal + status, kolom jam ikut di index (covering)
+    ("idx_room_bookings_availability",
+     "room_bookings (date, status, room_id, start_time, end_time)"),
+    ("idx_asset_bookings_availability",
+     "asset_bookings (status, borrow_date, return_date, asset_id)"),
+    ("idx_vehicle_bookings_availability",
+     "vehicle_bookings (start_date, status, vehicle_id, start_time, end_time)"),
+    # Riwayat user: filter user_id, urut created_at
+    ("idx_room_bookings_user", "room_bookings (user_id, created_at)"),
+    ("idx_asset_bookings_user", "asset_bookings (user_id, created_at)"),
+    ("idx_vehicle_bookings_user", "vehicle_bookings (user_id, created_at)"),
+    # Daftar semua booking: urut tanggal/jam tanpa temp b-tree
+    ("idx_room_bookings_schedule", "room_bookings (date, start_time)"),
+    ("idx_asset_bookings_schedule", "asset_bookings (borrow_date)"),
+    ("idx_vehicle_bookings_schedule", "vehicle_bookings (start_date, start_time)"),
+]
+
+
+def create_booking_indexes(cursor):
+    """Index komposit/covering untuk tabel booking"""
+    for name, definition in BOOKING_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def day_number(value):
+    """Tanggal ('YYYY-MM-DD', date, datetime) -> jumlah hari sejak 1970-01-01"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value).strip()[:10])
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def date_of_day(day):
+    """Kebalikan day_number: jumlah hari sejak 1970-01-01 -> date"""
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def minute_of_day(value):
+    """Jam ('HH:MM', 'HH:MM:SS', time) -> menit sejak 00:00; detik diabaikan"""
+    if isinstance(value, (time, datetime)):
+        return value.hour * 60 + value.minute
+    hour, minute = str(value).strip().split(':')[:2]
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Jam tidak valid: {value!r}")
+    return hour * 60 + minute
+
+
+# Kolom integer turunan kolom teks tanggal/jam: tabel -> [(kolom integer, kolom teks, konversi)]
+INTEGER_TIME_COLUMNS = {
+    'room_bookings': [
+        ('day', 'date', day_number),
+        ('start_minute', 'start_time', minute_of_day),
+        ('end_minute', 'end_time', minute_of_day),
+    ],
+    'asset_bookings': [
+        ('borrow_day', 'borrow_date', day_number),
+        ('return_day', 'return_date', day_number),
+    ],
+    'vehicle_bookings': [
+        ('start_day', 'start_date', day_number),
+        ('end_day', 'end_date', day_number),
+        ('start_minute', 'start_time', minute_of_day),
+        ('end_minute', 'end_time', minute_of_day),
+    ],
+}
+
+# Index ketersediaan & jadwal versi kolom integer (menggantikan versi teks dari migrasi 4)
+INTEGER_TIME_INDEXES = [
+    ("idx_room_bookings_availability",
+     "room_bookings (day, status, room_id, start_minute, end_minute)"),
+    # return_day di depan: booking yang sudah lewat langsung terlewati oleh range scan
+    ("idx_asset_bookings_availability",
+     "asset_bookings (status, return_day, borrow_day, asset_id)"),
+    ("idx_vehicle_bookings_availability",
+     "vehicle_bookings (start_day, status, vehicle_id, start_minute, end_minute)"),
+    ("idx_room_bookings_schedule", "room_bookings (day, start_minute)"),
+    ("idx_asset_bookings_schedule", "asset_bookings (borrow_day)"),
+    ("idx_vehicle_bookings_schedule", "vehicle_bookings (start_day, start_minute)"),
+]
+
+
+def add_integer_time_columns(cursor):
+    """Kolom hari/menit integer untuk tabel booking, diisi dari kolom teks yang sudah ada"""
+    for table, columns in INTEGER_TIME_COLUMNS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        for column, _, _ in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+
+        text_columns = ", ".join(source for _, source, _ in columns)
+        updates = []
+        failed = 0
+        for row in cursor.execute(f"SELECT id, {text_columns} FROM {table}").fetchall():
+            values = []
+            for (_, _, convert), raw in zip(columns, row[1:]):
+                try:
+                    values.append(convert(raw))
+                except (TypeError, ValueError):
+                    # Dibiarkan NULL: baris ini tidak akan pernah dianggap bentrok
+                    values.append(None)
+                    failed += 1
+            updates.append(tuple(values) + (row[0],))
+
+        assignments = ", ".join(f"{column} = ?" for column, _, _ in columns)
+        cursor.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", updates)
+        if failed:
+            print(f"Peringatan: {failed} nilai tanggal/jam di {table} tidak bisa dikonversi")
+
+    for name, definition in INTEGER_TIME_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        cursor.execute(f"CREATE INDEX {name} ON {definition}")
+
+
+# Semua booking dalam satu bentuk: satu baris per booking dengan resource_kind,
+# kolom hari (start_day/end_day, inklusif) dan rentang menit epoch [start_at, end_at)
+# Isi view gabungan; nama tabel diisi agar bisa dipakai ulang untuk tabel arsip
+BOOKINGS_SELECT = """
+    SELECT
+        'Ruangan' AS resource_kind, rb.id, rb.user_id, rb.room_id AS resource_id,
+        r.name AS item_name, u.name AS user_name,
+        rb.date AS start_date, rb.date AS end_date, rb.start_time, rb.end_time,
+        rb.day AS start_day, rb.day AS end_day,
+        rb.day * 1440 + rb.start_minute AS start_at, rb.day * 1440 + rb.end_minute AS end_at,
+        NULL AS destination, rb.purpose, rb.requester_name, rb.status, rb.created_at
+    FROM {room_bookings} rb
+    LEFT JOIN rooms r ON rb.room_id = r.id
+    LEFT JOIN users u ON rb.user_id = u.id
+    UNION ALL
+    SELECT
+        'Aset', ab.id, ab.user_id, ab.asset_id,
+        a.name, u.name,
+        ab.borrow_date, ab.return_date, NULL, NULL,
+        ab.borrow_day, ab.return_day,
+        ab.borrow_day * 1440, (ab.return_day + 1) * 1440,
+        NULL, ab.purpose, ab.requester_name, ab.status, ab.created_at
+    FROM {asset_bookings} ab
+    LEFT JOIN assets a ON ab.asset_id = a.id
+    LEFT JOIN users u ON ab.user_id = u.id
+    UNION ALL
+    SELECT
+        'Kendaraan', vb.id, vb.user_id, vb.vehicle_id,
+        v.name, u.name,
+        vb.start_date, vb.end_date, vb.start_time, vb.end_time,
+        vb.start_day, vb.end_day,
+        vb.start_day * 1440 + vb.start_minute, vb.end_day * 1440 + vb.end_minute,
+        vb.destination, vb.purpose, vb.requester_name, vb.status, vb.created_at
+    FROM {vehicle_bookings} vb
+    LEFT JOIN vehicles v ON vb.vehicle_id = v.id
+    LEFT JOIN users u ON vb.user_id = u.id
+"""
+
+BOOKINGS_VIEW = "CREATE VIEW IF NOT EXISTS bookings AS" + BOOKINGS_SELECT.format(
+    room_bookings='room_bookings', asset_bookings='asset_bookings', vehicle_bookings='vehicle_bookings'
+)
+
+# Booking yang masih berjalan pada suatu hari (end_day >= hari): tanpa index ini
+# filter start_day <= hari harus menelusuri seluruh riwayat
+ACTIVE_BOOKING_INDEXES = [
+    ("idx_asset_bookings_active", "asset_bookings (return_day, borrow_day)"),
+    ("idx_vehicle_bookings_active", "vehicle_bookings (end_day, start_day)"),
+]
+
+
+def create_bookings_view(cursor):
+    """View gabungan 'bookings' untuk ketiga tabel booking"""
+    cursor.execute(BOOKINGS_VIEW)
+    for name, definition in ACTIVE_BOOKING_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+# Rollup statistik booking, dijaga trigger. scope: 'total' (key ''), 'resource' (id resource),
+# 'status' (status booking), 'day' (nomor hari mulai). NULL disimpan sebagai ''.
+# jenis booking -> (tabel, kolom resource, kolom hari mulai)
+BOOKING_STATS_SOURCES = {
+    'Ruangan': ('room_bookings', 'room_id', 'day'),
+    'Aset': ('asset_bookings', 'asset_id', 'borrow_day'),
+    'Kendaraan': ('vehicle_bookings', 'vehicle_id', 'start_day'),
+}
+
+
+def _stats_scopes(resource_column, day_column):
+    return [('total', None), ('resource', resource_column), ('status', 'status'), ('day', day_column)]
+
+
+def _stats_delta(kind, row, resource_column, day_column, delta):
+    """Statement trigger untuk menambah delta ke semua rollup baris NEW/OLD"""
+    statements = []
+    for scope, column in _stats_scopes(resource_column, day_column):
+        key = "''" if column is None else f"COALESCE({row}.{column}, '')"
+        statements.append(
+            f"INSERT INTO booking_stats (scope, kind, key, count) VALUES ('{scope}', '{kind}', {key}, {delta}) "
+            f"ON CONFLICT (scope, kind, key) DO UPDATE SET count = count + {delta};"
+        )
+    return "\n            ".join(statements)
+
+
+def compute_booking_stats(cursor):
+    """Hitung ulang seluruh rollup dari tabel booking (+ arsipnya dan kejadian seri) -> {(scope, jenis, key): jumlah}"""
+    stats = {}
+    optional = tuple(ARCHIVE_TABLES.values()) + ('room_booking_series',)
+    existing = {
+        row[0] for row in cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(optional))})",
+            optional
+        )
+    }
+    for kind, (table, resource_column, day_column) in BOOKING_STATS_SOURCES.items():
+        source = table
+        if ARCHIVE_TABLES[table] in existing:
+            # Rollup mencakup seluruh riwayat, termasuk booking yang sudah diarsipkan
+            columns = f"{resource_column}, status, {day_column}"
+            source = f"(SELECT {columns} FROM {table} UNION ALL SELECT {columns} FROM {ARCHIVE_TABLES[table]})"
+        for scope, column in _stats_scopes(resource_column, day_column):
+            key = "''" if column is None else f"COALESCE({column}, '')"
+            rows = cursor.execute(f"SELECT {key}, COUNT(*) FROM {source} GROUP BY 1").fetchall()
+            if scope == 'total' and not rows:
+                rows = [('', 0)]
+            for value, count in rows:
+                stats[(scope, kind, value)] = count
+    if 'room_booking_series' in existing:
+        # Kejadian seri tidak tersimpan per baris (tanpa trigger): dihitung dari aturannya.
+        # Impor di sini karena recurrence mengimpor schema.
+        import recurrence
+        for key, count in recurrence.series_stats(cursor).items():
+            stats[key] = stats.get(key, 0) + count
+    return stats
+
+
+def refresh_booking_stats(cursor):
+    """Isi ulang booking_stats dari compute_booking_stats"""
+    cursor.execute("DELETE FROM booking_stats")
+    cursor.executemany(
+        "INSERT INTO booking_stats (scope, kind, key, count) VALUES (?, ?, ?, ?)",
+        [key + (count,) for key, count in compute_booking_stats(cursor).items()]
+    )
+
+
+def create_booking_stats(cursor):
+    """Tabel booking_stats + trigger INSERT/UPDATE/DELETE, diisi dari data yang sudah ada"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS booking_stats (
+            scope TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, kind, key)
+        ) WITHOUT ROWID
+    ''')
+
+    for kind, (table, resource_column, day_column) in BOOKING_STATS_SOURCES.items():
+        old = _stats_delta(kind, 'OLD', resource_column, day_column, -1)
+        new = _stats_delta(kind, 'NEW', resource_column, day_column, 1)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_insert AFTER INSERT ON {table}
+            BEGIN
+            {new}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_update
+            AFTER UPDATE OF {resource_column}, status, {day_column} ON {table}
+            BEGIN
+            {old}
+            {new}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_delete AFTER DELETE ON {table}
+            BEGIN
+            {old}
+            END
+        """)
+
+    refresh_booking_stats(cursor)
+
+
+# Jumlah booking per user & status (dashboard beranda) langsung dari index
+USER_STATUS_INDEXES = [
+    ("idx_room_bookings_user_status", "room_bookings (user_id, status)"),
+    ("idx_asset_bookings_user_status", "asset_bookings (user_id, status)"),
+    ("idx_vehicle_bookings_user_status", "vehicle_bookings (user_id, status)"),
+]
+
+
+def create_user_status_indexes(cursor):
+    """Index covering (user_id, status) untuk hitungan booking per user"""
+    for name, definition in USER_STATUS_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def create_booking_series(cursor):
+    """Tabel seri booking ruangan berulang + pengecualian per kejadian (lihat recurrence.py)
+
+    Satu baris per seri; kejadiannya tidak disimpan tetapi dihitung saat jendela tanggal
+    tertentu dibaca. first_day/last_day (hari sejak 1970-01-01) selalu terisi - untuk seri
+    berbasis jumlah, last_day adalah hari kejadian terakhir.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_booking_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            room_id INTEGER,
+            start_date TEXT,
+            until_date TEXT,
+            occurrence_count INTEGER,
+            frequency TEXT CHECK(frequency IN ('harian', 'mingguan', 'bulanan')),
+            every INTEGER DEFAULT 1,
+            start_time TEXT,
+            end_time TEXT,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            first_day INTEGER,
+            last_day INTEGER,
+            month_day INTEGER,
+            first_month INTEGER,
+            start_minute INTEGER,
+            end_minute INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (room_id) REFERENCES rooms (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_booking_series_exceptions (
+            series_id INTEGER,
+            day INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (series_id, day)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_room_series_room ON room_booking_series (room_id, status, last_day)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_room_series_window ON room_booking_series (status, last_day, first_day)"
+    )
+
+
+# Arsip booking lama / dibatalkan (lihat Database.archive_bookings): tabel live -> arsip
+ARCHIVE_TABLES = {
+    'room_bookings': 'room_bookings_archive',
+    'asset_bookings': 'asset_bookings_archive',
+    'vehicle_bookings': 'vehicle_bookings_archive',
+}
+
+# Filter tanggal pada bookings_history (jadwal / export harian tanggal lampau)
+ARCHIVE_DAY_COLUMNS = {
+    'room_bookings_archive': 'day',
+    'asset_bookings_archive': 'return_day, borrow_day',
+    'vehicle_bookings_archive': 'end_day, start_day',
+}
+
+BOOKINGS_HISTORY_VIEW = (
+    "CREATE VIEW IF NOT EXISTS bookings_history AS SELECT * FROM bookings UNION ALL"
+    + BOOKINGS_SELECT.format(
+        room_bookings='room_bookings_archive', asset_bookings='asset_bookings_archive',
+        vehicle_bookings='vehicle_bookings_archive'
+    )
+)
+
+
+def create_archive_tables(cursor):
+    """Tabel arsip berkolom sama dengan tabel live (+ archived_at) dan view bookings_history
+
+    Trigger INSERT/DELETE pada arsip mengimbangi trigger DELETE tabel live, sehingga
+    booking_stats tetap menghitung seluruh riwayat saat baris dipindahkan.
+    """
+    for kind, (table, resource_column, day_column) in BOOKING_STATS_SOURCES.items():
+        archive = ARCHIVE_TABLES[table]
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} AS SELECT * FROM {table} WHERE 0")
+        cursor.execute(f"ALTER TABLE {archive} ADD COLUMN archived_at TIMESTAMP")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{archive}_id ON {archive} (id)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{archive}_user ON {archive} (user_id, created_at)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{archive}_day ON {archive} ({ARCHIVE_DAY_COLUMNS[archive]})")
+        _create_archive_stats_triggers(cursor, kind, archive, resource_column, day_column)
+    cursor.execute(BOOKINGS_HISTORY_VIEW)
+
+
+def _create_archive_stats_triggers(cursor, kind, archive, resource_column, day_column):
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{archive}_stats_insert AFTER INSERT ON {archive}
+        BEGIN
+        {_stats_delta(kind, 'NEW', resource_column, day_column, 1)}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{archive}_stats_delete AFTER DELETE ON {archive}
+        BEGIN
+        {_stats_delta(kind, 'OLD', resource_column, day_column, -1)}
+        END
+    """)
+
+
+# Log perubahan booking (baris baru + perubahan status) untuk export CSV inkremental:
+# seq adalah high-water mark yang disimpan per file export (lihat Database.append_bookings_csv)
+def create_booking_changes(cursor):
+    """Tabel booking_changes + trigger INSERT / UPDATE status pada ketiga tabel booking"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS booking_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            booking_id INTEGER NOT NULL,
+            status TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for kind, (table, _, _) in BOOKING_STATS_SOURCES.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_insert AFTER INSERT ON {table}
+            BEGIN
+            INSERT INTO booking_changes (kind, booking_id, status) VALUES ('{kind}', NEW.id, NEW.status);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_status AFTER UPDATE OF status ON {table}
+            WHEN OLD.status IS NOT NEW.status
+            BEGIN
+            INSERT INTO booking_changes (kind, booking_id, status) VALUES ('{kind}', NEW.id, NEW.status);
+            END
+        """)
+
+
+# Export streaming membaca tiap tabel booking urut created_at menurun (lihat db.EXPORT_BOOKINGS_SQL)
+EXPORT_ORDER_INDEXES = [
+    ("idx_room_bookings_created", "room_bookings (created_at)"),
+    ("idx_asset_bookings_created", "asset_bookings (created_at)"),
+    ("idx_vehicle_bookings_created", "vehicle_bookings (created_at)"),
+]
+
+
+def create_export_indexes(cursor):
+    """Index created_at agar export lengkap bisa di-stream tanpa mengurutkan seluruh riwayat"""
+    for name, definition in EXPORT_ORDER_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def create_archive_export_indexes(cursor):
+    """Index created_at tabel arsip: export lengkap juga men-stream booking yang sudah diarsipkan"""
+    for archive in ARCHIVE_TABLES.values():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{archive}_created ON {archive} (created_at)")
+
+
+def include_series_occurrences(cursor):
+    """Kejadian seri berulang ikut di booking_stats, log booking_changes dan export
+
+    Seri dicatat di booking_changes sebagai booking ruangan ber-ID negatif (-ID seri) - satu
+    entri per seri baru, pembatalan seri, atau kejadian yang dilewati. Rollup seri dijaga
+    Database (kejadian tidak tersimpan per baris), di sini hanya dihitung ulang sekali.
+    """
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_room_booking_series_changes_insert AFTER INSERT ON room_booking_series
+        BEGIN
+        INSERT INTO booking_changes (kind, booking_id, status) VALUES ('Ruangan', -NEW.id, NEW.status);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_room_booking_series_changes_status
+        AFTER UPDATE OF status ON room_booking_series
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+        INSERT INTO booking_changes (kind, booking_id, status) VALUES ('Ruangan', -NEW.id, NEW.status);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_room_booking_series_exceptions_changes
+        AFTER INSERT ON room_booking_series_exceptions
+        BEGIN
+        INSERT INTO booking_changes (kind, booking_id, status) VALUES ('Ruangan', -NEW.series_id, 'dibatalkan');
+        END
+    """)
+    # Riwayat per user dan export (urut created_at), jadwal semua status (rentang hari)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_room_series_user ON room_booking_series (user_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_room_series_created ON room_booking_series (created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_room_series_days ON room_booking_series (last_day, first_day)")
+    refresh_booking_stats(cursor)
+
+
+# Kolom yang dipindahkan ke arsip, urutan sama di tabel live dan arsip (lihat
+# Database.archive_bookings). Kolom baru di tabel booking ikut diarsipkan hanya bila migrasinya
+# juga menambahkannya ke tabel arsip dan ke daftar ini.
+ARCHIVED_COLUMNS = {
+    'room_bookings': (
+        'id', 'user_id', 'room_id', 'date', 'start_time', 'end_time', 'purpose', 'requester_name',
+        'status', 'created_at', 'day', 'start_minute', 'end_minute',
+    ),
+    'asset_bookings': (
+        'id', 'user_id', 'asset_id', 'borrow_date', 'return_date', 'purpose', 'requester_name',
+        'status', 'created_at', 'borrow_day', 'return_day',
+    ),
+    'vehicle_bookings': (
+        'id', 'user_id', 'vehicle_id', 'start_date', 'end_date', 'start_time', 'end_time',
+        'destination', 'purpose', 'requester_name', 'status', 'created_at',
+        'start_day', 'end_day', 'start_minute', 'end_minute',
+    ),
+}
+
+# Definisi tabel arsip: tipe dan constraint sama dengan tabel live, id tetap ID booking aslinya
+ARCHIVE_TABLE_SQL = {
+    'room_bookings_archive': '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            room_id INTEGER,
+            date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            day INTEGER,
+            start_minute INTEGER,
+            end_minute INTEGER,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'asset_bookings_archive': '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            asset_id INTEGER,
+            borrow_date TEXT NOT NULL,
+            return_date TEXT NOT NULL,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            borrow_day INTEGER,
+            return_day INTEGER,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'vehicle_bookings_archive': '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            vehicle_id INTEGER,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            destination TEXT,
+            purpose TEXT,
+            requester_name TEXT,
+            status TEXT DEFAULT 'disetujui',
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            start_day INTEGER,
+            end_day INTEGER,
+            start_minute INTEGER,
+            end_minute INTEGER,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+}
+
+
+def rebuild_archive_tables(cursor):
+    """Bangun ulang tabel arsip dengan definisi eksplisit (ARCHIVE_TABLE_SQL)
+
+    Migrasi 10 membuat arsip dengan CREATE TABLE ... AS SELECT, yang menghilangkan primary key,
+    NOT NULL dan tipe kolom. Isi arsip disalin apa adanya; trigger statistik tidak berjalan
+    selama penyalinan sehingga booking_stats tidak berubah.
+    """
+    # View yang menunjuk tabel arsip harus dilepas dulu agar tabel bisa di-rename
+    cursor.execute("DROP VIEW IF EXISTS bookings_history")
+    for kind, (table, resource_column, day_column) in BOOKING_STATS_SOURCES.items():
+        archive = ARCHIVE_TABLES[table]
+        columns = ", ".join(ARCHIVED_COLUMNS[table])
+        cursor.execute(ARCHIVE_TABLE_SQL[archive].format(name=f"{archive}_new"))
+        cursor.execute(f"""
+            INSERT INTO {archive}_new ({columns}, archived_at)
+            SELECT {columns}, COALESCE(archived_at, CURRENT_TIMESTAMP) FROM {archive}
+        """)
+        # Index dan trigger ikut terhapus bersama tabel lama
+        cursor.execute(f"DROP TABLE {archive}")
+        cursor.execute(f"ALTER TABLE {archive}_new RENAME TO {archive}")
+        cursor.execute(f"CREATE INDEX idx_{archive}_user ON {archive} (user_id, created_at)")
+        cursor.execute(f"CREATE INDEX idx_{archive}_day ON {archive} ({ARCHIVE_DAY_COLUMNS[archive]})")
+        cursor.execute(f"CREATE INDEX idx_{archive}_created ON {archive} (created_at)")
+        _create_archive_stats_triggers(cursor, kind, archive, resource_column, day_column)
+    cursor.execute(BOOKINGS_HISTORY_VIEW)
+
+
+# Langkah migrasi berurutan: (versi, keterangan, fungsi(cursor)).
+# Tambahkan langkah baru di akhir daftar - jangan mengubah langkah yang sudah dirilis.
+MIGRATIONS = [
+    (1, "tabel dasar", create_base_tables),
+    (2, "data awal ruangan, aset, kendaraan", seed_initial_data),
+    (3, "tabel sync_state untuk sinkronisasi users.csv", create_sync_state_table),
+    (4, "index komposit tabel booking", create_booking_indexes),
+    (5, "kolom hari/menit integer untuk tabel booking", add_integer_time_columns),
+    (6, "view gabungan bookings", create_bookings_view),
+    (7, "rollup statistik booking_stats", create_booking_stats),
+    (8, "index user + status untuk hitungan beranda", create_user_status_indexes),
+    (9, "seri booking ruangan berulang", create_booking_series),
+    (10, "tabel arsip booking + view bookings_history", create_archive_tables),
+    (11, "log perubahan booking untuk export inkremental", create_booking_changes),
+    (12, "index created_at untuk export streaming", create_export_indexes),
+    (13, "index created_at tabel arsip untuk export lengkap", create_archive_export_indexes),
+    (14, "kejadian seri berulang di statistik, log perubahan dan export", include_series_occurrences),
+    (15, "tabel arsip dengan primary key, constraint dan tipe kolom eksplisit", rebuild_archive_tables),
+]
+
+
+def get_schema_version(conn):
+    """Versi skema yang sudah terpasang (0 bila belum pernah dimigrasi)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn):
+    """Jalankan langkah migrasi yang belum terpasang, satu transaksi per langkah"""
+    applied = []
+    current = get_schema_version(conn)
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        # BEGIN IMMEDIATE: proses lain yang bermigrasi bersamaan harus menunggu
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+            if (row[0] or 0) >= version:
+                conn.rollback()
+                continue
+            step(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"Migrasi skema {version} diterapkan: {description}")
+    return applied
+
+
+# Penanda proses: database yang sudah di-bootstrap tidak disentuh lagi saat rerun
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def ensure_initialized(pool, on_first_init=None):
+    """Migrasi skema (dan on_first_init) sekali per proses untuk tiap pool database"""
+    if pool in _initialized:
+        return False
+    with _init_lock:
+        if pool in _initialized:
+            return False
+        with pool.connection() as conn:
+            migrate(conn)
+        if on_first_init is not None:
+            on_first_init()
+        _initialized.add(pool)
+        return True
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Database baru di direktori sementara (tanpa users.csv) dengan satu user biasa"""
+    monkeypatch.chdir(tmp_path)
+    database = Database(str(tmp_path / "test.db"))
+    database.add_user("pegawai", "rahasia", "Pegawai Uji")
+    return database
+
+
+@pytest.fixture
+def user_id(db):
+    with db.connection() as conn:
+        return conn.execute("SELECT id FROM users WHERE username = 'pegawai'").fetchone()[0]
+
+
+def catalog_ids(db, table):
+    with db.connection() as conn:
+        return [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+
+@pytest.fixture
+def room_ids(db):
+    return catalog_ids(db, "rooms")
+
+
+@pytest.fixture
+def asset_ids(db):
+    return catalog_ids(db, "assets")
+
+
+@pytest.fixture
+def vehicle_ids(db):
+    return catalog_ids(db, "vehicles")
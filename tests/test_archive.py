@@ -0,0 +1,67 @@
+"""Tabel arsip: definisi eksplisit, isi utuh saat dibaca lewat bookings_history"""
+import schema
+
+
+def history(db, kind):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT * FROM bookings_history WHERE resource_kind = ? ORDER BY id", (kind,)
+        ).fetchall()
+
+
+def book_old(db, user_id, room_ids, asset_ids, vehicle_ids):
+    for day in range(1, 4):
+        assert db.book_room(user_id, room_ids[0], f"2020-01-{day:02d}", "08:00", "09:30", "Rapat lama",
+                            requester_name="Seksi Umum")
+    assert db.book_asset(user_id, asset_ids[0], "2020-02-01", "2020-02-03", "Pinjam laptop")
+    assert db.book_vehicle(user_id, vehicle_ids[0], "2020-03-01", "2020-03-01", "07:00", "15:00",
+                           "Kanwil", "Dinas luar")
+    assert db.book_room(user_id, room_ids[0], "2099-01-01", "08:00", "09:00", "Rapat baru")
+
+
+def test_archived_rows_read_back_unchanged(db, user_id, room_ids, asset_ids, vehicle_ids):
+    book_old(db, user_id, room_ids, asset_ids, vehicle_ids)
+    before = {kind: history(db, kind) for kind in ('Ruangan', 'Aset', 'Kendaraan')}
+    stats = db.get_statistics()
+
+    moved = db.archive_bookings(horizon_days=0, pause=0)
+    assert moved == {'Ruangan': 3, 'Aset': 1, 'Kendaraan': 1}
+    assert {kind: history(db, kind) for kind in before} == before
+    assert db.get_statistics() == stats
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM room_bookings").fetchone() == (1,)
+        assert conn.execute(
+            "SELECT COUNT(*) FROM room_bookings_archive WHERE archived_at IS NULL"
+        ).fetchone() == (0,)
+
+
+def test_archive_tables_declare_keys_and_types(db):
+    with db.connection() as conn:
+        for table, archive in schema.ARCHIVE_TABLES.items():
+            info = {row[1]: row for row in conn.execute(f"PRAGMA table_info({archive})")}
+            assert tuple(info)[:-1] == schema.ARCHIVED_COLUMNS[table]
+            assert info['id'][2] == 'INTEGER' and info['id'][5] == 1
+            assert info['created_at'][2] == 'TEXT'
+            live = {row[1]: row for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column in schema.ARCHIVED_COLUMNS[table]:
+                # Tipe dan NOT NULL sama dengan tabel live
+                assert info[column][2:4] == live[column][2:4], (archive, column)
+
+
+def test_rebuild_keeps_archived_rows_and_statistics(db, user_id, room_ids, asset_ids, vehicle_ids):
+    book_old(db, user_id, room_ids, asset_ids, vehicle_ids)
+    db.archive_bookings(horizon_days=0, pause=0)
+    before = {kind: history(db, kind) for kind in ('Ruangan', 'Aset', 'Kendaraan')}
+
+    with db.connection() as conn:
+        schema.rebuild_archive_tables(conn.cursor())
+    assert {kind: history(db, kind) for kind in before} == before
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+
+def test_new_live_column_does_not_break_archiving(db, user_id, room_ids):
+    with db.connection() as conn:
+        conn.execute("ALTER TABLE room_bookings ADD COLUMN catatan TEXT")
+    assert db.book_room(user_id, room_ids[0], "2020-01-01", "08:00", "09:00", "Rapat lama")
+    assert db.archive_bookings(horizon_days=0, pause=0)['Ruangan'] == 1
+    assert len(history(db, 'Ruangan')) == 1
@@ -0,0 +1,86 @@
+"""Indeks ketersediaan di memori harus memberi hasil yang sama dengan query SQL"""
+import random
+
+import pytest
+
+from db import Database
+
+DAYS = [f"2099-05-{day:02d}" for day in range(4, 11)]
+
+
+def clock(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def random_slot(rng):
+    start = rng.randrange(7 * 60, 17 * 60, 15)
+    return clock(start), clock(start + rng.choice((15, 30, 60, 90, 180)))
+
+
+def random_span(rng):
+    first = rng.randrange(len(DAYS))
+    return DAYS[first], DAYS[min(first + rng.randrange(3), len(DAYS) - 1)]
+
+
+@pytest.fixture
+def backends(db):
+    """(Database backend indeks, Database backend SQL) pada file yang sama"""
+    return db, Database(db.db_name, availability_backend="sql")
+
+
+def book_randomly(db, rng, user_id, count):
+    """Booking acak semua jenis (sebagian bentrok), kembalikan ID yang tersimpan per jenis"""
+    booked = {'Ruangan': [], 'Aset': [], 'Kendaraan': []}
+    for _ in range(count):
+        start, end = random_slot(rng)
+        day = rng.choice(DAYS)
+        borrow, back = random_span(rng)
+        results = {
+            'Ruangan': db.book_room(user_id, rng.randrange(1, 7), day, start, end, "Uji"),
+            'Aset': db.book_asset(user_id, rng.randrange(1, 7), borrow, back, "Uji"),
+            'Kendaraan': db.book_vehicle(user_id, rng.randrange(1, 6), day, day, start, end, "Kanwil", "Uji"),
+        }
+        for kind, result in results.items():
+            if result:
+                booked[kind].append(result.booking_id)
+    return booked
+
+
+def assert_backends_agree(backends, rng, queries=200):
+    index, sql = backends
+
+    def ids(rows):
+        return sorted(row.id for row in rows)
+
+    for _ in range(queries):
+        day = rng.choice(DAYS)
+        start, end = random_slot(rng)
+        assert ids(index.get_available_rooms(day, start, end)) == ids(sql.get_available_rooms(day, start, end))
+        assert ids(index.get_available_vehicles(day, start, end, "Mobil")) == \
+            ids(sql.get_available_vehicles(day, start, end, "Mobil"))
+        borrow, back = random_span(rng)
+        asset_type = rng.choice((None, "Laptop"))
+        assert ids(index.get_available_assets(borrow, back, asset_type)) == \
+            ids(sql.get_available_assets(borrow, back, asset_type))
+
+
+def test_index_matches_sql_after_incremental_updates(backends, user_id):
+    index, _ = backends
+    rng = random.Random(5)
+    booked = book_randomly(index, rng, user_id, 60)
+    series = index.book_room_series(user_id, 6, DAYS[0], "07:00", "08:00", "Apel", frequency='harian', count=5)
+    assert series
+
+    # Bucket indeks dimuat oleh query pertama, lalu diperbarui per booking / pembatalan
+    assert_backends_agree(backends, rng)
+
+    for kind, ids in booked.items():
+        for booking_id in rng.sample(ids, len(ids) // 3):
+            assert index.cancel_booking(booking_id, kind)
+    assert index.cancel_booking(-series.booking_id, 'Ruangan', occurrence_date=DAYS[2])
+    book_randomly(index, rng, user_id, 60)
+    weekly = index.book_room_series(user_id, 5, DAYS[1], "12:00", "13:00", "Rapat", frequency='mingguan', count=2)
+    if weekly:
+        assert index.cancel_booking(-weekly.booking_id, 'Ruangan')
+
+    assert_backends_agree(backends, rng)
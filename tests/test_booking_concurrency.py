@@ -0,0 +1,85 @@
+"""Stress test book_*: banyak thread membooking slot yang sama, tidak boleh ada booking ganda"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from db import BookingResult
+
+THREADS = 16
+ATTEMPTS = 100
+DAYS = ("2099-03-02", "2099-03-03")
+
+# Pasangan booking 'disetujui' yang bertabrakan - harus selalu 0
+OVERLAPS_SQL = {
+    'Ruangan': """
+        SELECT COUNT(*) FROM room_bookings a JOIN room_bookings b
+        ON a.id < b.id AND a.room_id = b.room_id AND a.day = b.day
+        AND a.start_minute < b.end_minute AND b.start_minute < a.end_minute
+        WHERE a.status = 'disetujui' AND b.status = 'disetujui'
+    """,
+    'Aset': """
+        SELECT COUNT(*) FROM asset_bookings a JOIN asset_bookings b
+        ON a.id < b.id AND a.asset_id = b.asset_id
+        AND a.borrow_day <= b.return_day AND b.borrow_day <= a.return_day
+        WHERE a.status = 'disetujui' AND b.status = 'disetujui'
+    """,
+    'Kendaraan': """
+        SELECT COUNT(*) FROM vehicle_bookings a JOIN vehicle_bookings b
+        ON a.id < b.id AND a.vehicle_id = b.vehicle_id AND a.start_day = b.start_day
+        AND a.start_minute < b.end_minute AND b.start_minute < a.end_minute
+        WHERE a.status = 'disetujui' AND b.status = 'disetujui'
+    """,
+}
+
+
+def clock(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def hammer(book):
+    """Jalankan book(rng) THREADS x ATTEMPTS kali secara bersamaan -> semua BookingResult"""
+    def worker(seed):
+        rng = random.Random(seed)
+        return [book(rng) for _ in range(ATTEMPTS)]
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        return [result for results in executor.map(worker, range(THREADS)) for result in results]
+
+
+def assert_no_double_booking(db, kind, table, results):
+    assert [result for result in results if result.status == BookingResult.ERROR] == []
+    booked = {result.booking_id for result in results if result}
+    assert booked, "tidak ada booking yang berhasil"
+    assert any(result.status == BookingResult.CONFLICT for result in results)
+    with db.connection() as conn:
+        assert conn.execute(OVERLAPS_SQL[kind]).fetchone()[0] == 0
+        assert {row[0] for row in conn.execute(f"SELECT id FROM {table}")} == booked
+
+
+def test_concurrent_room_bookings_never_overlap(db, user_id, room_ids):
+    def book(rng):
+        start = rng.randrange(7 * 60, 16 * 60, 30)
+        end = start + rng.choice((30, 60, 90, 120))
+        return db.book_room(user_id, rng.choice(room_ids[:2]), rng.choice(DAYS), clock(start), clock(end), "Uji")
+
+    assert_no_double_booking(db, 'Ruangan', 'room_bookings', hammer(book))
+
+
+def test_concurrent_asset_bookings_never_overlap(db, user_id, asset_ids):
+    def book(rng):
+        borrow = rng.randrange(1, 29)
+        return_day = min(borrow + rng.randrange(3), 28)
+        return db.book_asset(user_id, rng.choice(asset_ids[:2]), f"2099-04-{borrow:02d}",
+                             f"2099-04-{return_day:02d}", "Uji")
+
+    assert_no_double_booking(db, 'Aset', 'asset_bookings', hammer(book))
+
+
+def test_concurrent_vehicle_bookings_never_overlap(db, user_id, vehicle_ids):
+    def book(rng):
+        start = rng.randrange(7 * 60, 16 * 60, 30)
+        end = start + rng.choice((60, 120, 180))
+        day = rng.choice(DAYS)
+        return db.book_vehicle(user_id, rng.choice(vehicle_ids[:2]), day, day, clock(start), clock(end),
+                               "Kanwil", "Uji")
+
+    assert_no_double_booking(db, 'Kendaraan', 'vehicle_bookings', hammer(book))
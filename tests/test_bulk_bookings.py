@@ -0,0 +1,54 @@
+"""add_bookings_bulk: bentrok di dalam list dan dengan database dilaporkan per permintaan"""
+from db import BookingResult
+
+
+def room_request(user_id, room_id, start, end, purpose="Rapat", date="2099-05-04"):
+    return {'type': 'Ruangan', 'user_id': user_id, 'room_id': room_id, 'date': date,
+            'start_time': start, 'end_time': end, 'purpose': purpose}
+
+
+def test_conflicts_inside_batch_and_with_database(db, user_id, room_ids, asset_ids):
+    existing = db.book_room(user_id, room_ids[0], "2099-05-04", "13:00", "14:00", "Sudah ada")
+    requests = [
+        room_request(user_id, room_ids[0], "08:00", "09:00"),
+        # Bentrok dengan permintaan pertama di list yang sama
+        room_request(user_id, room_ids[0], "08:30", "09:30"),
+        # Bentrok dengan booking yang sudah tersimpan
+        room_request(user_id, room_ids[0], "13:30", "14:30"),
+        room_request(user_id, room_ids[1], "08:30", "09:30"),
+        {'type': 'Aset', 'user_id': user_id, 'asset_id': asset_ids[0], 'borrow_date': "2099-05-04",
+         'return_date': "2099-05-05", 'purpose': "Pinjam"},
+        room_request(user_id, room_ids[0], "10:00", "09:00"),
+    ]
+    results = db.add_bookings_bulk(requests)
+
+    assert [result.status for result in results] == [
+        BookingResult.OK, BookingResult.CONFLICT, BookingResult.CONFLICT,
+        BookingResult.OK, BookingResult.OK, BookingResult.INVALID,
+    ]
+    assert results[1].conflicts == [results[0].booking_id]
+    assert results[2].conflicts == [existing.booking_id]
+    assert results[1].message and results[5].message
+
+    with db.connection() as conn:
+        rows = conn.execute("SELECT id, room_id, start_time FROM room_bookings ORDER BY id").fetchall()
+        assert conn.execute("SELECT id FROM asset_bookings").fetchall() == [(results[4].booking_id,)]
+    assert rows == [(existing.booking_id, room_ids[0], "13:00"),
+                    (results[0].booking_id, room_ids[0], "08:00"),
+                    (results[3].booking_id, room_ids[1], "08:30")]
+
+    # Indeks ketersediaan ikut diperbarui: booking tunggal berikutnya melihat hasil bulk
+    later = db.book_room(user_id, room_ids[1], "2099-05-04", "09:00", "10:00", "Bentrok")
+    assert later.status == BookingResult.CONFLICT and later.conflicts == [results[3].booking_id]
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+
+def test_batch_without_conflicts_inserts_all_in_order(db, user_id, room_ids):
+    requests = [room_request(user_id, room_ids[0], f"{hour:02d}:00", f"{hour + 1:02d}:00") for hour in range(8, 12)]
+    results = db.add_bookings_bulk(requests)
+    assert all(results)
+    ids = [result.booking_id for result in results]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    with db.connection() as conn:
+        assert conn.execute("SELECT start_time FROM room_bookings ORDER BY id").fetchall() == \
+            [(f"{hour:02d}:00",) for hour in range(8, 12)]
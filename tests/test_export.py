@@ -0,0 +1,160 @@
+import csv
+
+import pytest
+
+import columnar
+from db import latest_export_rows
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def archived(db, user_id, room_ids):
+    """Lima booking ruangan lama (diarsipkan) dan dua booking mendatang (tetap live)"""
+    for day in range(1, 6):
+        assert db.book_room(user_id, room_ids[0], f"2020-01-{day:02d}", "08:00", "09:00", "Rapat lama")
+    for day in range(1, 3):
+        assert db.book_room(user_id, room_ids[0], f"2099-01-{day:02d}", "08:00", "09:00", "Rapat baru")
+    moved = db.archive_bookings(horizon_days=0, pause=0)
+    assert moved['Ruangan'] == 5
+    return 7
+
+
+def test_full_export_includes_archived_bookings(db, archived, tmp_path):
+    path = tmp_path / "booking.csv"
+    assert db.export_bookings_to_csv(str(path))
+    rows = read_csv(path)
+    assert len(rows) == archived == db.get_statistics()['total_room_bookings']
+    stamps = [row['Waktu Booking'] for row in rows]
+    assert stamps == sorted(stamps, reverse=True)
+
+
+def test_compacted_export_includes_archived_bookings(db, archived, tmp_path):
+    path = tmp_path / "booking.csv"
+    assert db.compact_bookings_csv(str(path))
+    assert len(read_csv(path)) == archived
+
+
+@pytest.mark.skipif(not columnar.available(), reason="pyarrow tidak terpasang")
+@pytest.mark.parametrize("file_format", sorted(columnar.FORMATS))
+def test_columnar_export_includes_archived_bookings(db, archived, tmp_path, file_format):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    path = tmp_path / ("booking" + columnar.FORMATS[file_format][0])
+    assert db.export_bookings_to_csv(str(path), file_format=file_format)
+    if file_format == 'parquet':
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            table = reader.read_all()
+    assert table.num_rows == archived
+
+
+def test_incremental_export_keys_rows_by_booking(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "booking.csv")
+    first = db.book_room(user_id, room_ids[0], "2099-02-01", "08:00", "09:00", "Rapat")
+    assert db.compact_bookings_csv(path)
+    second = db.book_room(user_id, room_ids[0], "2099-02-02", "08:00", "09:00", "Rapat")
+    assert db.cancel_booking(first.booking_id, 'Ruangan')
+    assert db.append_bookings_csv(path)
+
+    rows = read_csv(path)
+    assert [row['ID'] for row in rows] == [str(first.booking_id), str(second.booking_id), str(first.booking_id)]
+    latest = {row['ID']: row['Status'] for row in latest_export_rows(rows)}
+    assert latest == {str(first.booking_id): 'dibatalkan', str(second.booking_id): 'disetujui'}
+
+    full = str(tmp_path / "lengkap.csv")
+    assert db.export_bookings_to_csv(full)
+    keyed = {(row['Jenis'], row['ID']): row for row in read_csv(full)}
+    assert {(row['Jenis'], row['ID']): row for row in latest_export_rows(rows)} == keyed
+
+
+def change_log(db):
+    with db.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT seq FROM booking_changes ORDER BY seq")]
+
+
+def test_compaction_of_empty_database_writes_header(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "booking.csv")
+    assert db.compact_bookings_csv(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f))
+    assert header[:2] == ['Jenis', 'ID'] and read_csv(path) == []
+
+    booking = db.book_room(user_id, room_ids[0], "2099-02-01", "08:00", "09:00", "Rapat")
+    assert db.append_bookings_csv(path)
+    assert [row['ID'] for row in read_csv(path)] == [str(booking.booking_id)]
+
+
+def test_compaction_prunes_change_log(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "booking.csv")
+    first = db.book_room(user_id, room_ids[0], "2099-02-01", "08:00", "09:00", "Rapat")
+    assert db.compact_bookings_csv(path)
+    assert change_log(db) == []
+
+    db.book_room(user_id, room_ids[0], "2099-02-02", "08:00", "09:00", "Rapat")
+    assert db.cancel_booking(first.booking_id, 'Ruangan')
+    assert db.append_bookings_csv(path)
+    assert len(change_log(db)) == 2
+    assert db.compact_bookings_csv(path)
+    assert change_log(db) == []
+    assert {row['ID']: row['Status'] for row in read_csv(path)} == {
+        str(first.booking_id): 'dibatalkan', str(first.booking_id + 1): 'disetujui',
+    }
+
+
+def test_file_behind_pruned_log_is_compacted(db, user_id, room_ids, tmp_path):
+    behind, ahead = str(tmp_path / "a.csv"), str(tmp_path / "b.csv")
+    first = db.book_room(user_id, room_ids[0], "2099-02-01", "08:00", "09:00", "Rapat")
+    assert db.compact_bookings_csv(behind)
+    second = db.book_room(user_id, room_ids[0], "2099-02-02", "08:00", "09:00", "Rapat")
+    # Compaction file lain memangkas perubahan yang belum dibaca file pertama
+    assert db.compact_bookings_csv(ahead)
+    third = db.book_room(user_id, room_ids[0], "2099-02-03", "08:00", "09:00", "Rapat")
+
+    assert db.append_bookings_csv(behind)
+    ids = {str(result.booking_id) for result in (first, second, third)}
+    assert {row['ID'] for row in latest_export_rows(read_csv(behind))} == ids
+    assert db.append_bookings_csv(ahead)
+    assert {row['ID'] for row in latest_export_rows(read_csv(ahead))} == ids
+
+
+def test_archive_run_prunes_old_changes(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "booking.csv")
+    first = db.book_room(user_id, room_ids[0], "2099-02-01", "08:00", "09:00", "Rapat")
+    assert db.compact_bookings_csv(path)
+    second = db.book_room(user_id, room_ids[0], "2099-02-02", "08:00", "09:00", "Rapat")
+    with db.connection() as conn:
+        conn.execute("UPDATE booking_changes SET changed_at = datetime('now', '-400 days')")
+    db.archive_bookings(horizon_days=365, pause=0)
+    assert change_log(db) == []
+
+    assert db.append_bookings_csv(path)
+    assert {row['ID'] for row in latest_export_rows(read_csv(path))} == {
+        str(first.booking_id), str(second.booking_id),
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, None])
+def test_streamed_export_matches_dataframe_export(db, tmp_path, chunk_size):
+    from bench_export import fill_bookings, legacy_export
+    fill_bookings(db, 200)
+    legacy_path, stream_path = tmp_path / "lama.csv", tmp_path / "stream.csv"
+    legacy_export(db, str(legacy_path))
+    assert db.export_bookings_to_csv(str(stream_path), chunk_size=chunk_size)
+
+    legacy, stream = legacy_path.read_bytes().splitlines(), stream_path.read_bytes().splitlines()
+    # Header dan isi sama byte demi byte; hanya urutan baris dengan Waktu Booking sama boleh beda
+    assert stream[0] == legacy[0]
+    assert sorted(stream[1:]) == sorted(legacy[1:]) and len(stream) == 200 + 1
+    stamps = [row['Waktu Booking'] for row in read_csv(stream_path)]
+    assert stamps == sorted(stamps, reverse=True)
+
+
+def test_export_of_empty_database_writes_nothing(db, tmp_path):
+    path = tmp_path / "booking.csv"
+    assert not db.export_bookings_to_csv(str(path))
+    assert not path.exists()
@@ -0,0 +1,91 @@
+"""Worker export latar: event digabung (coalescing) dan export gagal tercatat sebagai error"""
+import threading
+
+import pytest
+
+from export_worker import ExportWorker
+
+
+class RecordingExport:
+    """Pengganti Database.export_bookings_to_csv: mencatat panggilan, hasil bisa diatur"""
+
+    def __init__(self, result=True, gate=None):
+        self.result = result
+        self.gate = gate
+        self.calls = []
+        self.started = threading.Event()
+
+    def __call__(self, path):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(path)
+        if self.result:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("Jenis,ID\n")
+        return self.result
+
+
+@pytest.mark.parametrize("atomic", [True, False])
+def test_failed_export_counted_as_error(tmp_path, atomic):
+    csv_path = tmp_path / "booking.csv"
+    worker = ExportWorker(RecordingExport(result=False), str(csv_path), debounce=0.01, atomic=atomic)
+    worker.notify()
+    assert worker.flush(5)
+
+    stats = worker.snapshot()
+    assert stats['exports'] == 0
+    assert stats['errors'] == 1
+    assert stats['last_error']
+    assert stats['last_export_at'] is None and stats['last_export_ms'] is None
+    assert stats['pending'] == 0
+    assert not csv_path.exists()
+    # File sementara export atomik tidak tertinggal
+    assert list(tmp_path.iterdir()) == []
+    worker.stop(5)
+
+
+def test_exception_in_export_counted_as_error(tmp_path):
+    def export(path):
+        raise OSError("disk penuh")
+
+    worker = ExportWorker(export, str(tmp_path / "booking.csv"), debounce=0.01)
+    worker.notify()
+    assert worker.flush(5)
+    stats = worker.snapshot()
+    assert (stats['exports'], stats['errors'], stats['last_error']) == (0, 1, "disk penuh")
+    worker.stop(5)
+
+
+def test_burst_of_events_coalesced_into_one_export(tmp_path):
+    csv_path = tmp_path / "booking.csv"
+    export = RecordingExport()
+    worker = ExportWorker(export, str(csv_path), debounce=0.5, max_delay=10.0)
+    for _ in range(10):
+        worker.notify()
+    assert worker.flush(5)
+
+    stats = worker.snapshot()
+    assert len(export.calls) == 1
+    assert (stats['events'], stats['exports'], stats['coalesced'], stats['errors']) == (10, 1, 9, 0)
+    assert stats['pending'] == 0 and stats['last_export_at'] is not None
+    assert csv_path.read_text(encoding="utf-8") == "Jenis,ID\n"
+    worker.stop(5)
+
+
+def test_events_during_export_trigger_one_more_export(tmp_path):
+    gate = threading.Event()
+    export = RecordingExport(gate=gate)
+    worker = ExportWorker(export, str(tmp_path / "booking.csv"), debounce=0.01)
+    worker.notify()
+    # Export pertama tertahan; event berikutnya menunggu dan digabung jadi satu export lagi
+    assert export.started.wait(5)
+    for _ in range(5):
+        worker.notify()
+    gate.set()
+    assert worker.flush(5)
+
+    stats = worker.snapshot()
+    assert len(export.calls) == 2
+    assert (stats['events'], stats['exports'], stats['coalesced']) == (6, 2, 4)
+    worker.stop(5)
@@ -0,0 +1,64 @@
+"""Migrasi database lama yang sudah berisi booking (sebelum kolom hari/menit integer)"""
+import sqlite3
+
+import schema
+from db import BookingResult, Database
+
+# Versi terakhir sebelum add_integer_time_columns
+LEGACY_VERSION = 4
+
+
+def legacy_database(path):
+    """Database berskema versi 4 berisi booking yang hanya punya kolom tanggal/jam teks"""
+    conn = sqlite3.connect(path)
+    schema.get_schema_version(conn)
+    for version, description, step in schema.MIGRATIONS:
+        if version > LEGACY_VERSION:
+            break
+        step(conn.cursor())
+        conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+    conn.execute("INSERT INTO users (username, password, name) VALUES ('lama', 'x', 'Pegawai Lama')")
+    conn.executemany(
+        "INSERT INTO room_bookings (user_id, room_id, date, start_time, end_time, purpose, created_at)"
+        " VALUES (1, 1, ?, ?, ?, 'Rapat', '2024-01-01 10:00:00')",
+        [("2099-03-02", "08:00", "09:30"), ("2099-03-02", "13:00:00", "14:15:00"), ("besok", "08:00", "09:00")]
+    )
+    conn.execute(
+        "INSERT INTO asset_bookings (user_id, asset_id, borrow_date, return_date, purpose, created_at)"
+        " VALUES (1, 1, '2099-03-01', '2099-03-04', 'Pinjam', '2024-01-01 10:00:00')"
+    )
+    conn.execute(
+        "INSERT INTO vehicle_bookings (user_id, vehicle_id, start_date, end_date, start_time, end_time,"
+        " destination, purpose, created_at)"
+        " VALUES (1, 1, '2099-03-02', '2099-03-02', '07:00', '16:00', 'Kanwil', 'Dinas', '2024-01-01 10:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_backfill_from_populated_legacy_database(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "lama.db")
+    legacy_database(path)
+
+    db = Database(path)
+    assert "1 nilai tanggal/jam di room_bookings tidak bisa dikonversi" in capsys.readouterr().out
+    day = schema.day_number("2099-03-02")
+    with db.connection() as conn:
+        assert conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] == schema.MIGRATIONS[-1][0]
+        # Tiap kolom dikonversi sendiri: tanggal tidak valid tetap NULL, jamnya tetap terisi
+        assert conn.execute("SELECT day, start_minute, end_minute FROM room_bookings ORDER BY id").fetchall() == [
+            (day, 8 * 60, 9 * 60 + 30), (day, 13 * 60, 14 * 60 + 15), (None, 8 * 60, 9 * 60),
+        ]
+        assert conn.execute("SELECT borrow_day, return_day FROM asset_bookings").fetchone() == (day - 1, day + 2)
+        assert conn.execute("SELECT start_day, end_day, start_minute, end_minute FROM vehicle_bookings").fetchone() \
+            == (day, day, 7 * 60, 16 * 60)
+
+    # Query bentrok dan ketersediaan memakai kolom hasil backfill
+    assert db.book_room(1, 1, "2099-03-02", "09:00", "10:00", "Bentrok").status == BookingResult.CONFLICT
+    assert db.book_room(1, 1, "2099-03-02", "09:30", "10:00", "Pas")
+    assert db.book_asset(1, 1, "2099-03-04", "2099-03-05", "Bentrok").status == BookingResult.CONFLICT
+    assert 1 not in [vehicle.id for vehicle in db.get_available_vehicles("2099-03-02", "15:00", "17:00")]
+    assert 1 in [room.id for room in db.get_available_rooms("2099-03-02", "10:00", "13:00")]
+    assert db.get_statistics()['total_room_bookings'] == 4
+    assert db.rebuild_statistics()['mismatches'] == {}
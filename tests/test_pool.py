@@ -0,0 +1,111 @@
+"""ConnectionPool: commit/rollback, release ganda, batas pool dan metrik koneksi"""
+import sqlite3
+import threading
+
+import pytest
+
+from pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    pools = []
+
+    def make(**options):
+        pool = ConnectionPool(str(tmp_path / "pool.db"), **options)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close_all()
+
+
+def test_commit_and_rollback(make_pool):
+    pool = make_pool()
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError
+    with pool.connection() as conn:
+        assert conn.execute("SELECT x FROM t").fetchall() == [(1,)]
+    assert pool.stats()['in_use'] == 0
+
+
+def test_double_release_keeps_connection_open(make_pool):
+    pool = make_pool()
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+    conn.close()
+    pool.release(conn)
+    # Koneksi tetap hidup dan hanya sekali masuk antrean menganggur
+    assert pool.stats()['idle'] == 1
+    with pool.connection() as again:
+        assert again.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    assert pool.stats()['in_use'] == 0
+
+
+def test_close_all_closes_real_connections(make_pool):
+    pool = make_pool()
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+
+def test_timeout_when_exhausted(make_pool):
+    pool = make_pool(max_size=1, timeout=0.2)
+    held = pool.acquire()
+    try:
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+    finally:
+        pool.release(held)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_concurrent_checkouts(make_pool):
+    pool = make_pool(max_size=4)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+
+    def worker(offset):
+        for value in range(offset, offset + 50):
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO t VALUES (?)", (value,))
+
+    threads = [threading.Thread(target=worker, args=(index * 50,)) for index in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(DISTINCT x) FROM t").fetchone() == (800,)
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['open'] <= pool.max_size
+
+
+def test_stale_connection_replaced_and_counted(make_pool):
+    pool = make_pool(ping_after=0)
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+    # Koneksi menganggur mati (mis. file database diganti): health check gagal saat dipinjam
+    conn._close_real()
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone() == (1,)
+
+    stats = pool.stats()
+    assert stats['health_failures'] == 1
+    assert (stats['opened'], stats['closed']) == (2, 1)
+    assert stats['opened'] - stats['closed'] == stats['open'] == 1
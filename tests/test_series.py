@@ -0,0 +1,113 @@
+"""Kejadian seri ruangan berulang ikut di riwayat, hitungan, statistik dan export"""
+import csv
+
+import pytest
+
+import recurrence
+import schema
+from db import BookingResult, latest_export_rows
+
+
+@pytest.fixture
+def series_id(db, user_id, room_ids):
+    """Seri mingguan empat kejadian (2099-01-05 s/d 2099-01-26), sebagai -ID seri"""
+    result = db.book_room_series(user_id, room_ids[0], "2099-01-05", "08:00", "09:00", "Koordinasi",
+                                 frequency='mingguan', count=4)
+    assert result
+    return -result.booking_id
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_occurrences_counted_for_user_and_statistics(db, user_id, series_id):
+    assert db.get_user_booking_counts(user_id)['Ruangan'] == {'total': 4, 'disetujui': 4}
+    assert db.get_statistics()['total_room_bookings'] == 4
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+
+def test_skip_and_cancel_keep_statistics_in_sync(db, user_id, series_id):
+    assert db.cancel_booking(series_id, 'Ruangan', occurrence_date="2099-01-12")
+    # Melewati tanggal yang sama dua kali tidak menghitung dua kali
+    assert db.cancel_booking(series_id, 'Ruangan', occurrence_date="2099-01-12")
+    assert db.get_user_booking_counts(user_id)['Ruangan'] == {'total': 4, 'disetujui': 3, 'dibatalkan': 1}
+    assert db.get_room_series_upcoming(series_id, "2099-01-01") == ["2099-01-05", "2099-01-19", "2099-01-26"]
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+    assert db.cancel_booking(series_id, 'Ruangan')
+    assert db.get_user_booking_counts(user_id)['Ruangan'] == {'total': 4, 'dibatalkan': 4}
+    assert db.get_room_series_upcoming(series_id, "2099-01-01") == []
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+
+def test_user_series_listing(db, user_id, series_id):
+    db.cancel_booking(series_id, 'Ruangan', occurrence_date="2099-01-05")
+    series = db.get_user_room_series(user_id)
+    assert series[['id', 'first_date', 'last_date', 'active_count', 'next_date']].to_dict('records') == [
+        {'id': series_id, 'first_date': "2099-01-05", 'last_date': "2099-01-26",
+         'active_count': 3, 'next_date': "2099-01-12"},
+    ]
+
+
+def test_full_and_daily_exports_include_occurrences(db, user_id, room_ids, series_id, tmp_path):
+    assert db.book_room(user_id, room_ids[1], "2099-01-12", "10:00", "11:00", "Biasa")
+    db.cancel_booking(series_id, 'Ruangan', occurrence_date="2099-01-19")
+
+    full = tmp_path / "booking.csv"
+    assert db.export_bookings_to_csv(str(full))
+    rows = read_csv(full)
+    occurrences = {row['ID']: row['Status'] for row in rows if row['ID'].startswith('-')}
+    assert occurrences == {
+        f"{series_id}:2099-01-05": 'disetujui', f"{series_id}:2099-01-12": 'disetujui',
+        f"{series_id}:2099-01-19": 'dibatalkan', f"{series_id}:2099-01-26": 'disetujui',
+    }
+    assert len(rows) == 5
+
+    daily = tmp_path / "harian.csv"
+    assert db.export_daily_bookings("2099-01-12", str(daily))
+    assert sorted(row['Keperluan'] for row in read_csv(daily)) == ["Biasa", "Koordinasi"]
+
+
+def test_incremental_export_follows_series_changes(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "booking.csv")
+    assert db.book_room(user_id, room_ids[1], "2099-01-12", "10:00", "11:00", "Biasa")
+    assert db.compact_bookings_csv(path)
+    result = db.book_room_series(user_id, room_ids[0], "2099-02-02", "08:00", "09:00", "Seri",
+                                 frequency='harian', count=3)
+    assert db.append_bookings_csv(path)
+    assert len(latest_export_rows(read_csv(path))) == 4
+
+    assert db.cancel_booking(-result.booking_id, 'Ruangan', occurrence_date="2099-02-03")
+    assert db.append_bookings_csv(path)
+    statuses = [row['Status'] for row in latest_export_rows(read_csv(path)) if row['Keperluan'] == "Seri"]
+    assert sorted(statuses) == ['dibatalkan', 'disetujui', 'disetujui']
+
+
+@pytest.mark.parametrize("start, frequency, every, until, count", [
+    # Melewati tahun 9999 - dulu tersimpan lalu memecahkan export semua pengguna
+    ("2099-01-05", 'harian', 10 ** 6, None, 5),
+    # Bulanan 29 Februari dengan every besar - dulu tidak pernah selesai
+    ("2096-02-29", 'bulanan', 120, None, 1000),
+    ("2096-02-29", 'bulanan', 12, None, 1000),
+    ("2099-01-05", 'mingguan', 1, "9999-12-31", None),
+])
+def test_series_beyond_horizon_rejected(db, user_id, room_ids, tmp_path, start, frequency, every, until, count):
+    assert db.book_room(user_id, room_ids[1], "2099-01-05", "10:00", "11:00", "Biasa")
+    result = db.book_room_series(user_id, room_ids[0], start, "08:00", "09:00", "Jauh",
+                                 frequency=frequency, every=every, until=until, count=count)
+    assert result.status == BookingResult.INVALID
+    assert db.get_user_room_series(user_id).empty
+    assert db.export_bookings_to_csv(str(tmp_path / "booking.csv"))
+
+
+def test_monthly_rule_stops_at_last_valid_month():
+    first_day = schema.day_number("2096-02-29")
+    assert recurrence.last_occurrence_day('bulanan', 120, first_day, 1000) is None
+    days = recurrence.occurrence_days('bulanan', 120, first_day, recurrence.LAST_DAY,
+                                      first_day, recurrence.LAST_DAY)
+    dates = [schema.date_of_day(day) for day in days]
+    assert dates[0].isoformat() == "2096-02-29" and dates[-1].year <= 9999
+    assert {(value.month, value.day) for value in dates} == {(2, 29)}
+    assert recurrence.last_occurrence_day('harian', 10 ** 6, first_day, 5) is None
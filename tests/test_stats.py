@@ -0,0 +1,58 @@
+"""Rollup booking_stats yang dijaga trigger harus sama dengan hasil hitung ulang (rebuild_stats)"""
+import random
+
+import rebuild_stats
+
+
+def test_rollup_matches_rebuild_after_mixed_workload(db, user_id):
+    rng = random.Random(9)
+    booked = []
+    for _ in range(80):
+        day = f"20{rng.choice(('20', '99'))}-06-{rng.randrange(1, 29):02d}"
+        hour = rng.randrange(7, 16)
+        for kind, result in (
+            ('Ruangan', db.book_room(user_id, rng.randrange(1, 7), day, f"{hour:02d}:00", f"{hour + 1:02d}:00", "Uji")),
+            ('Aset', db.book_asset(user_id, rng.randrange(1, 7), day, day, "Uji")),
+            ('Kendaraan', db.book_vehicle(user_id, rng.randrange(1, 6), day, day, f"{hour:02d}:00",
+                                          f"{hour + 2:02d}:00", "Kanwil", "Uji")),
+        ):
+            if result:
+                booked.append((kind, result.booking_id))
+
+    db.add_bookings_bulk([
+        {'type': 'Ruangan', 'user_id': user_id, 'room_id': 1, 'date': "2099-07-01",
+         'start_time': f"{hour:02d}:00", 'end_time': f"{hour + 1:02d}:00", 'purpose': "Pelatihan"}
+        for hour in range(8, 16)
+    ])
+    series = db.book_room_series(user_id, 2, "2099-08-03", "08:00", "09:00", "Apel", frequency='mingguan', count=6)
+    assert series
+
+    for kind, booking_id in rng.sample(booked, len(booked) // 4):
+        assert db.cancel_booking(booking_id, kind)
+    for kind, booking_id in rng.sample(booked, 5):
+        db.update_booking_status(booking_id, kind, 'disetujui')
+    assert db.cancel_booking(-series.booking_id, 'Ruangan', occurrence_date="2099-08-10")
+
+    # Satu user: total rollup sama dengan hitungan langsung dari tabel booking
+    stats = db.get_statistics()
+    counts = db.get_user_booking_counts(user_id)
+    assert (stats['total_room_bookings'], stats['total_asset_bookings'], stats['total_vehicle_bookings']) == (
+        counts['Ruangan']['total'], counts['Aset']['total'], counts['Kendaraan']['total']
+    )
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+    # Pengarsipan memindahkan baris tanpa mengubah rollup seluruh riwayat
+    moved = db.archive_bookings(horizon_days=0, pause=0)
+    assert sum(moved.values()) > 0
+    assert db.get_statistics() == stats
+    assert db.rebuild_statistics()['mismatches'] == {}
+
+
+def test_rebuild_command_detects_and_repairs_drift(db, user_id):
+    assert db.book_room(user_id, 1, "2099-06-01", "08:00", "09:00", "Uji")
+    with db.connection() as conn:
+        conn.execute("UPDATE booking_stats SET count = count + 3 WHERE scope = 'total' AND kind = 'Ruangan'")
+
+    assert rebuild_stats.main(["rebuild_stats.py", db.db_name]) == 1
+    assert rebuild_stats.main(["rebuild_stats.py", db.db_name]) == 0
+    assert db.get_statistics()['total_room_bookings'] == 1
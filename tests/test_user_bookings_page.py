@@ -0,0 +1,55 @@
+"""Riwayat booking user per halaman (keyset created_at, id): tanpa duplikat atau baris terlewat"""
+import pytest
+
+
+def all_pages(db, user_id, booking_type, page_size, **filters):
+    pages, after = [], None
+    while True:
+        df, after = db.get_user_bookings_page(user_id, booking_type, page_size, after, **filters)
+        pages.append(df['id'].tolist())
+        if after is None:
+            return pages
+
+
+@pytest.fixture
+def room_booking_ids(db, user_id, room_ids):
+    ids = []
+    for hour in range(8, 15):
+        result = db.book_room(user_id, room_ids[0], "2099-04-01", f"{hour:02d}:00", f"{hour:02d}:30", "Rapat")
+        ids.append(result.booking_id)
+    # Lima booking dibuat pada detik yang sama; batas halaman jatuh di tengah kelompok ini
+    with db.connection() as conn:
+        conn.execute("UPDATE room_bookings SET created_at = '2024-05-01 09:00:00'")
+        conn.execute("UPDATE room_bookings SET created_at = '2024-05-02 09:00:00' WHERE id = ?", (ids[0],))
+        conn.execute("UPDATE room_bookings SET created_at = '2024-04-30 09:00:00' WHERE id = ?", (ids[-1],))
+    return ids
+
+
+def test_page_boundary_inside_equal_created_at(db, user_id, room_booking_ids):
+    first, *same, last = room_booking_ids
+    pages = all_pages(db, user_id, 'Ruangan', 3)
+    assert pages == [[first] + same[::-1][:2], same[::-1][2:], [last]]
+
+    df, after = db.get_user_bookings_page(user_id, 'Ruangan', 3)
+    # Cursor = (created_at, id) baris terakhir halaman, bukan offset
+    assert after == ('2024-05-01 09:00:00', same[-2])
+    assert df['created_at'].tolist()[1:] == ['2024-05-01 09:00:00'] * 2
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 4, 7, 20])
+def test_pages_cover_every_booking_once(db, user_id, room_booking_ids, page_size):
+    pages = all_pages(db, user_id, 'Ruangan', page_size)
+    ids = [booking_id for page in pages for booking_id in page]
+    assert sorted(ids) == sorted(room_booking_ids) and len(ids) == len(set(ids))
+    assert all(len(page) == page_size for page in pages[:-1])
+    full, _ = db.get_user_bookings_page(user_id, 'Ruangan', 100)
+    assert ids == full['id'].tolist()
+
+
+def test_filters_apply_across_pages(db, user_id, room_booking_ids):
+    with db.connection() as conn:
+        conn.execute("UPDATE room_bookings SET status = 'dibatalkan' WHERE id IN (?, ?)", tuple(room_booking_ids[2:4]))
+    pages = all_pages(db, user_id, 'Ruangan', 2, status='disetujui')
+    ids = [booking_id for page in pages for booking_id in page]
+    assert sorted(ids) == sorted(set(room_booking_ids) - set(room_booking_ids[2:4]))
+    assert all_pages(db, user_id, 'Ruangan', 2, date_from="2099-04-02") == [[]]
@@ -0,0 +1,57 @@
+"""Sinkronisasi users.csv: hanya selisih yang ditulis, ID user dan booking tetap terhubung"""
+import os
+
+
+def write_users(path, rows, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("USERNAME,PASSWORD,NAMA\n")
+        for row in rows:
+            f.write(",".join(row) + "\n")
+    # mtime eksplisit: dua tulisan dalam satu detik tetap terbaca sebagai file berubah
+    os.utime(path, (mtime, mtime))
+
+
+def user_ids(db):
+    with db.connection() as conn:
+        return dict(conn.execute("SELECT username, id FROM users"))
+
+
+def test_sync_applies_only_the_difference(db, user_id, room_ids, tmp_path):
+    path = str(tmp_path / "users.csv")
+    write_users(path, [("pegawai", "rahasia", "Pegawai Uji"), ("0012", "a", "Budi"), ("0013", "b", "Sari")], 1000)
+    report = db.sync_users_from_csv(path)
+    # admin bawaan ikut dibuat karena belum ada di database maupun CSV
+    assert (report['status'], report['inserted'], report['updated'], report['deleted'], report['unchanged']) == \
+        ('synced', 3, 0, 0, 1)
+    ids = user_ids(db)
+    assert ids['pegawai'] == user_id and '0012' in ids and 'admin' in ids
+    assert db.book_room(ids['0012'], room_ids[0], "2099-01-05", "08:00", "09:00", "Rapat")
+
+    write_users(path, [("pegawai", "rahasia", "Pegawai Uji"), ("0012", "a", "Budi Santoso"), ("0014", "c", "Tono")], 2000)
+    report = db.sync_users_from_csv(path)
+    assert (report['inserted'], report['updated'], report['deleted'], report['unchanged']) == (1, 1, 1, 1)
+    after = user_ids(db)
+    # Username yang tetap ada mempertahankan ID-nya; admin tidak pernah dihapus
+    assert after['pegawai'] == ids['pegawai'] and after['0012'] == ids['0012']
+    assert '0013' not in after and 'admin' in after
+    assert db.verify_user("0012", "a")['name'] == "Budi Santoso"
+    assert db.get_user_booking_counts(ids['0012'])['Ruangan'] == {'total': 1, 'disetujui': 1}
+
+
+def test_unchanged_file_is_skipped(db, tmp_path):
+    path = str(tmp_path / "users.csv")
+    write_users(path, [("0012", "a", "Budi")], 1000)
+    assert db.sync_users_from_csv(path)['status'] == 'synced'
+    assert db.sync_users_from_csv(path)['status'] == 'skipped'
+
+    # Hanya di-touch: isi sama, sidik jari sha256 cocok
+    os.utime(path, (3000, 3000))
+    assert db.sync_users_from_csv(path)['status'] == 'skipped'
+
+    report = db.sync_users_from_csv(path, force=True)
+    assert (report['status'], report['inserted'], report['updated'], report['deleted']) == ('synced', 0, 0, 0)
+
+
+def test_missing_file_reports_error(db, tmp_path):
+    assert db.sync_users_from_csv(str(tmp_path / "tidak_ada.csv"))['status'] == 'error'
+    assert not db.load_users_from_csv(str(tmp_path / "tidak_ada.csv"))
@@ -0,0 +1,47 @@
+"""viewmodel: hasil operasi per kolom sama dengan loop iterrows / apply lama (bench_viewmodel)"""
+import pandas as pd
+import pytest
+
+import viewmodel
+from bench_viewmodel import (booking_frame, legacy_daily_export, legacy_room_options, legacy_schedule,
+                             schedule_input)
+
+
+@pytest.fixture
+def bookings():
+    return booking_frame(500)
+
+
+def test_display_name_falls_back_to_user_name():
+    df = pd.DataFrame({
+        'requester_name': [None, '', '  ', 'Seksi Umum', float('nan')],
+        'user_name': ['BUDI', 'EDITH', 'SARI', 'TONO', None],
+    })
+    assert viewmodel.display_name(df).tolist()[:4] == ['BUDI', 'EDITH', 'SARI', 'Seksi Umum']
+    assert viewmodel.display_name(df).isna().tolist() == [False] * 4 + [True]
+
+
+def test_schedule_frame_matches_legacy(bookings):
+    schedule = schedule_input(bookings)
+    pd.testing.assert_frame_equal(viewmodel.schedule_frame('Ruangan', schedule), legacy_schedule(schedule))
+
+
+def test_daily_export_frame_matches_legacy(bookings):
+    new = viewmodel.daily_export_frame(bookings)
+    assert new.to_csv(index=False) == legacy_daily_export(bookings).to_csv(index=False)
+    assert new['Jenis'].drop_duplicates().tolist() == ['Ruangan', 'Aset', 'Kendaraan']
+    assert viewmodel.daily_export_frame(bookings.iloc[:0]).empty
+
+
+def test_option_labels_keep_row_index():
+    rooms = pd.DataFrame({'id': [7, 3, 9], 'name': ["Aula", "Ruang Rapat", "Aula"], 'capacity': [80, 12, 40]},
+                         index=[10, 11, 12])
+    labels = viewmodel.option_labels(rooms, viewmodel.CATALOG_OPTION_LABELS['rooms'])
+    assert labels.tolist() == legacy_room_options(rooms)
+    # Pilihan dipetakan kembali ke barisnya lewat index yang sama
+    assert rooms.loc[labels == "Aula (Kapasitas: 40)", 'id'].tolist() == [9]
+
+    history = pd.DataFrame({'ID': [5], 'Aset': ["Laptop 1"], 'Tanggal Pinjam': ["2099-01-02"],
+                            'Tanggal Kembali': ["2099-01-04"]})
+    assert viewmodel.option_labels(history, viewmodel.CANCEL_OPTION_LABELS['Aset']).tolist() == \
+        ["ID 5: Laptop 1 - 2099-01-02 s/d 2099-01-04"]
@@ -0,0 +1,118 @@
+"""Bentuk tampilan/export dari DataFrame booking & katalog dengan operasi per kolom.
+
+Pengganti loop df.iterrows() / df.apply(..., axis=1) di app.py dan db.py: semua fungsi
+di sini bekerja pada seluruh kolom sekaligus (rename, where, str accessor, concat),
+sehingga biayanya hampir tidak bergantung pada jumlah baris Python.
+"""
+import string
+import pandas as pd
+
+# Jadwal per jenis (halaman Jadwal): kolom get_schedule -> judul, dan kolom urutan
+SCHEDULE_COLUMNS = {
+    'Ruangan': (
+        {'item_name': 'Ruangan', 'start_time': 'Jam Mulai', 'end_time': 'Jam Selesai',
+         'display_name': 'Pemesan', 'purpose': 'Keperluan', 'status': 'Status'},
+        'Jam Mulai',
+    ),
+    'Aset': (
+        {'item_name': 'Aset', 'date': 'Tanggal Pinjam', 'return_date': 'Tanggal Kembali',
+         'display_name': 'Pemesan', 'purpose': 'Keperluan', 'status': 'Status'},
+        'Tanggal Pinjam',
+    ),
+    'Kendaraan': (
+        {'item_name': 'Kendaraan', 'start_time': 'Jam Mulai', 'end_time': 'Jam Selesai',
+         'display_name': 'Pemesan', 'destination': 'Tujuan', 'purpose': 'Keperluan',
+         'status': 'Status'},
+        'Jam Mulai',
+    ),
+}
+
+# Label dropdown hapus katalog (halaman admin), kolom dari get_all_rooms/assets/vehicles
+CATALOG_OPTION_LABELS = {
+    'rooms': "{name} (Kapasitas: {capacity})",
+    'assets': "{name} ({type})",
+    'vehicles': "{name} ({plate_number})",
+}
+
+# Label dropdown pembatalan (halaman Riwayat), kolom dari tabel riwayat yang ditampilkan
+CANCEL_OPTION_LABELS = {
+    'Ruangan': "ID {ID}: {Ruangan} - {Tanggal} ({Jam Mulai} - {Jam Selesai})",
+    'Aset': "ID {ID}: {Aset} - {Tanggal Pinjam} s/d {Tanggal Kembali}",
+    'Kendaraan': "ID {ID}: {Kendaraan} - {Tanggal Mulai} s/d {Tanggal Kembali}",
+}
+
+# Label dropdown booking berulang (halaman Riwayat), kolom dari get_user_room_series
+SERIES_OPTION_LABEL = "ID {id}: {item_name} - {frequency} {start_time} - {end_time} (mulai {first_date})"
+
+
+def display_name(df):
+    """requester_name bila terisi (bukan NULL / kosong), selain itu user_name"""
+    requester = df['requester_name']
+    filled = requester.notna() & requester.astype(str).str.strip().ne('')
+    return requester.where(filled, df['user_name'])
+
+
+def capitalize_status(status):
+    """'disetujui' -> 'Disetujui'; NULL -> ''"""
+    return status.astype(object).where(status.notna(), '').astype(str).str.capitalize()
+
+
+def schedule_frame(booking_type, df):
+    """Tabel jadwal satu jenis dari hasil get_schedule, siap untuk st.dataframe"""
+    columns, sort_column = SCHEDULE_COLUMNS[booking_type]
+    df = df.assign(display_name=display_name(df))
+    # Baris tanpa nama pemesan tidak ditampilkan
+    df = df[df['display_name'].notna()]
+    view = df[list(columns)].rename(columns=columns)
+    view['Status'] = capitalize_status(view['Status'])
+    return view.sort_values(sort_column)
+
+
+def option_labels(df, template):
+    """Label dropdown per baris dari template format ('{name} ({type})'), sebagai Series
+
+    Index sama dengan df, sehingga pilihan bisa dipetakan kembali ke barisnya:
+    df.loc[labels == pilihan].
+    """
+    labels = pd.Series('', index=df.index, dtype=object)
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            labels = labels + literal
+        if field is not None:
+            labels = labels + df[field].astype(str)
+    return labels
+
+
+def _span(df, start, end, separator):
+    return df[start].astype(str) + separator + df[end].astype(str)
+
+
+def _daily_columns(booking_type, df):
+    columns = {'Jenis': booking_type, 'Item': df['item_name'], 'Pemesan': df['user_name']}
+    if booking_type == 'Ruangan':
+        columns['Waktu'] = _span(df, 'start_time', 'end_time', ' - ')
+    else:
+        columns['Waktu'] = _span(df, 'start_date', 'end_date', ' s/d ')
+    if booking_type == 'Kendaraan':
+        columns['Jam'] = _span(df, 'start_time', 'end_time', ' - ')
+    columns['Tanggal'] = df['start_date']
+    if booking_type == 'Kendaraan':
+        columns['Tujuan'] = df['destination']
+    columns['Keperluan'] = df['purpose']
+    columns['Status'] = df['status']
+    return columns
+
+
+def daily_export_frame(df):
+    """Isi booking_harian.csv dari hasil get_bookings (kolom view bookings)
+
+    Urutan baris dan kolom sama dengan export lama: ruangan, aset, lalu kendaraan.
+    """
+    frames = []
+    for booking_type in SCHEDULE_COLUMNS:
+        part = df[df['resource_kind'] == booking_type]
+        if not part.empty:
+            frames.append(pd.DataFrame(_daily_columns(booking_type, part)))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True, sort=False)